@@ -0,0 +1,174 @@
+import io
+import logging
+import os
+import tarfile
+import zipfile
+import zlib
+from typing import IO, Any, Iterator, Optional, Tuple, Union
+
+from app.config import settings
+from app.uploads import SpooledUpload, UploadTooLargeError, check_filename
+
+logger = logging.getLogger(__name__)
+
+# Members are copied out of the archive in chunks of this size
+CHUNK_SIZE = 1024 * 1024
+
+# Entries that archivers add alongside the real files
+IGNORED_PREFIXES = ("__MACOSX/", "./__MACOSX/")
+
+class ArchiveError(ValueError):
+    """Raised when an archive cannot be read."""
+
+class ArchiveTooLargeError(ArchiveError):
+    """Raised when an archive exceeds its member count or total size limit."""
+
+class ArchiveReader:
+    """
+    Reads the members of a ZIP or TAR archive one at a time.
+
+    Each member is copied into its own SpooledUpload only when the caller
+    asks for the next one, so at most the members the caller still holds
+    are in memory or temp files, never the whole archive. TAR archives
+    (optionally compressed) are read in a single forward pass.
+
+    Members larger than max_member_size are returned as rejected uploads;
+    passing max_members or max_total_size raises ArchiveTooLargeError.
+    """
+
+    def __init__(self, source: Union[str, bytes], max_member_size: int, max_total_size: int, max_members: int):
+        self.max_member_size = max_member_size
+        self.max_total_size = max_total_size
+        self.max_members = max_members
+        self.members = 0
+        self.total_size = 0
+        fileobj = io.BytesIO(source) if isinstance(source, bytes) else open(source, "rb")
+        try:
+            if zipfile.is_zipfile(fileobj):
+                fileobj.seek(0)
+                self.kind = "zip"
+                self._archive = zipfile.ZipFile(fileobj)
+                self._check_zip_sizes()
+            else:
+                fileobj.seek(0)
+                self.kind = "tar"
+                self._archive = tarfile.open(fileobj=fileobj, mode="r|*")
+        except (tarfile.TarError, zipfile.BadZipFile, zlib.error, EOFError, OSError) as e:
+            fileobj.close()
+            raise ArchiveError(f"Not a readable ZIP or TAR archive: {e}")
+        except ArchiveError:
+            fileobj.close()
+            raise
+        self._fileobj = fileobj
+
+    def _check_zip_sizes(self) -> None:
+        """Apply the limits to the sizes a ZIP declares, before anything is read."""
+        members = [info for info in self._archive.infolist() if self._wanted(info.filename, info.is_dir())]
+        # Only PDFs within the member limit are read; the others are rejected unread
+        total_size = sum(
+            info.file_size for info in members
+            if info.file_size <= self.max_member_size and check_filename(info.filename) is None
+        )
+        self._check_limits(len(members), total_size)
+
+    def _check_limits(self, members: int, total_size: int) -> None:
+        """Raise ArchiveTooLargeError if a member count or uncompressed size passes its limit."""
+        if members > self.max_members:
+            raise ArchiveTooLargeError(f"Archive has more than {self.max_members} files")
+        if total_size > self.max_total_size:
+            raise ArchiveTooLargeError(
+                f"Archive content exceeds {self.max_total_size // (1024*1024)}MB uncompressed"
+            )
+
+    @staticmethod
+    def _wanted(name: str, is_dir: bool) -> bool:
+        """Whether an entry is a file worth reporting (not a directory or archiver metadata)."""
+        return not is_dir and not name.startswith(IGNORED_PREFIXES) and not os.path.basename(name).startswith(".")
+
+    def _entries(self) -> Iterator[Tuple[str, int, Any]]:
+        """(name, declared size, ZipInfo or TarInfo) for each file entry in archive order."""
+        if self.kind == "zip":
+            for info in self._archive.infolist():
+                if self._wanted(info.filename, info.is_dir()):
+                    yield info.filename, info.file_size, info
+        else:
+            for member in self._archive:
+                if self._wanted(member.name, not member.isfile()):
+                    yield member.name, member.size, member
+
+    def _open(self, entry: Any) -> IO[bytes]:
+        """Open a member for reading."""
+        if self.kind == "zip":
+            return self._archive.open(entry)
+        return self._archive.extractfile(entry)
+
+    def __iter__(self) -> Iterator[SpooledUpload]:
+        """
+        Yield one upload per file member, in archive order.
+
+        Raises:
+            ArchiveTooLargeError: When a limit is passed
+            ArchiveError: When the archive turns out to be corrupt
+        """
+        try:
+            for name, declared_size, entry in self._entries():
+                self.members += 1
+                self._check_limits(self.members, self.total_size)
+                upload = SpooledUpload(
+                    name, settings.UPLOAD_SPOOL_THRESHOLD, settings.UPLOAD_SPOOL_DIR or None, self.max_member_size
+                )
+                error = check_filename(name)
+                if error is None and declared_size > self.max_member_size:
+                    error = f"File {name} too large. Maximum size is {self.max_member_size // (1024*1024)}MB"
+                if error is None:
+                    try:
+                        error = self._copy(entry, upload)
+                    except BaseException:
+                        upload.close()
+                        raise
+                if error is not None:
+                    upload.reject(error)
+                upload.finish()
+                yield upload
+            logger.info(f"Read {self.members} files ({self.total_size} bytes) from {self.kind} archive")
+        except (tarfile.TarError, zipfile.BadZipFile, zlib.error, EOFError, OSError) as e:
+            raise ArchiveError(f"Archive is corrupt: {e}")
+
+    def _copy(self, entry: Any, upload: SpooledUpload) -> Optional[str]:
+        """Copy a member into an upload, stopping at the member and total limits; returns an error."""
+        with self._open(entry) as member:
+            while True:
+                chunk = member.read(CHUNK_SIZE)
+                if not chunk:
+                    return None
+                self.total_size += len(chunk)
+                self._check_limits(self.members, self.total_size)
+                try:
+                    upload.write(chunk)
+                except UploadTooLargeError as e:
+                    return str(e)
+
+    def close(self) -> None:
+        """Close the archive."""
+        self._archive.close()
+        self._fileobj.close()
+
+def open_archive(source: Union[str, bytes]) -> ArchiveReader:
+    """
+    Open an uploaded archive with the configured limits.
+
+    Args:
+        source: Archive content as a file path or bytes
+
+    Returns:
+        ArchiveReader over its members
+
+    Raises:
+        ArchiveError: If the archive cannot be read or a ZIP declares too much content
+    """
+    return ArchiveReader(
+        source,
+        max_member_size=settings.MAX_FILE_SIZE,
+        max_total_size=settings.ARCHIVE_MAX_TOTAL_SIZE,
+        max_members=settings.ARCHIVE_MAX_MEMBERS
+    )
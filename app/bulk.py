@@ -0,0 +1,124 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from app.dates import parse_date_details
+from app.rules import RuleSet, get_rules
+
+logger = logging.getLogger(__name__)
+
+# Verdict codes used in the arrays; VERDICTS[code] is the verdict string
+UNKNOWN, PASS, FAIL = 0, 1, 2
+VERDICTS = np.array(["unknown", "pass", "fail"])
+
+# Validation kinds (0 means the doc type has no rules)
+KIND_CODES = {"expiry": 1, "inspection": 2}
+
+def parse_dates(date_strings: List[str]) -> np.ndarray:
+    """
+    Parse distinct date strings into a datetime64 array, NaT where unreadable.
+
+    Args:
+        date_strings: Distinct date strings
+
+    Returns:
+        datetime64[us] array aligned with date_strings
+    """
+    values = [parse_date_details(text).value for text in date_strings]
+    return np.array([np.datetime64("NaT") if value is None else value for value in values], dtype="datetime64[us]")
+
+def revalidate(documents: Sequence[Mapping[str, Any]], as_of: datetime,
+               rules: Optional[RuleSet] = None) -> Dict[str, np.ndarray]:
+    """
+    Compute verdicts for many already-extracted documents at a reference time.
+
+    Each distinct date string is parsed once; the date checks of every
+    document then run as array comparisons. Verdicts are the ones
+    validator.evaluate gives for the same fields and time.
+
+    Args:
+        documents: Mappings with doc_type and fields
+        as_of: Reference time the verdicts are computed for
+        rules: Rule set to validate against (default: the active one)
+
+    Returns:
+        Dictionary with verdicts (array of "pass"/"fail"/"unknown"),
+        expired (boolean array, True where the date field has expired) and
+        valid_until (datetime64 array, NaT where the verdict cannot change)
+    """
+    rules = rules or get_rules()
+    count = len(documents)
+    # Columns are collected as lists and converted once; setting array items one by one is slower
+    kinds = [0] * count
+    windows = [0] * count  # grace_days or max_age_days
+    missing = [False] * count
+    results = [UNKNOWN] * count  # Inspection result: UNKNOWN, PASS or FAIL
+    date_index = [0] * count
+
+    # Index 0 stands for "no date" so empty fields skip parsing
+    date_codes: Dict[str, int] = {"": 0}
+    result_codes = {"PASS": PASS, "FAIL": FAIL}
+    table: Dict[str, Any] = {}
+    for i, document in enumerate(documents):
+        doc_type = document["doc_type"]
+        if doc_type not in table:
+            doc = rules.get(doc_type)
+            table[doc_type] = doc and (
+                KIND_CODES[doc.validation["kind"]],
+                doc.validation.get("grace_days", doc.validation.get("max_age_days", 0)),
+                doc.required_fields,
+                doc.date_field,
+                doc.validation.get("result_field")
+            )
+        entry = table[doc_type]
+        if not entry:
+            continue
+
+        kind, window, required, date_field, result_field = entry
+        fields = document["fields"]
+        kinds[i] = kind
+        windows[i] = window
+        missing[i] = not all(map(fields.get, required))
+        date_index[i] = date_codes.setdefault(fields.get(date_field) or "", len(date_codes))
+        if result_field:
+            results[i] = result_codes.get(fields.get(result_field, "").upper(), UNKNOWN)
+
+    kinds = np.array(kinds, dtype=np.int8)
+    windows = np.array(windows, dtype="timedelta64[D]")
+    missing = np.array(missing, dtype=bool)
+    results = np.array(results, dtype=np.int8)
+    dates = parse_dates(list(date_codes))[np.array(date_index, dtype=np.int64)]
+    now = np.datetime64(as_of, "us")
+    has_date = ~np.isnat(dates)
+    # Comparisons with NaT are False, so documents without a date are never current or expired
+    current = dates > now - windows
+    too_old = has_date & ~current
+
+    expiry = np.where(has_date, np.where(current, PASS, FAIL), UNKNOWN)
+    inspection = np.select(
+        [results == PASS, results == FAIL],
+        [np.where(too_old, FAIL, PASS), FAIL],
+        UNKNOWN
+    )
+    verdicts = np.select(
+        [kinds == 0, missing, kinds == KIND_CODES["expiry"], kinds == KIND_CODES["inspection"]],
+        [UNKNOWN, FAIL, expiry, inspection],
+        UNKNOWN
+    )
+    expired = np.where(kinds == KIND_CODES["expiry"], has_date & ((dates < now) | ~current), too_old)
+
+    # Next instant the evaluation changes: the expiry date, then the end of the
+    # window (see validator.validity_boundaries); NaT if it never changes
+    never = np.datetime64("NaT", "us")
+    window_end = np.where(current, dates + windows, never)
+    valid_until = np.select(
+        [kinds == KIND_CODES["expiry"], kinds == KIND_CODES["inspection"]],
+        [np.where(dates > now, dates, window_end), window_end],
+        never
+    )
+
+    logger.info(f"Revalidated {count} documents as of {as_of.isoformat()} "
+                f"({len(date_codes) - 1} distinct dates)")
+    return {"verdicts": VERDICTS[verdicts], "expired": expired, "valid_until": valid_until}
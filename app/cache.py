@@ -0,0 +1,163 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+def content_hash(content: bytes) -> str:
+    """
+    Compute the cache key for an uploaded document.
+
+    Args:
+        content: Raw file content
+
+    Returns:
+        Hex-encoded SHA-256 digest
+    """
+    return hashlib.sha256(content).hexdigest()
+
+class ResultCache:
+    """
+    Two-tier cache of pipeline results keyed by document content hash.
+
+    A bounded in-memory LRU sits in front of an optional SQLite file so cached
+    results survive restarts. Every entry is stamped with the pipeline version
+    it was computed with; entries from another version are treated as misses
+    and dropped, so changing the parser rules invalidates the cache.
+    """
+
+    def __init__(self, version: str, max_entries: int = 512, path: Optional[str] = None):
+        self.version = version
+        self.max_entries = max_entries
+        self.path = path
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+        if path:
+            self._open_disk_tier(path)
+
+    def _open_disk_tier(self, path: str) -> None:
+        """Open the SQLite tier and drop entries from other pipeline versions."""
+        try:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, version TEXT NOT NULL, "
+                "payload TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._purge_other_versions()
+        except sqlite3.Error as e:
+            logger.error(f"Could not open result cache at {path}: {e}")
+            self._db = None
+
+    def _purge_other_versions(self) -> None:
+        """Delete disk entries that were not computed with the current version."""
+        purged = self._db.execute("DELETE FROM results WHERE version != ?", (self.version,)).rowcount
+        self._db.commit()
+        if purged:
+            logger.info(f"Dropped {purged} cached results from older pipeline versions")
+
+    def set_version(self, version: str) -> None:
+        """
+        Switch to a new pipeline version, e.g. after the rule packs were reloaded.
+
+        Args:
+            version: New version stamp; existing entries become misses
+        """
+        with self._lock:
+            if version == self.version:
+                return
+            self.version = version
+            self._memory.clear()
+            if self._db is not None:
+                try:
+                    self._purge_other_versions()
+                except sqlite3.Error as e:
+                    logger.warning(f"Error purging result cache: {e}")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result.
+
+        Args:
+            key: Content hash of the document
+
+        Returns:
+            Cached result dictionary or None on a miss
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return entry
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT version, payload FROM results WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row and row[0] == self.version:
+                        entry = json.loads(row[1])
+                        self._remember(key, entry)
+                        self.stats["disk_hits"] += 1
+                        return entry
+                    if row:
+                        self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                        self._db.commit()
+                except (sqlite3.Error, ValueError) as e:
+                    logger.warning(f"Error reading result cache: {e}")
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key: str, entry: Dict[str, Any], version: Optional[str] = None) -> None:
+        """
+        Store a pipeline result.
+
+        Args:
+            key: Content hash of the document
+            entry: JSON-serializable result dictionary
+            version: Version the result was computed with; results from a
+                version other than the current one are not stored
+        """
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            entry = dict(entry, version=self.version)
+            self._remember(key, entry)
+            self.stats["stores"] += 1
+
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO results (key, version, payload, created_at) VALUES (?, ?, ?, ?)",
+                        (key, self.version, json.dumps(entry), time.time())
+                    )
+                    self._db.commit()
+                except (sqlite3.Error, TypeError) as e:
+                    logger.warning(f"Error writing result cache: {e}")
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        """Insert into the memory tier, evicting the least recently used entry."""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and tier sizes."""
+        with self._lock:
+            return {
+                **self.stats,
+                "memory_entries": len(self._memory),
+                "disk_enabled": self._db is not None,
+                "version": self.version
+            }
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from typing import List
 
 class Settings:
@@ -10,60 +11,78 @@ class Settings:
     API_DESCRIPTION: str = "Automated compliance checking for subcontractor documents"
     
     # File Upload Settings
-    MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
-    MAX_FILES_PER_REQUEST: int = 10
+    MAX_FILE_SIZE: int = int(os.getenv("MAX_FILE_SIZE", 10 * 1024 * 1024))  # 10MB
+    MAX_FILES_PER_REQUEST: int = int(os.getenv("MAX_FILES_PER_REQUEST", "10"))
     ALLOWED_EXTENSIONS: List[str] = [".pdf"]
+    # Uploads larger than this are spooled to a temp file instead of kept in memory
+    UPLOAD_SPOOL_THRESHOLD: int = int(os.getenv("UPLOAD_SPOOL_THRESHOLD", 1024 * 1024))  # 1MB
+    UPLOAD_SPOOL_DIR: str = os.getenv("UPLOAD_SPOOL_DIR", "")  # Empty uses the system temp dir
+    
+    # Processing Pool Settings
+    PIPELINE_WORKERS: int = int(os.getenv("PIPELINE_WORKERS", os.cpu_count() or 1))
+    PIPELINE_MAX_QUEUE: int = int(os.getenv("PIPELINE_MAX_QUEUE", "32"))  # Documents waiting for a free worker
+    PIPELINE_START_METHOD: str = os.getenv("PIPELINE_START_METHOD", "spawn")
+    PIPELINE_SHUTDOWN_TIMEOUT: float = float(os.getenv("PIPELINE_SHUTDOWN_TIMEOUT", "30"))
+    MAX_CONCURRENT_FILES_PER_REQUEST: int = int(os.getenv("MAX_CONCURRENT_FILES_PER_REQUEST", PIPELINE_WORKERS))
+    MAX_CONCURRENT_FILES: int = int(os.getenv("MAX_CONCURRENT_FILES", PIPELINE_WORKERS + PIPELINE_MAX_QUEUE))
     
     # OCR Settings
-    OCR_DPI: int = 300
+    OCR_DPI: int = int(os.getenv("OCR_DPI", "300"))
+    # Adaptive OCR reads pages at this DPI first and re-reads at OCR_DPI only when needed (0 disables)
+    OCR_FIRST_PASS_DPI: int = int(os.getenv("OCR_FIRST_PASS_DPI", "200"))
+    OCR_MIN_WORD_CONFIDENCE: float = float(os.getenv("OCR_MIN_WORD_CONFIDENCE", "75"))  # Mean tesseract word confidence (0-100)
     OCR_CONFIG: str = r'--oem 3 --psm 6'
+    OCR_LANG: str = os.getenv("OCR_LANG", "eng")
+    # "auto" uses the in-process tesserocr engine when installed, else the pytesseract CLI
+    OCR_BACKEND: str = os.getenv("OCR_BACKEND", "auto")
+    # Cores one document may use for OCR. The default shares the host between the pipeline
+    # workers so they cannot oversubscribe it when all are busy; raising it (e.g. to the CPU
+    # count) lowers single-document latency at the cost of contention under load
+    OCR_CORES_PER_DOCUMENT: int = int(os.getenv("OCR_CORES_PER_DOCUMENT", max(1, (os.cpu_count() or 1) // PIPELINE_WORKERS)))
+    # Pages OCR'd in parallel per document, split out of OCR_CORES_PER_DOCUMENT
+    OCR_WORKERS: int = int(os.getenv("OCR_WORKERS", min(4, OCR_CORES_PER_DOCUMENT)))
+    # OpenMP threads per tesseract page (OMP_THREAD_LIMIT): the rest of the document's cores
+    OCR_THREAD_LIMIT: int = int(os.getenv("OCR_THREAD_LIMIT", max(1, OCR_CORES_PER_DOCUMENT // OCR_WORKERS)))
+    
+    # Archive Settings
+    ARCHIVE_MAX_SIZE: int = int(os.getenv("ARCHIVE_MAX_SIZE", 512 * 1024 * 1024))  # Uploaded archive, compressed
+    ARCHIVE_MAX_TOTAL_SIZE: int = int(os.getenv("ARCHIVE_MAX_TOTAL_SIZE", 2 * 1024 * 1024 * 1024))  # All members, uncompressed
+    ARCHIVE_MAX_MEMBERS: int = int(os.getenv("ARCHIVE_MAX_MEMBERS", "1000"))
+    # Members read ahead of processing; bounds the archive content held at once
+    ARCHIVE_READ_AHEAD: int = int(os.getenv("ARCHIVE_READ_AHEAD", "2"))
+    
+    # Job Settings
+    # Job database and uploaded job files; keep it on persistent storage so jobs survive restarts
+    JOBS_DIR: str = os.getenv("JOBS_DIR", os.path.join(tempfile.gettempdir(), "compliance-jobs"))
+    JOB_MAX_FILES: int = int(os.getenv("JOB_MAX_FILES", "500"))
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))  # Jobs processed at the same time
+    JOB_RETENTION: float = float(os.getenv("JOB_RETENTION", 7 * 24 * 60 * 60))  # Seconds finished jobs are kept, 0 keeps them
+    
+    # Result Cache Settings
+    RESULT_CACHE_SIZE: int = int(os.getenv("RESULT_CACHE_SIZE", "512"))  # In-memory LRU entries
+    RESULT_CACHE_PATH: str = os.getenv("RESULT_CACHE_PATH", "")  # SQLite file, empty disables the disk tier
     
     # Text Extraction Settings
     MIN_TEXT_LENGTH: int = 50  # Minimum characters to consider text extraction successful
+    # "full" reads every page; "early" stops once required and date fields are found
+    EXTRACTION_MODE: str = os.getenv("EXTRACTION_MODE", "full")
+    EARLY_STOP_MIN_CONFIDENCE: float = float(os.getenv("EARLY_STOP_MIN_CONFIDENCE", "0.85"))
     
     # Validation Settings
-    EXPIRY_GRACE_PERIOD_DAYS: int = 30
-    INSPECTION_VALIDITY_DAYS: int = 365
+    DATE_CACHE_SIZE: int = int(os.getenv("DATE_CACHE_SIZE", "4096"))  # Parsed date strings kept in memory
+    # Longest time clients may cache a verdict that has no upcoming expiry boundary
+    VERDICT_MAX_AGE: int = int(os.getenv("VERDICT_MAX_AGE", 24 * 60 * 60))
+    
+    # Rule Pack Settings
+    # Doc types, keywords, field patterns and validation rules (a YAML/JSON file or a directory of them)
+    RULES_PATH: str = os.getenv("RULES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules"))
+    RULES_RELOAD_INTERVAL: float = float(os.getenv("RULES_RELOAD_INTERVAL", "0"))  # Seconds between change checks, 0 disables
     
     # Logging Settings
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     
     # CORS Settings
     CORS_ORIGINS: List[str] = ["*"]  # In production, specify your frontend domain
-    
-    # Document Type Keywords
-    INSURANCE_KEYWORDS: List[str] = [
-        "liability insurance", "general liability", "workers compensation",
-        "certificate of insurance", "insurance certificate", "policy",
-        "coverage", "insured", "insurer", "premium"
-    ]
-    
-    INSPECTION_KEYWORDS: List[str] = [
-        "inspection checklist", "inspection sheet", "equipment inspection",
-        "safety inspection", "crane inspection", "hoist inspection",
-        "inspector", "qualified person", "inspection date"
-    ]
-    
-    TRAINING_KEYWORDS: List[str] = [
-        "training card", "osha", "safety training", "certification",
-        "worker qualification", "training certificate", "safety card",
-        "competent person", "training hours"
-    ]
-    
-    # Required Fields by Document Type
-    REQUIRED_FIELDS = {
-        "insurance": ["insured", "policy_number"],
-        "inspection": ["inspector", "inspection_date"],
-        "training": ["worker_name", "certificate_id"]
-    }
-    
-    # Date Formats
-    DATE_FORMATS: List[str] = [
-        "%m/%d/%Y", "%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y", "%m-%d-%Y",
-        "%d/%m/%y", "%m/%d/%y", "%y-%m-%d", "%d-%m-%y", "%m-%d-%y",
-        "%B %d, %Y", "%d %B %Y", "%Y %B %d",
-        "%b %d, %Y", "%d %b %Y", "%Y %b %d"
-    ]
 
 # Global settings instance
 settings = Settings() 
\ No newline at end of file
@@ -0,0 +1,254 @@
+import calendar
+import functools
+import logging
+import re
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Common date formats - expanded to handle more variations. The order decides
+# ambiguous dates: slashes read as mm/dd/yyyy first, dashes as dd-mm-yyyy
+DATE_FORMATS = [
+    "%m/%d/%Y", "%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y", "%m-%d-%Y",
+    "%d/%m/%y", "%m/%d/%y", "%y-%m-%d", "%d-%m-%y", "%m-%d-%y",
+    "%B %d, %Y", "%d %B %Y", "%Y %B %d",
+    "%b %d, %Y", "%d %b %Y", "%Y %b %d",
+    # Add formats for dates like "15-May-2030"
+    "%d-%b-%Y", "%d-%B-%Y",
+    "%Y-%b-%d", "%Y-%B-%d",
+    "%b %d %Y", "%B %d %Y",
+    "%d %b %Y", "%d %B %Y"
+]
+
+SKIPPED_DATES = ("n/a", "none", "unknown", "tbd", "y")
+
+# Date patterns searched for in longer strings when no format matches
+TEXT_DATE_PATTERNS = [
+    (r'(\d{1,2})[/-](\d{1,2})[/-](\d{2,4})', "text:%d/%m/%Y"),
+    (r'(\d{4})[/-](\d{1,2})[/-](\d{1,2})', "text:%Y/%m/%d"),
+    # Pattern for "15-May-2030" format
+    (r'(\d{1,2})-([A-Za-z]{3,})-(\d{4})', "text:%d-%b-%Y"),
+]
+
+class ParsedDate(NamedTuple):
+    """A parsed date with the format that produced it."""
+    value: Optional[datetime]
+    format: Optional[str] = None  # strptime format, "text:..." when found inside a longer string
+    ambiguous: bool = False  # Another format reads the same string as a different date
+
+def parse_with_formats(date_string: str) -> ParsedDate:
+    """
+    Parse a stripped date string by trying every format in order.
+
+    This is the complete (slow) parsing procedure: each format in DATE_FORMATS
+    is tried with strptime, then dates are searched for inside the string.
+    DateParser only takes shortcuts that give the same result.
+
+    Args:
+        date_string: Stripped date string
+
+    Returns:
+        ParsedDate, with value None if nothing matched
+    """
+    for fmt in DATE_FORMATS:
+        try:
+            return ParsedDate(datetime.strptime(date_string, fmt), fmt)
+        except ValueError:
+            continue
+    return search_text_date(date_string)
+
+def search_text_date(date_string: str) -> ParsedDate:
+    """
+    Look for a date inside a longer string.
+
+    Args:
+        date_string: Stripped string that matched none of DATE_FORMATS
+
+    Returns:
+        ParsedDate, with value None if no date was found
+    """
+    try:
+        for pattern, label in TEXT_DATE_PATTERNS:
+            match = re.search(pattern, date_string)
+            if not match:
+                continue
+            day, month, year = match.groups()
+            if label == "text:%d-%b-%Y":
+                # Handle "15-May-2030" format, month abbreviated or in full
+                for month_format in ("%b", "%B"):
+                    try:
+                        month_num = datetime.strptime(month, month_format).month
+                        return ParsedDate(datetime(int(year), month_num, int(day)), label)
+                    except ValueError:
+                        continue
+            else:
+                # Handle numeric formats (day first, 2-digit years pivot at 50)
+                if len(year) == 2:
+                    year = f"20{year}" if int(year) < 50 else f"19{year}"
+                return ParsedDate(datetime(int(year), int(month), int(day)), label)
+    except Exception as e:
+        logger.debug(f"Error parsing date '{date_string}': {e}")
+
+    return ParsedDate(None)
+
+def strptime_year(digits: str, directive: str) -> int:
+    """Year for a %Y or %y field, pivoting 2-digit years at 69 as strptime does."""
+    year = int(digits)
+    if directive == "y":
+        year += 2000 if year <= 68 else 1900
+    return year
+
+class DateParser:
+    """
+    Parses dates by recognising the shape of the string first.
+
+    Strings that look like numeric dates (1/2/2024, 2024-01-02) or dates with
+    a month name (Jan 2, 2024, 2-January-2024) are read directly from their
+    parts, trying only the formats that fit the shape and in the same order
+    as DATE_FORMATS. Every other string, and any shape whose formats all
+    fail, goes through parse_with_formats, so results are identical to
+    trying each format in turn.
+
+    strptime itself is skipped when no format can match: every format reads
+    ASCII digits, month names and whitespace that the shapes cover, except
+    that strptime's %d also accepts a space before a single digit.
+    """
+
+    NUMERIC_SHAPE = re.compile(r'([0-9]+)([/-])([0-9]+)\2([0-9]+)')
+    # Month-name shapes: (regex, group order, formats in DATE_FORMATS order)
+    NAMED_SHAPES = [
+        (re.compile(r'([A-Za-z]+)\s+([0-9]{1,2}),\s+([0-9]{4})'), "bdY", ["%B %d, %Y", "%b %d, %Y"]),
+        (re.compile(r'([0-9]{1,2})\s+([A-Za-z]+)\s+([0-9]{4})'), "dbY", ["%d %B %Y", "%d %b %Y"]),
+        (re.compile(r'([0-9]{4})\s+([A-Za-z]+)\s+([0-9]{1,2})'), "Ybd", ["%Y %B %d", "%Y %b %d"]),
+        (re.compile(r'([0-9]{1,2})-([A-Za-z]+)-([0-9]{4})'), "dbY", ["%d-%b-%Y", "%d-%B-%Y"]),
+        (re.compile(r'([0-9]{4})-([A-Za-z]+)-([0-9]{1,2})'), "Ybd", ["%Y-%b-%d", "%Y-%B-%d"]),
+        (re.compile(r'([A-Za-z]+)\s+([0-9]{1,2})\s+([0-9]{4})'), "bdY", ["%b %d %Y", "%B %d %Y"]),
+    ]
+
+    def __init__(self, formats: List[str] = DATE_FORMATS):
+        # Numeric formats by separator: (format, field order such as "mdY")
+        self._numeric: dict = {}
+        for fmt in formats:
+            directives = re.findall(r'%(\w)', fmt)
+            separators = set(re.sub(r'%\w', '', fmt))
+            if len(directives) == 3 and len(separators) == 1 and separators <= {"/", "-"} and "b" not in fmt.lower():
+                self._numeric.setdefault(separators.pop(), []).append((fmt, "".join(directives)))
+
+        # Month names as strptime reads them for %B and %b
+        self._months = {name.lower(): i for i, name in enumerate(calendar.month_name) if name}
+        self._abbreviations = {name.lower(): i for i, name in enumerate(calendar.month_abbr) if name}
+
+    def parse(self, date_string: str) -> ParsedDate:
+        """
+        Parse a date string.
+
+        Args:
+            date_string: Date string to parse
+
+        Returns:
+            ParsedDate with the datetime (None if parsing fails), the format
+            used and whether another format reads it differently
+        """
+        if not date_string:
+            return ParsedDate(None)
+
+        date_string = date_string.strip()
+
+        # Skip obviously invalid dates
+        if len(date_string) < 3 or date_string.lower() in SKIPPED_DATES:
+            logger.warning(f"Skipping invalid date: {date_string}")
+            return ParsedDate(None)
+
+        parsed = self._parse_shape(date_string)
+        if parsed is None:
+            if date_string.isascii() and "/ " not in date_string and "- " not in date_string:
+                parsed = search_text_date(date_string)
+            else:
+                parsed = parse_with_formats(date_string)
+            if parsed.value is None:
+                logger.warning(f"Could not parse date: {date_string}")
+        return parsed
+
+    def _parse_shape(self, date_string: str) -> Optional[ParsedDate]:
+        """Parse a recognised shape directly, or return None to use every format."""
+        match = self.NUMERIC_SHAPE.fullmatch(date_string)
+        if match:
+            first, separator, second, third = match.groups()
+            candidates = [
+                (fmt, self._numeric_date(order, (first, second, third)))
+                for fmt, order in self._numeric.get(separator, ())
+            ]
+            return self._first(candidates)
+
+        for shape, order, formats in self.NAMED_SHAPES:
+            match = shape.fullmatch(date_string)
+            if match:
+                parts = dict(zip(order, match.groups()))
+                month_name = parts["b"].lower()
+                candidates = []
+                for fmt in formats:
+                    month = (self._months if "%B" in fmt else self._abbreviations).get(month_name)
+                    if month is not None:
+                        candidates.append((fmt, self._make_date(int(parts["Y"]), month, int(parts["d"]))))
+                return self._first(candidates)
+        return None
+
+    def _numeric_date(self, order: str, parts: Tuple[str, str, str]) -> Optional[datetime]:
+        """Read numeric parts in a field order, with strptime's field widths and ranges."""
+        fields = dict(zip(order, parts))
+        year_directive = "Y" if "Y" in fields else "y"
+        year, month, day = fields[year_directive], fields["m"], fields["d"]
+        if len(year) != (4 if year_directive == "Y" else 2) or len(month) > 2 or len(day) > 2:
+            return None
+        month, day = int(month), int(day)
+        if not (1 <= month <= 12 and 1 <= day <= 31):
+            return None
+        return self._make_date(strptime_year(year, year_directive), month, day)
+
+    @staticmethod
+    def _make_date(year: int, month: int, day: int) -> Optional[datetime]:
+        """datetime for the parts, or None for a day the month does not have."""
+        try:
+            return datetime(year, month, day)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _first(candidates: List[Tuple[str, Optional[datetime]]]) -> Optional[ParsedDate]:
+        """The first format that produced a date, flagged if another produced a different one."""
+        parsed = [(fmt, value) for fmt, value in candidates if value is not None]
+        if not parsed:
+            return None
+        fmt, value = parsed[0]
+        return ParsedDate(value, fmt, any(other != value for _, other in parsed[1:]))
+
+DATE_PARSER = DateParser()
+
+@functools.lru_cache(maxsize=settings.DATE_CACHE_SIZE)
+def parse_date_details(date_string: str) -> ParsedDate:
+    """
+    Parse a date string, memoizing the result.
+
+    Args:
+        date_string: Date string to parse
+
+    Returns:
+        ParsedDate with the datetime (None if parsing fails), the format
+        used and whether the string is ambiguous (e.g. 03/04/2024)
+    """
+    return DATE_PARSER.parse(date_string)
+
+def parse_date(date_string: str) -> Optional[datetime]:
+    """
+    Parse date string using multiple formats.
+
+    Args:
+        date_string: Date string to parse
+
+    Returns:
+        Parsed datetime object or None if parsing fails
+    """
+    return parse_date_details(date_string).value
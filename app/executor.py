@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from app.config import settings
+from app.pipeline import init_worker
+
+logger = logging.getLogger(__name__)
+
+class PipelineBusyError(Exception):
+    """Raised when the processing pool cannot accept more work."""
+
+class PipelineExecutor:
+    """
+    Process pool that runs CPU-bound document work off the event loop.
+
+    The pool is created on startup (or lazily on first use) and accepts at most
+    ``max_workers + max_queue`` outstanding documents; anything beyond that is
+    rejected with PipelineBusyError instead of queueing without bound.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, start_method: str = "spawn",
+                 initializer: Optional[Callable[[], None]] = None):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.start_method = start_method
+        self.initializer = initializer
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._closing = False
+
+    @property
+    def pending(self) -> int:
+        """Number of documents currently running or queued in the pool."""
+        return self._pending
+
+    def start(self) -> None:
+        """Create the worker pool if it is not running yet."""
+        self._closing = False
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+                initializer=self.initializer
+            )
+            logger.info(f"Started processing pool with {self.max_workers} workers")
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a picklable function in the pool and await its result.
+
+        Raises:
+            PipelineBusyError: If the pool is shutting down or its queue is full
+        """
+        if self._closing:
+            raise PipelineBusyError("Processing pool is shutting down")
+        if self._pending >= self.max_workers + self.max_queue:
+            raise PipelineBusyError("Processing queue is full")
+
+        self.start()
+        pool = self._pool
+        self._pending += 1
+        try:
+            return await asyncio.wrap_future(pool.submit(fn, *args))
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); replace the pool so later requests recover
+            logger.error("Processing pool broke, restarting workers")
+            if self._pool is pool:
+                self._pool = None
+                pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        finally:
+            self._pending -= 1
+
+    async def shutdown(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop accepting work and wait for in-flight documents to finish.
+
+        Args:
+            timeout: Seconds to wait before cancelling queued work
+        """
+        self._closing = True
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+
+        try:
+            await asyncio.wait_for(asyncio.to_thread(pool.shutdown, wait=True), timeout)
+            logger.info("Processing pool shut down")
+        except asyncio.TimeoutError:
+            logger.warning(f"Processing pool did not drain within {timeout}s, cancelling queued work")
+            pool.shutdown(wait=False, cancel_futures=True)
+
+# Global executor instance
+pipeline_executor = PipelineExecutor(
+    max_workers=settings.PIPELINE_WORKERS,
+    max_queue=settings.PIPELINE_MAX_QUEUE,
+    start_method=settings.PIPELINE_START_METHOD,
+    initializer=init_worker
+)
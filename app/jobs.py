@@ -0,0 +1,310 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List, Optional
+
+from app.executor import PipelineBusyError
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait before retrying a file the processing pool had no room for
+BUSY_RETRY_SECONDS = 1.0
+
+class StoredFile:
+    """
+    A job's uploaded file saved in the job directory.
+
+    Offers the same interface as SpooledUpload, so the request code path can
+    process it, and can be rebuilt from the job store after a restart.
+    """
+
+    def __init__(self, index: int, filename: str, path: Optional[str], digest: str, error: Optional[str] = None):
+        self.index = index
+        self.filename = filename
+        self.path = path
+        self.digest = digest
+        self.error = error
+
+    @property
+    def source(self):
+        """The saved file path (empty content when nothing was saved)."""
+        return self.path if self.path is not None else b""
+
+    def close(self) -> None:
+        """Delete the saved file."""
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not remove job file {self.path}: {e}")
+            self.path = None
+
+class JobStore:
+    """
+    SQLite record of jobs, their files and each file's result.
+
+    Results are written as soon as a file finishes, so a restarted service
+    only reprocesses the files of a job that had no result yet.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(directory, "jobs.db"), check_same_thread=False)
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, as_of TEXT NOT NULL, fields TEXT, "
+            "total INTEGER NOT NULL, created_at REAL NOT NULL, updated_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS job_files ("
+            "job_id TEXT NOT NULL, idx INTEGER NOT NULL, filename TEXT NOT NULL, path TEXT, "
+            "digest TEXT NOT NULL, error TEXT, result TEXT, failed INTEGER NOT NULL DEFAULT 0, "
+            "PRIMARY KEY (job_id, idx));"
+        )
+        self._db.commit()
+
+    def job_dir(self, job_id: str) -> str:
+        """Directory holding a job's uploaded files."""
+        return os.path.join(self.directory, job_id)
+
+    def create(self, uploads: List[Any], as_of: datetime, fields: Optional[FrozenSet[str]]) -> str:
+        """
+        Save uploaded files into a new job directory and record the job.
+
+        Args:
+            uploads: Received uploads (SpooledUpload); their content moves to the job
+            as_of: Reference time every file of the job is validated against
+            fields: Field projection, or None for every field
+
+        Returns:
+            New job id
+        """
+        job_id = uuid.uuid4().hex
+        job_dir = self.job_dir(job_id)
+        os.makedirs(job_dir)
+        rows = []
+        try:
+            for index, upload in enumerate(uploads):
+                path = None
+                if upload.error is None:
+                    path = os.path.join(job_dir, f"{index}.pdf")
+                    upload.save(path)
+                rows.append((job_id, index, upload.filename, path, upload.digest, upload.error))
+
+            now = time.time()
+            with self._lock:
+                self._db.execute(
+                    "INSERT INTO jobs (id, status, as_of, fields, total, created_at, updated_at) "
+                    "VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+                    (job_id, as_of.isoformat(), None if fields is None else json.dumps(sorted(fields)),
+                     len(rows), now, now)
+                )
+                self._db.executemany(
+                    "INSERT INTO job_files (job_id, idx, filename, path, digest, error) VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._db.commit()
+        except Exception:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a job with its progress counters.
+
+        Returns:
+            Job dictionary, or None if there is no such job
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, as_of, fields, total, created_at, updated_at, "
+                "(SELECT COUNT(result) FROM job_files WHERE job_id = jobs.id), "
+                "(SELECT COALESCE(SUM(failed), 0) FROM job_files WHERE job_id = jobs.id) "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        status, as_of, fields, total, created_at, updated_at, completed, failed = row
+        return {
+            "job_id": job_id,
+            "status": status,
+            "as_of": datetime.fromisoformat(as_of),
+            "fields": None if fields is None else frozenset(json.loads(fields)),
+            "total": total,
+            "completed": completed,
+            "failed": failed,
+            "created_at": created_at,
+            "updated_at": updated_at
+        }
+
+    def results(self, job_id: str) -> List[Dict[str, Any]]:
+        """Results of the job's finished files, in upload order."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT result FROM job_files WHERE job_id = ? AND result IS NOT NULL ORDER BY idx", (job_id,)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def pending_files(self, job_id: str) -> List[StoredFile]:
+        """Files of the job that have no result yet."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT idx, filename, path, digest, error FROM job_files "
+                "WHERE job_id = ? AND result IS NULL ORDER BY idx", (job_id,)
+            ).fetchall()
+        return [StoredFile(*row) for row in rows]
+
+    def save_result(self, job_id: str, index: int, result: Dict[str, Any], failed: bool) -> None:
+        """Record a file's result."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE job_files SET result = ?, failed = ?, path = NULL WHERE job_id = ? AND idx = ?",
+                (json.dumps(result), int(failed), job_id, index)
+            )
+            self._db.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+            self._db.commit()
+
+    def set_status(self, job_id: str, status: str) -> None:
+        """Move a job to queued, running, done or failed."""
+        with self._lock:
+            self._db.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?", (status, time.time(), job_id))
+            self._db.commit()
+
+    def unfinished(self) -> List[str]:
+        """Ids of queued and running jobs, oldest first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def purge(self, older_than: float) -> int:
+        """
+        Delete finished jobs last updated before a time.
+
+        Args:
+            older_than: Unix timestamp
+
+        Returns:
+            Number of jobs deleted
+        """
+        with self._lock:
+            ids = [row[0] for row in self._db.execute(
+                "SELECT id FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?", (older_than,)
+            )]
+            for job_id in ids:
+                self._db.execute("DELETE FROM job_files WHERE job_id = ?", (job_id,))
+                self._db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            self._db.commit()
+        for job_id in ids:
+            shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+        return len(ids)
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._db.close()
+
+# Processes one file of a job: (file, per-job semaphore, as_of, fields) -> DocumentResult
+ProcessFile = Callable[[StoredFile, asyncio.Semaphore, datetime, Optional[FrozenSet[str]]], Awaitable[Any]]
+
+class JobManager:
+    """
+    Runs stored jobs in the background, a few at a time.
+
+    Each job's files go through the same per-file processing as /check-docs,
+    with at most ``files_per_job`` of them in flight; every result is stored
+    the moment its file finishes. Jobs left unfinished by a restart are
+    resumed from their pending files when the manager starts.
+    """
+
+    def __init__(self, store: JobStore, process: ProcessFile, workers: int = 1,
+                 files_per_job: int = 1, retention: float = 0):
+        self.store = store
+        self.process = process
+        self.workers = max(1, workers)
+        self.files_per_job = max(1, files_per_job)
+        self.retention = retention
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Start the worker tasks and requeue jobs a previous run did not finish."""
+        if self.retention > 0:
+            purged = await asyncio.to_thread(self.store.purge, time.time() - self.retention)
+            if purged:
+                logger.info(f"Deleted {purged} expired jobs")
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        unfinished = await asyncio.to_thread(self.store.unfinished)
+        for job_id in unfinished:
+            self._queue.put_nowait(job_id)
+        if unfinished:
+            logger.info(f"Resuming {len(unfinished)} unfinished jobs")
+
+    async def stop(self) -> None:
+        """Cancel the workers; interrupted jobs resume on the next start."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, uploads: List[Any], as_of: datetime, fields: Optional[FrozenSet[str]] = None) -> str:
+        """
+        Store a batch of uploads as a new job and queue it.
+
+        Returns:
+            Job id
+        """
+        job_id = await asyncio.to_thread(self.store.create, uploads, as_of, fields)
+        self._queue.put_nowait(job_id)
+        logger.info(f"Queued job {job_id} with {len(uploads)} files")
+        return job_id
+
+    async def _work(self) -> None:
+        """Run queued jobs one after another."""
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self.run_job(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {e}")
+                await asyncio.to_thread(self.store.set_status, job_id, "failed")
+
+    async def run_job(self, job_id: str) -> None:
+        """Process a job's pending files and mark it done."""
+        job = await asyncio.to_thread(self.store.get, job_id)
+        files = await asyncio.to_thread(self.store.pending_files, job_id)
+        await asyncio.to_thread(self.store.set_status, job_id, "running")
+        slots = asyncio.Semaphore(self.files_per_job)
+
+        async def run_file(file: StoredFile) -> None:
+            while True:
+                try:
+                    result = await self.process(file, slots, job["as_of"], job["fields"])
+                    break
+                except PipelineBusyError:
+                    await asyncio.sleep(BUSY_RETRY_SECONDS)
+            await asyncio.to_thread(
+                self.store.save_result, job_id, file.index,
+                result.model_dump(mode="json", exclude={"timings"}), result.doc_type == "error"
+            )
+            file.close()
+
+        await asyncio.gather(*(run_file(file) for file in files))
+        # Clean up first, so a job is never seen as done while its files remain
+        await asyncio.to_thread(shutil.rmtree, self.store.job_dir(job_id), True)
+        await asyncio.to_thread(self.store.set_status, job_id, "done")
+        logger.info(f"Finished job {job_id} ({job['total']} files)")
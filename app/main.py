@@ -1,20 +1,65 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator, FrozenSet, Iterator, Optional
+from email.utils import format_datetime
+import asyncio
+import json
 import logging
-from typing import List
-import os
+import time
 
-from app.pdf_utils import extract_text_from_pdf
-from app.parser import parse_document_type, parse_fields
-from app.validator import validate_fields
-from app.models import DocumentResult, FieldResult
+from app.config import settings
+from app.executor import pipeline_executor, PipelineBusyError
+from app.pipeline import process_document, compute_pipeline_version
+from app.archives import ArchiveError, ArchiveReader, ArchiveTooLargeError, open_archive
+from app.bulk import revalidate
+from app.cache import ResultCache
+from app.jobs import JobManager, JobStore
+from app.metrics import (
+    ERRORS, FILES_IN_FLIGHT, PAGES_PROCESSED, PIPELINE_PENDING, VERDICTS, record_timings, render_metrics
+)
+from app.rules import RuleError, RuleSet, get_rules, reload_rules, rules_changed
+from app.uploads import SpooledUpload, receive_body, receive_uploads
+from app.timings import StageTimer, milliseconds, server_timing, summarize_timings
+from app.validator import evaluate
+from app.models import DocumentResult, FieldResult, RevalidationRequest, StageTimings, ValidationDetails, as_utc
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Compliance Document Service", version="2.0.0")
+async def watch_rules(interval: float) -> None:
+    """Reload the rule packs whenever their files change"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if await asyncio.to_thread(rules_changed):
+                apply_rules(await asyncio.to_thread(reload_rules))
+        except RuleError as e:
+            logger.error(f"Keeping current rule packs: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the processing pool and job workers on startup and drain them on shutdown"""
+    global job_manager
+    pipeline_executor.start()
+    watcher = None
+    if settings.RULES_RELOAD_INTERVAL > 0:
+        watcher = asyncio.create_task(watch_rules(settings.RULES_RELOAD_INTERVAL))
+    # The job store is opened here rather than on import, so importing the app touches no files
+    job_manager = create_job_manager()
+    await job_manager.start()
+    yield
+    if watcher is not None:
+        watcher.cancel()
+    await job_manager.stop()
+    job_manager.store.close()
+    job_manager = None
+    await pipeline_executor.shutdown(timeout=settings.PIPELINE_SHUTDOWN_TIMEOUT)
+
+app = FastAPI(title="Compliance Document Service", version="2.0.0", lifespan=lifespan)
 
 # Add CORS middleware for frontend integration
 app.add_middleware(
@@ -25,21 +70,88 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Constants
-MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
-ALLOWED_EXTENSIONS = {".pdf"}
+# Caps the number of files in flight across all requests
+file_slots = asyncio.Semaphore(settings.MAX_CONCURRENT_FILES)
+PIPELINE_PENDING.set_function(lambda: pipeline_executor.pending)
+
+# Pipeline results keyed by content hash; the verdict is always recomputed
+result_cache = ResultCache(
+    version=compute_pipeline_version(),
+    max_entries=settings.RESULT_CACHE_SIZE,
+    path=settings.RESULT_CACHE_PATH or None
+)
+CACHED_KEYS = ("text", "doc_type", "fields", "confidences", "metadata")
+
+def apply_rules(rules: RuleSet) -> None:
+    """Point the result cache at a newly loaded rule set; workers follow on their next document"""
+    result_cache.set_version(compute_pipeline_version(rules.version))
+
+def rules_summary(rules: RuleSet) -> dict:
+    """Describe a rule set for the rules endpoints"""
+    return {
+        "version": rules.version,
+        "load_ms": round(rules.load_seconds * 1000, 2),
+        "doc_types": [
+            {
+                "doc_type": doc.name,
+                "source": doc.source,
+                "keywords": len(doc.keywords),
+                "fields": list(doc.fields),
+                "required_fields": doc.required_fields,
+                "validation": doc.validation
+            }
+            for doc in rules.doc_types.values()
+        ]
+    }
+
+def project_fields(values: dict, fields: Optional[FrozenSet[str]]) -> dict:
+    """Keep only the requested fields (all of them when fields is None)"""
+    if fields is None:
+        return values
+    return {name: value for name, value in values.items() if name in fields}
 
-def validate_file(file: UploadFile) -> None:
-    """Validate uploaded file"""
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="No filename provided")
+async def analyze_content(upload: SpooledUpload, as_of: datetime, fields: Optional[FrozenSet[str]] = None) -> dict:
+    """
+    Run the pipeline for an upload, reusing a cached result for identical content.
+    
+    With a field projection only the requested fields are parsed and
+    returned; such partial results are not cached, but a cached full result
+    serves any projection.
+    """
+    digest = upload.digest
+    cached = await asyncio.to_thread(result_cache.get, digest)
+    if cached is not None:
+        logger.info(f"Result cache hit for {digest[:12]}")
+        timer = StageTimer()
+        with timer.time("validate"):
+            validation = evaluate(cached["fields"], cached["doc_type"], as_of)
+        record_timings(timer.to_dict())
+        return dict(
+            cached,
+            fields=project_fields(cached["fields"], fields),
+            confidences=project_fields(cached["confidences"], fields),
+            verdict=validation.pop("verdict"),
+            valid_until=validation.pop("valid_until"),
+            validation=validation,
+            timings=dict(timer.to_dict(), cached=True)
+        )
     
-    file_ext = os.path.splitext(file.filename)[1].lower()
-    if file_ext not in ALLOWED_EXTENSIONS:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"Invalid file type. Only PDF files are allowed. Got: {file_ext}"
+    # Spooled uploads are passed by path so workers read them from disk; the
+    # rules version makes workers pick up reloaded rule packs
+    rules_version = get_rules().version
+    submitted = time.time()
+    processed = await pipeline_executor.run(process_document, upload.source, rules_version, as_of, fields)
+    # Workers only measure; metrics are recorded here, in the process that serves them
+    timings = processed["timings"]
+    timings["stages"]["queue"] = [max(0.0, timings["started"] - submitted)]
+    record_timings(timings)
+    PAGES_PROCESSED.inc(processed["metadata"]["pages_read"])
+    if fields is None and processed["text"].strip() and processed["rules_version"] == rules_version:
+        await asyncio.to_thread(
+            result_cache.put, digest, {k: processed[k] for k in CACHED_KEYS},
+            compute_pipeline_version(rules_version)
         )
+    return processed
 
 @app.get("/", response_class=HTMLResponse)
 async def root():
@@ -179,6 +291,14 @@ async def root():
                 background: #fff3cd;
                 color: #856404;
             }
+            .verdict.processing {
+                background: #e2e6fb;
+                color: #667eea;
+            }
+            .validation-warning {
+                color: #856404;
+                margin-top: 5px;
+            }
             .field-grid {
                 display: grid;
                 grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
@@ -341,7 +461,8 @@ async def root():
                         formData.append('files', file);
                     });
                     
-                    const response = await fetch('/check-docs', {
+                    // Results are streamed as NDJSON, one line per file as soon as it is done
+                    const response = await fetch('/check-docs?stream=ndjson', {
                         method: 'POST',
                         body: formData
                     });
@@ -350,12 +471,27 @@ async def root():
                         throw new Error(`HTTP error! status: ${response.status}`);
                     }
                     
-                    const data = await response.json();
-                    displayResults(data.results);
+                    const cards = createResultCards(selectedFiles);
+                    const reader = response.body.getReader();
+                    const decoder = new TextDecoder();
+                    let buffer = '';
+                    
+                    while (true) {
+                        const { done, value } = await reader.read();
+                        if (done) break;
+                        
+                        buffer += decoder.decode(value, { stream: true });
+                        const lines = buffer.split('\\n');
+                        buffer = lines.pop();
+                        lines.filter(line => line.trim()).forEach(line => {
+                            const item = JSON.parse(line);
+                            displayResult(cards[item.index], item);
+                        });
+                    }
                     
                 } catch (error) {
                     console.error('Error:', error);
-                    results.innerHTML = `
+                    results.innerHTML += `
                         <div class="error">
                             <h4>❌ Error Processing Files</h4>
                             <p>${error.message}</p>
@@ -367,119 +503,558 @@ async def root():
                 }
             }
             
-            function displayResults(results) {
+            function createResultCards(files) {
                 const resultsDiv = document.getElementById('results');
-                
-                if (results.length === 0) {
-                    resultsDiv.innerHTML = '<div class="error">No results returned</div>';
-                    return;
-                }
-                
                 resultsDiv.innerHTML = '<h3>📊 Analysis Results</h3>';
                 
-                results.forEach(result => {
+                // One placeholder per file, in upload order, filled in as results arrive
+                return files.map(file => {
                     const resultCard = document.createElement('div');
                     resultCard.className = 'result-card';
-                    
-                    const fieldsHtml = Object.entries(result.fields).map(([key, field]) => `
-                        <div class="field-item">
-                            <div class="field-label">${key.replace(/_/g, ' ').toUpperCase()}</div>
-                            <div class="field-value">${field.value || 'Not found'}</div>
-                            <div class="confidence">Confidence: ${(field.confidence * 100).toFixed(1)}%</div>
-                        </div>
-                    `).join('');
-                    
                     resultCard.innerHTML = `
                         <div class="result-header">
-                            <h4>📄 ${result.file}</h4>
-                            <span class="verdict ${result.verdict}">${result.verdict}</span>
-                        </div>
-                        <p><strong>Document Type:</strong> ${result.doc_type}</p>
-                        <div class="field-grid">
-                            ${fieldsHtml}
+                            <h4>📄 ${file.name}</h4>
+                            <span class="verdict processing">processing</span>
                         </div>
                     `;
-                    
                     resultsDiv.appendChild(resultCard);
+                    return resultCard;
                 });
             }
+            
+            function displayResult(resultCard, result) {
+                if (result.detail) {
+                    resultCard.innerHTML = `
+                        <div class="result-header">
+                            <h4>📄 ${result.file}</h4>
+                        </div>
+                        <div class="error">${result.detail}</div>
+                    `;
+                    return;
+                }
+                
+                const fieldsHtml = Object.entries(result.fields).map(([key, field]) => `
+                    <div class="field-item">
+                        <div class="field-label">${key.replace(/_/g, ' ').toUpperCase()}</div>
+                        <div class="field-value">${field.value || 'Not found'}</div>
+                        <div class="confidence">Confidence: ${(field.confidence * 100).toFixed(1)}%</div>
+                    </div>
+                `).join('');
+                
+                const warnings = result.validation ? result.validation.warnings : [];
+                const warningsHtml = warnings.map(warning => `
+                    <div class="validation-warning">⚠️ ${warning}</div>
+                `).join('');
+                
+                resultCard.innerHTML = `
+                    <div class="result-header">
+                        <h4>📄 ${result.file}</h4>
+                        <span class="verdict ${result.verdict}">${result.verdict}</span>
+                    </div>
+                    <p><strong>Document Type:</strong> ${result.doc_type}</p>
+                    ${warningsHtml}
+                    <div class="field-grid">
+                        ${fieldsHtml}
+                    </div>
+                `;
+            }
         </script>
     </body>
     </html>
     """
 
-@app.post("/check-docs")
-async def check_docs(files: List[UploadFile] = File(...)):
-    """Process uploaded PDF files for compliance checking"""
-    if not files:
-        raise HTTPException(status_code=400, detail="No files provided")
+async def process_upload(file: SpooledUpload, request_slots: asyncio.Semaphore, as_of: datetime,
+                         fields: Optional[FrozenSet[str]] = None) -> DocumentResult:
+    """
+    Run a single received upload (or stored job file) through the pipeline.
     
-    if len(files) > 10:  # Limit number of files
-        raise HTTPException(status_code=400, detail="Maximum 10 files allowed per request")
+    Errors are turned into an "error" result so one bad file never affects
+    the rest of the request; only PipelineBusyError is propagated. Every file
+    of a request is validated against the same as_of time.
+    """
+    waiting = time.perf_counter()
+    async with request_slots, file_slots:
+        with FILES_IN_FLIGHT.track_inprogress():
+            result = await analyze_upload(file, as_of, fields, queued=time.perf_counter() - waiting)
+        VERDICTS.labels(result.doc_type, result.verdict).inc()
+        return result
+
+async def analyze_upload(file: SpooledUpload, as_of: datetime, fields: Optional[FrozenSet[str]] = None,
+                         queued: float = 0.0) -> DocumentResult:
+    """Build the DocumentResult for one upload (see process_upload); queued is the slot wait in seconds"""
+    started = time.perf_counter()
+    try:
+        # Uploads rejected while streaming (type, size) are reported here
+        if file.error:
+            raise ValueError(file.error)
+        
+        logger.info(f"Processing file: {file.filename}")
+        
+        # Extract, classify, parse and validate in the processing pool
+        processed = await analyze_content(file, as_of, fields)
+        timings = StageTimings(**summarize_timings(
+            processed["timings"], processed["metadata"], queued, queued + time.perf_counter() - started
+        ))
+        if not processed["text"].strip():
+            logger.warning(f"No text extracted from {file.filename}")
+            return DocumentResult(
+                file=file.filename,
+                doc_type="unknown",
+                fields={},
+                verdict="fail",
+                metadata=processed["metadata"],
+                timings=timings
+            )
+        
+        doc_type = processed["doc_type"]
+        fields = processed["fields"]
+        confidences = processed["confidences"]
+        verdict = processed["verdict"]
+        
+        # Create field results
+        fields_result = {
+            k: FieldResult(value=v, confidence=confidences.get(k, 0.0)) 
+            for k, v in fields.items()
+        }
+        
+        logger.info(f"Successfully processed {file.filename}: {doc_type} - {verdict}")
+        
+        return DocumentResult(
+            file=file.filename,
+            doc_type=doc_type,
+            fields=fields_result,
+            verdict=verdict,
+            valid_until=processed["valid_until"],
+            validation=ValidationDetails(**processed["validation"]),
+            metadata=processed["metadata"],
+            timings=timings
+        )
+        
+    except PipelineBusyError:
+        ERRORS.labels("busy").inc()
+        raise
+    except Exception as e:
+        logger.error(f"Error processing {file.filename}: {str(e)}")
+        ERRORS.labels("rejected" if file.error else "processing").inc()
+        return DocumentResult(
+            file=file.filename,
+            doc_type="error",
+            fields={},
+            verdict="fail"
+        )
+
+# Large batches run in the background; set while the app is running
+job_manager: Optional[JobManager] = None
+
+def create_job_manager() -> JobManager:
+    """Job manager backed by the job store in JOBS_DIR"""
+    return JobManager(
+        JobStore(settings.JOBS_DIR),
+        process_upload,
+        workers=settings.JOB_WORKERS,
+        files_per_job=settings.MAX_CONCURRENT_FILES_PER_REQUEST,
+        retention=settings.JOB_RETENTION
+    )
+
+def get_job_manager() -> JobManager:
+    """The running job manager; 503 outside the app's lifespan"""
+    if job_manager is None:
+        raise HTTPException(status_code=503, detail="Job service is not running")
+    return job_manager
+
+def parse_field_selection(fields: Optional[str], verdict_only: bool) -> Optional[FrozenSet[str]]:
+    """
+    Turn the fields/verdict_only query parameters into a field projection.
     
-    results = []
+    Returns:
+        Requested field names, empty for verdict_only, None for every field
+    """
+    if verdict_only:
+        return frozenset()
+    if fields is None:
+        return None
+    names = frozenset(name.strip() for name in fields.split(",") if name.strip())
+    unknown = sorted(names - get_rules().field_names)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+def result_payload(result: DocumentResult, timings: bool) -> dict:
+    """Serialize a result, leaving out its timings unless the request asked for them"""
+    return result.model_dump(mode="json", exclude=None if timings else {"timings"})
+
+def request_server_timing(results: list, received: float, elapsed: float) -> str:
+    """
+    Server-Timing header for a batch: the upload, each stage summed over the
+    files (which run concurrently, so the sums can exceed the total) and
+    the total time, in milliseconds.
+    """
+    stages = dict.fromkeys(("queue", "extract", "ocr", "classify", "parse", "validate"), 0.0)
+    ocr_pages = 0
+    for result in results:
+        timings = getattr(result, "timings", None)
+        if timings is None:
+            continue
+        stages["queue"] += timings.queue_ms
+        stages["extract"] += timings.extraction_ms
+        if timings.ocr is not None:
+            stages["ocr"] += timings.ocr.ms
+            ocr_pages += timings.ocr.pages
+        stages["classify"] += timings.classification_ms
+        stages["parse"] += timings.parsing_ms
+        stages["validate"] += timings.validation_ms
+    return server_timing([
+        ("upload", milliseconds(received), None),
+        *((name, duration, f"{ocr_pages} pages" if name == "ocr" else None) for name, duration in stages.items()),
+        ("total", milliseconds(elapsed), None)
+    ])
+
+def verdict_cache_headers(results: list, as_of: datetime) -> dict:
+    """
+    Cache-Control and Expires headers that keep verdicts until the first one can change.
     
-    for file in files:
+    Verdicts without an upcoming boundary are kept for at most
+    VERDICT_MAX_AGE so rule changes still reach clients; responses with
+    failed files are not cached at all.
+    """
+    if any(result.doc_type == "error" for result in results):
+        return {"Cache-Control": "no-store"}
+    
+    as_of = as_utc(as_of)
+    expires = min(
+        [result.valid_until for result in results if result.valid_until is not None]
+        + [as_of + timedelta(seconds=settings.VERDICT_MAX_AGE)]
+    )
+    max_age = max(0, int((expires - as_of).total_seconds()))
+    return {
+        "Cache-Control": f"private, max-age={max_age}",
+        "Expires": format_datetime(expires, usegmt=True)
+    }
+
+# OpenAPI description of the multipart bodies the upload endpoints stream themselves
+FILES_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "required": ["files"],
+            "properties": {"files": {"type": "array", "items": {"type": "string", "format": "binary"}}}
+        }}}
+    }
+}
+
+# Streaming formats for /check-docs and the media types that select them
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+def stream_format(request: Request, stream: Optional[str]) -> Optional[str]:
+    """
+    Pick the streaming format from the stream query parameter or the Accept header.
+    
+    Returns:
+        "ndjson", "sse", or None for a single JSON response
+    """
+    if stream is not None:
+        if stream not in STREAM_MEDIA_TYPES:
+            raise HTTPException(status_code=400, detail=f"stream must be one of {', '.join(STREAM_MEDIA_TYPES)}")
+        return stream
+    accept = request.headers.get("accept", "")
+    for name, media_type in STREAM_MEDIA_TYPES.items():
+        if media_type in accept:
+            return name
+    return None
+
+def format_event(fmt: str, event: str, payload: dict) -> str:
+    """Encode one streamed item as an NDJSON line or a Server-Sent Event"""
+    data = json.dumps(payload)
+    if fmt == "sse":
+        return f"event: {event}\ndata: {data}\n\n"
+    return data + "\n"
+
+async def stream_results(files: Iterator[SpooledUpload], selection: Optional[FrozenSet[str]], fmt: str,
+                         max_pending: int, timings: bool = False) -> AsyncIterator[str]:
+    """
+    Yield each file's result the moment it finishes.
+    
+    Files are drawn from the iterator while fewer than max_pending are
+    unfinished (in a thread, as archive members are read when drawn), and
+    each upload is closed once its result is out. Results arrive in
+    completion order and carry the index of their file. A file the
+    processing pool had no room for is reported as an error item with status
+    503 instead of failing the whole stream; so is an archive that turns out
+    corrupt (422) or too large (413), after which the files already started
+    still finish. Results include their timings block when timings is set.
+    """
+    request_slots = asyncio.Semaphore(settings.MAX_CONCURRENT_FILES_PER_REQUEST)
+    as_of = datetime.now()
+    
+    async def process_indexed(index: int, file: SpooledUpload):
         try:
-            # Validate file
-            validate_file(file)
-            
-            # Check file size
-            content = await file.read()
-            if len(content) > MAX_FILE_SIZE:
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"File {file.filename} too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB"
-                )
-            
-            logger.info(f"Processing file: {file.filename}")
-            
-            # Extract text from PDF
-            text = extract_text_from_pdf(content)
-            if not text.strip():
-                logger.warning(f"No text extracted from {file.filename}")
-                results.append(DocumentResult(
-                    file=file.filename,
-                    doc_type="unknown",
-                    fields={},
-                    verdict="fail"
-                ))
-                continue
-            
-            # Parse document type and fields
-            doc_type = parse_document_type(text)
-            fields, confidences = parse_fields(text, doc_type)
-            
-            # Validate fields
-            verdict = validate_fields(fields, doc_type)
+            return index, await process_upload(file, request_slots, as_of, selection)
+        except PipelineBusyError as e:
+            return index, e
+    
+    pending = {}  # Task -> upload
+    count = 0
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < max_pending:
+                try:
+                    file = await asyncio.to_thread(next, files, None)
+                except ArchiveError as e:
+                    status = 413 if isinstance(e, ArchiveTooLargeError) else 422
+                    yield format_event(fmt, "error", {"status": status, "detail": str(e)})
+                    file = None
+                if file is None:
+                    exhausted = True
+                else:
+                    pending[asyncio.create_task(process_indexed(count, file))] = file
+                    count += 1
+            if not pending:
+                break
             
-            # Create field results
-            fields_result = {
-                k: FieldResult(value=v, confidence=confidences.get(k, 0.0)) 
-                for k, v in fields.items()
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                file = pending.pop(task)
+                file.close()
+                index, outcome = task.result()
+                if isinstance(outcome, PipelineBusyError):
+                    yield format_event(fmt, "error", {
+                        "index": index, "file": file.filename, "status": 503, "detail": f"Server busy: {outcome}"
+                    })
+                else:
+                    yield format_event(fmt, "result", {"index": index, **result_payload(outcome, timings)})
+        if fmt == "sse":
+            yield format_event(fmt, "done", {"count": count})
+    finally:
+        # A disconnected client leaves unfinished files behind
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for file in pending.values():
+            file.close()
+
+async def stream_archive(archive: SpooledUpload, reader: ArchiveReader, selection: Optional[FrozenSet[str]],
+                         fmt: str) -> AsyncIterator[str]:
+    """Stream the results for an archive's members, then release the archive"""
+    try:
+        members = iter(reader)
+        max_pending = settings.MAX_CONCURRENT_FILES_PER_REQUEST + settings.ARCHIVE_READ_AHEAD
+        async for item in stream_results(members, selection, fmt, max_pending):
+            yield item
+    finally:
+        await asyncio.to_thread(reader.close)
+        archive.close()
+
+@app.post("/check-docs", openapi_extra=FILES_REQUEST_BODY)
+async def check_docs(request: Request, response: Response, fields: Optional[str] = None, verdict_only: bool = False,
+                     stream: Optional[str] = None, timings: bool = False):
+    """
+    Process uploaded PDF files for compliance checking.
+    
+    fields (comma-separated names) limits parsing and the response to those
+    fields; verdict_only returns no fields at all. Either way the fields the
+    verdict depends on are still parsed.
+    
+    stream=ndjson or stream=sse (or an Accept header of application/x-ndjson
+    or text/event-stream) sends each result as soon as its file is done
+    instead of one response at the end.
+    
+    Every response has a Server-Timing header; timings=true also adds a
+    per-file timings block (queue wait, extraction, OCR, classification,
+    parsing and validation).
+    """
+    started = time.perf_counter()
+    selection = parse_field_selection(fields, verdict_only)
+    fmt = stream_format(request, stream)
+    
+    # The body is streamed to memory or temp files; oversized files are cut off early
+    files = await receive_uploads(request, field_name="files", max_files=settings.MAX_FILES_PER_REQUEST)
+    received = time.perf_counter() - started
+    
+    if fmt is not None:
+        # Verdicts are not known when the headers go out, so streamed responses are not cached;
+        # only the upload has been timed by then
+        return StreamingResponse(
+            stream_results(iter(files), selection, fmt, max_pending=len(files), timings=timings),
+            media_type=STREAM_MEDIA_TYPES[fmt],
+            headers={
+                "Cache-Control": "no-store",
+                "X-Accel-Buffering": "no",
+                "Server-Timing": server_timing([("upload", milliseconds(received), None)])
             }
-            
-            results.append(DocumentResult(
-                file=file.filename,
-                doc_type=doc_type,
-                fields=fields_result,
-                verdict=verdict
-            ))
-            
-            logger.info(f"Successfully processed {file.filename}: {doc_type} - {verdict}")
-            
-        except Exception as e:
-            logger.error(f"Error processing {file.filename}: {str(e)}")
-            results.append(DocumentResult(
-                file=file.filename,
-                doc_type="error",
-                fields={},
-                verdict="fail"
-            ))
+        )
+    
+    try:
+        # Files run concurrently; gather keeps the results in upload order
+        request_slots = asyncio.Semaphore(settings.MAX_CONCURRENT_FILES_PER_REQUEST)
+        as_of = datetime.now()
+        outcomes = await asyncio.gather(
+            *(process_upload(file, request_slots, as_of, selection) for file in files),
+            return_exceptions=True
+        )
+    finally:
+        for file in files:
+            file.close()
+    
+    timing = request_server_timing(outcomes, received, time.perf_counter() - started)
+    for outcome in outcomes:
+        if isinstance(outcome, PipelineBusyError):
+            raise HTTPException(status_code=503, detail=f"Server busy: {outcome}", headers={"Server-Timing": timing})
+        if isinstance(outcome, BaseException):
+            raise outcome
+    
+    response.headers.update(verdict_cache_headers(outcomes, as_of))
+    response.headers["Server-Timing"] = timing
+    return {"results": [result_payload(outcome, timings) for outcome in outcomes]}
+
+@app.post("/check-archive", openapi_extra={
+    "requestBody": {
+        "required": True,
+        "content": {
+            media_type: {"schema": {"type": "string", "format": "binary"}}
+            for media_type in ("application/zip", "application/x-tar", "application/gzip")
+        }
+    }
+})
+async def check_archive(request: Request, fields: Optional[str] = None, verdict_only: bool = False,
+                        stream: Optional[str] = None):
+    """
+    Check every PDF in a ZIP or TAR archive (optionally compressed) sent as the request body.
+    
+    Members are read one at a time while earlier ones are processed, so the
+    archive is never unpacked as a whole. Results are streamed as NDJSON, or
+    as Server-Sent Events when asked for like on /check-docs. Members over
+    MAX_FILE_SIZE are reported as errors; more than ARCHIVE_MAX_MEMBERS files
+    or ARCHIVE_MAX_TOTAL_SIZE of content stops reading with a 413 item.
+    """
+    selection = parse_field_selection(fields, verdict_only)
+    fmt = stream_format(request, stream) or "ndjson"
+    
+    archive = await receive_body(request, "archive", settings.ARCHIVE_MAX_SIZE)
+    try:
+        reader = await asyncio.to_thread(open_archive, archive.source)
+    except ArchiveError as e:
+        archive.close()
+        raise HTTPException(status_code=413 if isinstance(e, ArchiveTooLargeError) else 422, detail=str(e))
     
-    return {"results": results}
+    return StreamingResponse(
+        stream_archive(archive, reader, selection, fmt),
+        media_type=STREAM_MEDIA_TYPES[fmt],
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"}
+    )
+
+def job_status(job: dict) -> dict:
+    """Describe a job for the jobs endpoints"""
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "as_of": job["as_of"].isoformat(),
+        "total": job["total"],
+        "completed": job["completed"],
+        "failed": job["failed"],
+        "created_at": datetime.fromtimestamp(job["created_at"]).isoformat(),
+        "updated_at": datetime.fromtimestamp(job["updated_at"]).isoformat()
+    }
+
+async def get_job_or_404(job_id: str) -> dict:
+    """Load a job or raise a 404"""
+    job = await asyncio.to_thread(get_job_manager().store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@app.post("/jobs", status_code=202, openapi_extra=FILES_REQUEST_BODY)
+async def create_job(request: Request, fields: Optional[str] = None, verdict_only: bool = False):
+    """
+    Queue a large batch of PDF files for background processing.
+    
+    Returns as soon as the files are stored; poll the status URL for
+    progress and partial results. fields and verdict_only work as for
+    /check-docs, and every file is validated as of the submission time.
+    """
+    manager = get_job_manager()
+    selection = parse_field_selection(fields, verdict_only)
+    files = await receive_uploads(request, field_name="files", max_files=settings.JOB_MAX_FILES)
+    try:
+        job_id = await manager.submit(files, datetime.now(), selection)
+    finally:
+        for file in files:
+            file.close()
+    
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "total": len(files),
+        "status_url": f"/jobs/{job_id}",
+        "results_url": f"/jobs/{job_id}/results"
+    }
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Progress of a job, with the results of the files finished so far"""
+    job = await get_job_or_404(job_id)
+    results = await asyncio.to_thread(get_job_manager().store.results, job_id)
+    return dict(job_status(job), results=results)
+
+@app.get("/jobs/{job_id}/results")
+async def get_job_results(job_id: str):
+    """Final results of a job, in upload order; 409 until the job is done"""
+    job = await get_job_or_404(job_id)
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {job['status']} ({job['completed']}/{job['total']} files)")
+    results = await asyncio.to_thread(get_job_manager().store.results, job_id)
+    return {"job_id": job_id, "as_of": job["as_of"].isoformat(), "results": results}
+
+@app.post("/revalidate")
+async def revalidate_documents(request: RevalidationRequest):
+    """Recompute verdicts for already-extracted documents as of a date"""
+    as_of = request.as_of or datetime.now()
+    outcome = await asyncio.to_thread(revalidate, [doc.model_dump() for doc in request.documents], as_of)
+    verdicts = outcome["verdicts"].tolist()
+    return {
+        "as_of": as_of.isoformat(),
+        "counts": {verdict: verdicts.count(verdict) for verdict in ("pass", "fail", "unknown")},
+        "results": [
+            {
+                "id": doc.id,
+                "verdict": verdict,
+                "expired": expired,
+                "valid_until": valid_until and as_utc(valid_until).isoformat()
+            }
+            for doc, verdict, expired, valid_until in zip(
+                request.documents, verdicts, outcome["expired"].tolist(), outcome["valid_until"].astype(object)
+            )
+        ]
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: stage latencies, page and byte counters, verdicts, errors and in-flight work"""
+    content, media_type = render_metrics()
+    return Response(content=content, media_type=media_type)
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "compliance-document-checker"}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Result cache hit/miss counters"""
+    return result_cache.get_stats()
+
+@app.get("/rules")
+async def rules_info():
+    """Active rule packs and their version"""
+    return rules_summary(get_rules())
+
+@app.post("/rules/reload")
+async def reload_rule_packs():
+    """Load the rule packs again and swap them in without restarting workers"""
+    try:
+        rules = await asyncio.to_thread(reload_rules)
+    except RuleError as e:
+        raise HTTPException(status_code=400, detail=f"Rule packs not reloaded: {e}")
+    apply_rules(rules)
+    return rules_summary(rules)
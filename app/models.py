@@ -1,12 +1,53 @@
-from pydantic import BaseModel
-from typing import Dict, Optional
+from datetime import datetime, timezone
+from pydantic import BaseModel, field_validator
+from typing import Any, Dict, List, Optional
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Timezone-aware UTC form of a datetime; naive values are taken as local time"""
+    return value.astimezone(timezone.utc) if value is not None else None
 
 class FieldResult(BaseModel):
     value: Optional[str]
     confidence: float
 
+class ValidationDetails(BaseModel):
+    missing_fields: List[str] = []
+    expired_fields: List[str] = []
+    warnings: List[str] = []
+
+class OcrTimings(BaseModel):
+    ms: float  # Page rendering plus recognition, summed over pages
+    pages: int
+    dpi: List[int]
+
+class StageTimings(BaseModel):
+    queue_ms: float  # Waiting for a processing slot and in the pool queue
+    extraction_ms: float
+    ocr: Optional[OcrTimings] = None  # None when no page needed OCR
+    classification_ms: float
+    parsing_ms: float
+    validation_ms: float
+    total_ms: float
+    cached: bool = False  # Served from the result cache; only validation ran
+
 class DocumentResult(BaseModel):
     file: str
     doc_type: str
     fields: Dict[str, FieldResult]
     verdict: str
+    valid_until: Optional[datetime] = None  # When the verdict can next change; None if it cannot
+    validation: Optional[ValidationDetails] = None
+    metadata: Optional[Dict[str, Any]] = None
+    timings: Optional[StageTimings] = None  # Only returned when the request asks for timings
+    
+    # Verdicts are computed in local time; responses carry the instant in UTC like the Expires header
+    _valid_until_utc = field_validator("valid_until")(as_utc)
+
+class StoredDocument(BaseModel):
+    id: Optional[str] = None
+    doc_type: str
+    fields: Dict[str, str]
+
+class RevalidationRequest(BaseModel):
+    as_of: Optional[datetime] = None  # Defaults to the time of the request
+    documents: List[StoredDocument]
@@ -1,113 +1,81 @@
 import re
 import logging
-from typing import Dict, Tuple, List
+import threading
+from itertools import product
+from typing import Any, Dict, Iterable, List, Tuple
 from datetime import datetime
 
+from app.rules import RuleSet, compile_pattern, get_rules
+from app.timings import NULL_TIMER, StageTimer
+
 logger = logging.getLogger(__name__)
 
-# Enhanced regex patterns with multiple variations
-INSURANCE_PATTERNS = {
-    "insured": [
-        r"INSURED:\s*([^\n\r]+)",
-        r"INSURED\s+NAME:\s*([^\n\r]+)",
-        r"NAMED\s+INSURED:\s*([^\n\r]+)",
-        r"COMPANY:\s*([^\n\r]+)",
-        r"BUSINESS\s+NAME:\s*([^\n\r]+)"
-    ],
-    "policy_number": [
-        r"POLICY\s+NUMBER:\s*([^\n\r]+)",
-        r"POLICY\s+#:\s*([^\n\r]+)",
-        r"POLICY\s+NO:\s*([^\n\r]+)",
-        r"CERTIFICATE\s+NUMBER:\s*([^\n\r]+)"
-    ],
-    "insurer": [
-        r"INSURER:\s*([^\n\r]+)",
-        r"INSURANCE\s+COMPANY:\s*([^\n\r]+)",
-        r"CARRIER:\s*([^\n\r]+)",
-        r"PROVIDER:\s*([^\n\r]+)"
-    ],
-    "coverage_type": [
-        r"COVERAGE\s+TYPE:\s*([^\n\r]+)",
-        r"TYPE\s+OF\s+COVERAGE:\s*([^\n\r]+)",
-        r"INSURANCE\s+TYPE:\s*([^\n\r]+)"
-    ],
-    "effective_date": [
-        r"EFFECTIVE\s+DATE:\s*([\d\/\-]+)",
-        r"INCEPTION\s+DATE:\s*([\d\/\-]+)",
-        r"START\s+DATE:\s*([\d\/\-]+)",
-        r"FROM:\s*([\d\/\-]+)"
-    ],
-    "expiry_date": [
-        r"EXPIRY\s+DATE:\s*([^\n\r]+)",
-        r"EXPIRATION\s+DATE:\s*([^\n\r]+)",
-        r"EXPIRATION:\s*([^\n\r]+)",
-        r"UNTIL:\s*([^\n\r]+)",
-        r"END\s+DATE:\s*([^\n\r]+)",
-        r"TO:\s*([^\n\r]+)",
-        r"EXPIRES:\s*([^\n\r]+)",
-        r"VALID\s+UNTIL:\s*([^\n\r]+)"
-    ]
-}
-
-INSPECTION_PATTERNS = {
-    "inspector": [
-        r"INSPECTOR:\s*([^\n\r]+)",
-        r"INSPECTED\s+BY:\s*([^\n\r]+)",
-        r"QUALIFIED\s+PERSON:\s*([^\n\r]+)"
-    ],
-    "inspection_date": [
-        r"INSPECTION\s+DATE:\s*([^\n\r]+)",
-        r"DATE\s+OF\s+INSPECTION:\s*([^\n\r]+)",
-        r"INSPECTED\s+ON:\s*([^\n\r]+)"
-    ],
-    "equipment_id": [
-        r"(CRANE|EQUIPMENT)\s+ID:\s*([^\n\r]+)",
-        r"SERIAL\s+NUMBER:\s*([^\n\r]+)",
-        r"EQUIPMENT\s+NUMBER:\s*([^\n\r]+)",
-        r"MODEL\s+NUMBER:\s*([^\n\r]+)"
-    ],
-    "result": [
-        r"RESULT:\s*(PASS|FAIL)",
-        r"STATUS:\s*(PASS|FAIL)",
-        r"INSPECTION\s+RESULT:\s*(PASS|FAIL)",
-        r"CONDITION:\s*(PASS|FAIL)"
-    ]
-}
-
-TRAINING_PATTERNS = {
-    "worker_name": [
-        r"WORKER\s+NAME:\s*([^\n\r]+)",
-        r"EMPLOYEE\s+NAME:\s*([^\n\r]+)",
-        r"NAME:\s*([^\n\r]+)",
-        r"TRAINEE:\s*([^\n\r]+)"
-    ],
-    "certificate_id": [
-        r"CERTIFICATE\s+ID:\s*([^\n\r]+)",
-        r"CARD\s+NUMBER:\s*([^\n\r]+)",
-        r"ID\s+NUMBER:\s*([^\n\r]+)",
-        r"LICENSE\s+NUMBER:\s*([^\n\r]+)"
-    ],
-    "hours": [
-        r"HOURS:\s*([^\n\r]+)",
-        r"TRAINING\s+HOURS:\s*([^\n\r]+)",
-        r"DURATION:\s*([^\n\r]+)"
-    ],
-    "issue_date": [
-        r"ISSUE\s+DATE:\s*([^\n\r]+)",
-        r"DATE\s+ISSUED:\s*([^\n\r]+)",
-        r"ISSUED\s+ON:\s*([^\n\r]+)"
-    ],
-    "expiry_date": [
-        r"EXPIRY\s+DATE:\s*([^\n\r]+)",
-        r"EXPIRATION\s+DATE:\s*([^\n\r]+)",
-        r"VALID\s+UNTIL:\s*([^\n\r]+)"
-    ],
-    "issued_by": [
-        r"ISSUED\s+BY:\s*([^\n\r]+)",
-        r"TRAINING\s+PROVIDER:\s*([^\n\r]+)",
-        r"ORGANIZATION:\s*([^\n\r]+)"
-    ]
-}
+class KeywordClassifier:
+    """
+    Scores document types by the keywords that appear in a text.
+    
+    The keywords of every type are compiled once into an Aho-Corasick
+    automaton, so a document is scanned a single time no matter how many
+    keywords or types are configured. Each keyword counts once per document,
+    weighted by its value when a type's keywords are given as a mapping, else
+    by its entry in weights (default 1). Without the pyahocorasick package
+    every keyword is looked up with a substring search instead.
+    """
+    
+    def __init__(self, keywords: Dict[str, List[str] | Dict[str, float]], weights: Dict[str, float] | None = None):
+        weights = weights or {}
+        self.doc_types = list(keywords)
+        self._keywords = [
+            (
+                doc_type,
+                keyword.lower(),
+                type_keywords[keyword] if isinstance(type_keywords, dict) else weights.get(keyword, 1)
+            )
+            for doc_type, type_keywords in keywords.items()
+            for keyword in type_keywords
+        ]
+        self._automaton = None
+        
+        try:
+            import ahocorasick
+        except ImportError:
+            logger.debug("pyahocorasick not installed, classifying with substring search")
+            return
+        
+        # The same keyword may score for several types, so each word maps to all its entries
+        entries: Dict[str, List[int]] = {}
+        for i, (_, keyword, _) in enumerate(self._keywords):
+            entries.setdefault(keyword, []).append(i)
+        if entries:
+            automaton = ahocorasick.Automaton()
+            for keyword, indexes in entries.items():
+                automaton.add_word(keyword, tuple(indexes))
+            automaton.make_automaton()
+            self._automaton = automaton
+    
+    def score(self, text: str) -> Dict[str, float]:
+        """
+        Score every document type against a text.
+        
+        Args:
+            text: Extracted text from document
+            
+        Returns:
+            Dictionary of doc_type -> summed keyword weight
+        """
+        text_lower = text.lower()
+        if self._automaton is not None:
+            found = set()
+            for _, indexes in self._automaton.iter(text_lower):
+                found.update(indexes)
+        else:
+            found = {i for i, (_, keyword, _) in enumerate(self._keywords) if keyword in text_lower}
+        
+        scores = {doc_type: 0 for doc_type in self.doc_types}
+        for i in found:
+            doc_type, _, weight = self._keywords[i]
+            scores[doc_type] += weight
+        return scores
 
 def parse_document_type(text: str) -> str:
     """
@@ -119,56 +87,39 @@ def parse_document_type(text: str) -> str:
     Returns:
         Document type string
     """
-    text_lower = text.lower()
-    
-    # Score-based detection
-    scores = {
-        "insurance": 0,
-        "inspection": 0,
-        "training": 0
-    }
-    
-    # Insurance keywords
-    insurance_keywords = [
-        "liability insurance", "general liability", "workers compensation",
-        "certificate of insurance", "insurance certificate", "policy",
-        "coverage", "insured", "insurer", "premium"
-    ]
-    
-    # Inspection keywords
-    inspection_keywords = [
-        "inspection checklist", "inspection sheet", "equipment inspection",
-        "safety inspection", "crane inspection", "hoist inspection",
-        "inspector", "qualified person", "inspection date"
-    ]
-    
-    # Training keywords
-    training_keywords = [
-        "training card", "osha", "safety training", "certification",
-        "worker qualification", "training certificate", "safety card",
-        "competent person", "training hours"
-    ]
-    
-    # Calculate scores
-    for keyword in insurance_keywords:
-        if keyword in text_lower:
-            scores["insurance"] += 1
+    # Score-based detection in a single scan of the text
+    return choose_document_type(compiled_rules().classifier.score(text))
+
+def rank_document_types(scores: Dict[str, float]) -> List[Tuple[str, float]]:
+    """
+    Order document types from best to worst score.
     
-    for keyword in inspection_keywords:
-        if keyword in text_lower:
-            scores["inspection"] += 1
+    Ties keep the configured type order, so the first entry is the type
+    parse_document_type would pick.
     
-    for keyword in training_keywords:
-        if keyword in text_lower:
-            scores["training"] += 1
+    Args:
+        scores: Dictionary of doc_type -> keyword score
+        
+    Returns:
+        List of (doc_type, score) tuples
+    """
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+def choose_document_type(scores: Dict[str, float]) -> str:
+    """
+    Pick the document type with the highest keyword score.
     
+    Args:
+        scores: Dictionary of doc_type -> keyword score
+        
+    Returns:
+        Document type string, or "unknown" if no keyword matched
+    """
     # Return the type with highest score, or "unknown" if no clear match
-    max_score = max(scores.values())
-    if max_score > 0:
-        for doc_type, score in scores.items():
-            if score == max_score:
-                logger.info(f"Detected document type: {doc_type} (score: {score})")
-                return doc_type
+    doc_type, score = rank_document_types(scores)[0]
+    if score > 0:
+        logger.info(f"Detected document type: {doc_type} (score: {score})")
+        return doc_type
     
     logger.warning("Could not determine document type")
     return "unknown"
@@ -230,6 +181,163 @@ def calculate_confidence(pattern: str, value: str, context: str) -> float:
     # Ensure confidence is within bounds
     return max(0.0, min(1.0, base_confidence))
 
+# A pattern's "LABEL:" prefix: words of [A-Z#] or (A|B) alternatives joined by \s+
+LABEL_WORD = r"(?:[A-Z#]+|\([A-Z#]+(?:\|[A-Z#]+)*\))"
+LABEL_SYNTAX = re.compile(rf"{LABEL_WORD}(?:\\s\+{LABEL_WORD})*:")
+# A word of a label in upper-cased text
+TEXT_WORD = re.compile(r"[A-Z#]+")
+# Characters IGNORECASE matches to an ASCII letter that str.upper() leaves alone
+CASE_FOLD_FIXES = {"\u0130": "I", "\u212a": "K"}
+
+def fold_case(text: str) -> str | None:
+    """
+    Upper-case text so case-sensitive labels match wherever IGNORECASE would.
+
+    Returns None if upper-casing changes the length (e.g. "ß" -> "SS"), since
+    positions in the folded text must line up with the original.
+    """
+    folded = text.upper()
+    if len(folded) != len(text):
+        return None
+    for char, replacement in CASE_FOLD_FIXES.items():
+        if char in folded:
+            folded = folded.replace(char, replacement)
+    return folded
+
+def parse_label(pattern: str) -> List[Tuple[str, ...]] | None:
+    """
+    Normalize a pattern's label into the word sequences it can match.
+
+    "(CRANE|EQUIPMENT)\\s+ID:" gives [("CRANE", "ID"), ("EQUIPMENT", "ID")].
+
+    Args:
+        pattern: Field pattern
+
+    Returns:
+        List of word tuples, or None if the pattern does not start with a
+        plain label and has to be searched as a regex
+    """
+    label = pattern[:pattern.find(":") + 1]
+    if not label or not LABEL_SYNTAX.fullmatch(label):
+        return None
+    options = [
+        word[1:-1].split("|") if word.startswith("(") else [word]
+        for word in label[:-1].split("\\s+")
+    ]
+    return list(product(*options))
+
+class FieldExtractor:
+    """
+    Extracts every field of a document type from a label index of the text.
+
+    Almost every pattern has the form "LABEL:\\s*(value)". One pass over the
+    colons of the text records where each known label occurs, keyed by its
+    upper-cased words with whitespace collapsed. Fields are then resolved by
+    dictionary lookups in pattern-priority order, and each pattern is only
+    matched where its label was found. Patterns without a plain label prefix
+    are searched as regexes.
+
+    The result is the same as calling extract_field_with_patterns per field:
+    each pattern contributes its first match and the first pattern (in list
+    order) with a non-empty value wins.
+    """
+
+    def __init__(self, patterns: Dict[Any, List[str]]):
+        self.patterns = patterns
+        self._entries = [
+            (field_name, pattern, compile_pattern(pattern), parse_label(pattern))
+            for field_name, field_patterns in patterns.items()
+            for pattern in field_patterns
+        ]
+        self._field_entries = {
+            field_name: [i for i, entry in enumerate(self._entries) if entry[0] == field_name]
+            for field_name in patterns
+        }
+
+        # Labels are looked up by the words after their first one; the first word
+        # may start mid-token, since the patterns have no word boundary
+        self._first_words: Dict[Tuple[str, ...], set] = {}
+        max_words = 0
+        for *_, labels in self._entries:
+            for words in labels or ():
+                self._first_words.setdefault(words[1:], set()).add(words[0])
+                max_words = max(max_words, len(words))
+        # Up to max_words words before a colon, matched backwards on reversed text
+        self._label_words = re.compile(rf":[A-Z#]+(?:\s+[A-Z#]+){{0,{max(max_words - 1, 0)}}}")
+
+    def index_labels(self, folded: str) -> Dict[Tuple[str, ...], List[int]]:
+        """
+        Find every occurrence of the known labels in one pass over the colons.
+
+        Args:
+            folded: Text as returned by fold_case
+
+        Returns:
+            Dictionary of label words -> start positions in text order
+        """
+        index: Dict[Tuple[str, ...], List[int]] = {}
+        reversed_text = folded[::-1]
+        last = len(folded) - 1
+
+        colon = folded.find(":")
+        while colon != -1:
+            words_match = self._label_words.match(reversed_text, last - colon)
+            if words_match is not None:
+                words = [(m.start(), m.group()) for m in TEXT_WORD.finditer(folded, last + 1 - words_match.end(), colon)]
+                for count in range(1, len(words) + 1):
+                    rest = tuple(word for _, word in words[len(words) - count + 1:])
+                    first_words = self._first_words.get(rest)
+                    if not first_words:
+                        continue
+                    position, word = words[-count]
+                    for offset in range(len(word)):
+                        if word[offset:] in first_words:
+                            index.setdefault((word[offset:],) + rest, []).append(position + offset)
+            colon = folded.find(":", colon + 1)
+        return index
+
+    def _first_match(self, i: int, text: str, index: Dict[Tuple[str, ...], List[int]] | None) -> re.Match | None:
+        """Return the first match of a pattern, using the label index when possible."""
+        _, _, regex, labels = self._entries[i]
+        if index is None or labels is None:
+            return regex.search(text)
+        if len(labels) == 1:
+            positions = index.get(labels[0], ())
+        else:
+            positions = sorted(position for words in labels for position in index.get(words, ()))
+        for position in positions:
+            match = regex.match(text, position)
+            if match is not None:
+                return match
+        return None
+
+    def extract(self, text: str) -> Tuple[Dict[str, str], Dict[str, float]]:
+        """
+        Extract all fields from text.
+
+        Args:
+            text: Text to search in
+
+        Returns:
+            Tuple of (fields_dict, confidence_dict)
+        """
+        folded = fold_case(text) if self._first_words else None
+        index = self.index_labels(folded) if folded is not None else None
+
+        fields = {}
+        confidence = {}
+        for field_name, entries in self._field_entries.items():
+            for i in entries:
+                match = self._first_match(i, text, index)
+                if match is None:
+                    continue
+                value = match.group(1).strip()
+                if value:
+                    fields[field_name] = value
+                    confidence[field_name] = calculate_confidence(self._entries[i][1], value, text)
+                    break
+        return fields, confidence
+
 def parse_fields(text: str, doc_type: str) -> Tuple[Dict[str, str], Dict[str, float]]:
     """
     Parse fields from document text based on document type.
@@ -245,23 +353,15 @@ def parse_fields(text: str, doc_type: str) -> Tuple[Dict[str, str], Dict[str, fl
     confidence = {}
     
     try:
-        if doc_type == "insurance":
-            patterns = INSURANCE_PATTERNS
-        elif doc_type == "inspection":
-            patterns = INSPECTION_PATTERNS
-        elif doc_type == "training":
-            patterns = TRAINING_PATTERNS
-        else:
+        extractor = compiled_rules().extractors.get(doc_type)
+        if extractor is None:
             logger.warning(f"Unknown document type: {doc_type}")
             return fields, confidence
         
-        # Extract each field
-        for field_name, field_patterns in patterns.items():
-            value, conf = extract_field_with_patterns(text, field_patterns)
-            if value is not None:
-                fields[field_name] = value
-                confidence[field_name] = conf
-                logger.debug(f"Extracted {field_name}: {value} (confidence: {conf:.2f})")
+        # Extract every field in one scan of the text
+        fields, confidence = extractor.extract(text)
+        for field_name, value in fields.items():
+            logger.debug(f"Extracted {field_name}: {value} (confidence: {confidence[field_name]:.2f})")
         
         logger.info(f"Extracted {len(fields)} fields from {doc_type} document")
         
@@ -270,6 +370,133 @@ def parse_fields(text: str, doc_type: str) -> Tuple[Dict[str, str], Dict[str, fl
     
     return fields, confidence
 
+class DocumentAnalyzer:
+    """
+    Classifies a document, then extracts the fields of the winning type.
+    
+    The keyword automaton scores every type in one scan of the text and only
+    the chosen type's extractor runs afterwards, so a document costs one
+    classification plus one label scan however many types are configured.
+    """
+    
+    def __init__(self, classifier: KeywordClassifier, extractors: Dict[str, FieldExtractor]):
+        self.classifier = classifier
+        self.extractors = extractors
+    
+    def analyze(self, text: str, timer: StageTimer = NULL_TIMER) -> Dict[str, Any]:
+        """
+        Classify text and extract the fields of its document type.
+        
+        Args:
+            text: Extracted text from document
+            timer: Collects the classify and parse durations
+            
+        Returns:
+            Dictionary with doc_type, its fields and confidences, and
+            classifications: every type ranked by score
+        """
+        with timer.time("classify"):
+            scores = self.classifier.score(text)
+            doc_type = choose_document_type(scores)
+        with timer.time("parse"):
+            extractor = self.extractors.get(doc_type)
+            fields, confidence = extractor.extract(text) if extractor is not None else ({}, {})
+        return {
+            "doc_type": doc_type,
+            "fields": fields,
+            "confidences": confidence,
+            "classifications": [
+                {"doc_type": name, "score": score}
+                for name, score in rank_document_types(scores)
+            ]
+        }
+
+class CompiledRules:
+    """
+    Matchers compiled from one rule set.
+    
+    Built once per rules version and replaced as a whole, so a document is
+    always classified and parsed with a single consistent set of rules.
+    """
+    
+    MAX_PROJECTIONS = 64  # Field selections kept compiled
+    
+    def __init__(self, rules: RuleSet):
+        self.version = rules.version
+        self.rules = rules
+        self.classifier = KeywordClassifier({name: doc.keywords for name, doc in rules.doc_types.items()})
+        self.extractors = {name: FieldExtractor(doc.fields) for name, doc in rules.doc_types.items()}
+        self.analyzer = DocumentAnalyzer(self.classifier, self.extractors)
+        self._projections: Dict[frozenset, DocumentAnalyzer] = {}
+    
+    def analyzer_for(self, fields: Iterable[str] | None = None) -> "DocumentAnalyzer":
+        """
+        Return an analyzer that only runs the patterns of the given fields.
+        
+        Fields the verdict depends on are always included. Projected
+        analyzers are built on first use and kept for this rules version.
+        
+        Args:
+            fields: Field names to extract, or None for every field
+            
+        Returns:
+            Shared DocumentAnalyzer
+        """
+        if fields is None:
+            return self.analyzer
+        key = frozenset(fields)
+        analyzer = self._projections.get(key)
+        if analyzer is None:
+            if len(self._projections) >= self.MAX_PROJECTIONS:
+                self._projections.clear()
+            analyzer = DocumentAnalyzer(
+                self.classifier, {name: FieldExtractor(doc.project(key)) for name, doc in self.rules.doc_types.items()}
+            )
+            self._projections[key] = analyzer
+        return analyzer
+
+_compiled_rules: CompiledRules | None = None
+_compile_lock = threading.Lock()
+
+def compiled_rules() -> CompiledRules:
+    """
+    Return matchers for the active rule set, compiling them after a reload.
+    
+    Returns:
+        Shared CompiledRules
+    """
+    global _compiled_rules
+    rules = get_rules()
+    compiled = _compiled_rules
+    if compiled is None or compiled.version != rules.version:
+        with _compile_lock:
+            compiled = _compiled_rules
+            if compiled is None or compiled.version != rules.version:
+                compiled = CompiledRules(rules)
+                _compiled_rules = compiled
+    return compiled
+
+def analyze_document(text: str, fields: Iterable[str] | None = None,
+                     timer: StageTimer = NULL_TIMER) -> Dict[str, Any]:
+    """
+    Classify a document and parse its fields.
+    
+    Equivalent to parse_document_type followed by parse_fields, plus the
+    scores of every type.
+    
+    Args:
+        text: Extracted text from document
+        fields: Only parse these fields (plus those validation needs);
+            None parses every field
+        timer: Collects the classify and parse durations
+        
+    Returns:
+        Dictionary with doc_type, fields, confidences and classifications
+    """
+    analysis = compiled_rules().analyzer_for(fields).analyze(text, timer)
+    logger.info(f"Extracted {len(analysis['fields'])} fields from {analysis['doc_type']} document")
+    return analysis
+
 def clean_extracted_value(value: str) -> str | None:
     """
     Clean and normalize extracted field values.
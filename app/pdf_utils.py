@@ -1,99 +1,565 @@
 import pdfplumber
-from pdf2image import convert_from_bytes
+from pdf2image import convert_from_bytes, convert_from_path, pdfinfo_from_bytes, pdfinfo_from_path
 import pytesseract
 import io
 import logging
-from typing import Optional
+import os
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from PIL import Image
+
+from app.config import settings
+from app.timings import NULL_TIMER, StageTimer
 
 logger = logging.getLogger(__name__)
 
-def extract_text_from_pdf(pdf_bytes: bytes) -> str:
+# PDFs are passed around as in-memory bytes or, for spooled uploads, a file path
+PdfSource = Union[bytes, str]
+
+def open_pdf(source: PdfSource) -> pdfplumber.PDF:
+    """
+    Open a PDF with pdfplumber without copying file-backed sources into memory.
+    
+    Args:
+        source: PDF content as bytes, or a path to a PDF file
+        
+    Returns:
+        Open pdfplumber document
+    """
+    return pdfplumber.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+
+def render_pages(source: PdfSource, dpi: int, first_page: int, last_page: int) -> List[Image.Image]:
+    """
+    Render a range of pages to bitmaps with poppler.
+    
+    Args:
+        source: PDF content as bytes, or a path to a PDF file
+        dpi: Render resolution
+        first_page: First 1-based page to render
+        last_page: Last 1-based page to render (inclusive)
+        
+    Returns:
+        List of page images
+    """
+    if isinstance(source, bytes):
+        return convert_from_bytes(source, dpi=dpi, first_page=first_page, last_page=last_page)
+    return convert_from_path(source, dpi=dpi, first_page=first_page, last_page=last_page)
+
+def extract_text_from_pdf(source: PdfSource) -> str:
     """
     Extract text from PDF using pdfplumber first, then OCR as fallback.
     
     Args:
-        pdf_bytes: PDF file content as bytes
+        source: PDF content as bytes, or a path to a PDF file
         
     Returns:
         Extracted text as string
     """
-    try:
-        # Try pdfplumber first for native text extraction
-        text = ""
-        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-            for page_num, page in enumerate(pdf.pages):
-                try:
-                    page_text = page.extract_text() or ""
-                    text += page_text + "\n"
-                    logger.debug(f"Extracted {len(page_text)} characters from page {page_num + 1}")
-                except Exception as e:
-                    logger.warning(f"Error extracting text from page {page_num + 1}: {e}")
-                    continue
-        
-        # If we got substantial text, return it
-        if len(text.strip()) > 50:  # Increased threshold for better reliability
-            logger.info(f"Successfully extracted {len(text)} characters using pdfplumber")
-            return text
-        
-        # Fallback to OCR if needed
-        logger.info("Insufficient text extracted, attempting OCR...")
-        return extract_text_with_ocr(pdf_bytes)
+    return extract_pdf_content(source)["text"]
+
+def extract_pdf_content(source: PdfSource,
+                        is_sufficient: Optional[Callable[[str], bool]] = None,
+                        is_complete: Optional[Callable[[str], bool]] = None,
+                        timer: StageTimer = NULL_TIMER) -> Dict[str, Any]:
+    """
+    Extract text page by page, using OCR only for pages without a text layer.
+    
+    Pages whose native text is shorter than Settings.MIN_TEXT_LENGTH are
+    OCR'd; every other page keeps its pdfplumber text. If the PDF cannot be
+    parsed at all, every page is OCR'd.
+    
+    With adaptive OCR, pages are first read at Settings.OCR_FIRST_PASS_DPI. If
+    is_sufficient rejects the resulting text, the pages still at the low
+    resolution are re-read at Settings.OCR_DPI.
+    
+    When is_complete is given, pages are read in batches of
+    Settings.OCR_WORKERS and extraction stops as soon as it accepts the text
+    read so far; the remaining pages are neither extracted nor OCR'd.
+    
+    Args:
+        source: PDF content as bytes, or a path to a PDF file
+        is_sufficient: Optional check that the text contains what the caller needs
+        is_complete: Optional check that allows skipping the remaining pages
+        timer: Collects pdfplumber, render and OCR durations and OCR fallbacks
+        
+    Returns:
+        Dictionary with the extracted text, page count, number of pages read,
+        OCR'd page numbers and the DPI used for each OCR'd page
+    """
+    page_texts: List[str] = []
+    ocr_results: Dict[int, Dict[str, Any]] = {}
+    
+    with ExitStack() as stack:
+        try:
+            with timer.time("pdfplumber"):
+                pages = stack.enter_context(open_pdf(source)).pages
+        except Exception as e:
+            logger.error(f"Error in pdfplumber extraction: {e}")
+            # Try OCR as last resort
+            try:
+                pages = [None] * count_pages(source)
+            except Exception as e:
+                logger.error(f"Error in OCR extraction: {e}")
+                return {"text": "", "pages": 0, "pages_read": 0, "ocr_pages": [], "page_dpi": {}}
+        
+        page_count = len(pages)
+        batch_size = max(1, settings.OCR_WORKERS if is_complete is not None else page_count)
+        for start in range(0, page_count, batch_size):
+            batch = list(range(start + 1, min(start + batch_size, page_count) + 1))
+            with timer.time("pdfplumber"):
+                for page_num in batch:
+                    page_texts.append(native_page_text(pages[page_num - 1], page_num))
+            
+            deficient = [n for n in batch if len(page_texts[n - 1].strip()) < settings.MIN_TEXT_LENGTH]
+            if deficient:
+                logger.info(f"Insufficient text on {len(deficient)} of {len(batch)} pages, attempting OCR...")
+                timer.count("ocr_fallback_pages", len(deficient))
+                ocr_results.update(ocr_pages(source, deficient, timer=timer))
+            
+            if is_complete is not None and len(page_texts) < page_count:
+                text, _ = merge_page_texts(page_texts, ocr_results)
+                if is_complete(text):
+                    logger.info(f"Required fields found after {len(page_texts)} of {page_count} pages, skipping the rest")
+                    break
+    
+    text, ocr_used = merge_page_texts(page_texts, ocr_results)
+    
+    # Escalate low-resolution pages when the document still lacks what the caller needs
+    low_dpi = [n for n in ocr_used if ocr_results[n]["dpi"] < settings.OCR_DPI]
+    if low_dpi and is_sufficient is not None and not is_sufficient(text):
+        logger.info(f"Required content missing, re-reading {len(low_dpi)} page(s) at {settings.OCR_DPI} DPI")
+        ocr_results.update(ocr_pages(source, low_dpi, dpi=settings.OCR_DPI, timer=timer))
+        text, ocr_used = merge_page_texts(page_texts, ocr_results)
+    
+    logger.info(f"Extracted {len(text)} characters from {len(page_texts)} pages ({len(ocr_used)} via OCR)")
+    return {
+        "text": text,
+        "pages": page_count,
+        "pages_read": len(page_texts),
+        "ocr_pages": ocr_used,
+        "page_dpi": {n: ocr_results[n]["dpi"] for n in ocr_used}
+    }
+
+def native_page_text(page: Any, page_num: int) -> str:
+    """
+    Extract the text layer of one pdfplumber page.
+    
+    Args:
+        page: pdfplumber page, or None when the PDF could not be parsed
+        page_num: 1-based page number, for logging
         
+    Returns:
+        Page text, empty if the page has none or extraction failed
+    """
+    if page is None:
+        return ""
+    try:
+        page_text = page.extract_text() or ""
+        logger.debug(f"Extracted {len(page_text)} characters from page {page_num}")
+        return page_text
     except Exception as e:
-        logger.error(f"Error in pdfplumber extraction: {e}")
-        # Try OCR as last resort
-        return extract_text_with_ocr(pdf_bytes)
+        logger.warning(f"Error extracting text from page {page_num}: {e}")
+        return ""
+
+def merge_page_texts(page_texts: List[str], ocr_results: Dict[int, Dict[str, Any]]) -> Tuple[str, List[int]]:
+    """
+    Combine native and OCR'd page text in page order.
+    
+    Native text is kept for pages where OCR produced nothing better.
+    
+    Args:
+        page_texts: Native text for every page
+        ocr_results: OCR results keyed by page number
+        
+    Returns:
+        Tuple of (document_text, ocr_used_page_numbers)
+    """
+    merged = list(page_texts)
+    ocr_used = []
+    for page_num in sorted(ocr_results):
+        ocr_text = ocr_results[page_num]["text"]
+        if len(ocr_text.strip()) > len(page_texts[page_num - 1].strip()):
+            merged[page_num - 1] = ocr_text
+            ocr_used.append(page_num)
+    return "".join(page_text + "\n" for page_text in merged), ocr_used
 
-def extract_text_with_ocr(pdf_bytes: bytes) -> str:
+def extract_text_with_ocr(source: PdfSource) -> str:
     """
     Extract text from PDF using OCR (Optical Character Recognition).
     
     Args:
-        pdf_bytes: PDF file content as bytes
+        source: PDF content as bytes, or a path to a PDF file
         
     Returns:
         Extracted text as string
     """
     try:
-        # Convert PDF to images
-        images = convert_from_bytes(pdf_bytes, dpi=300)  # Higher DPI for better OCR
-        logger.info(f"Converted PDF to {len(images)} images for OCR")
-        
-        ocr_text = ""
-        for page_num, img in enumerate(images):
-            try:
-                # Configure OCR for better accuracy
-                custom_config = r'--oem 3 --psm 6'  # Use LSTM OCR Engine + Assume uniform block of text
-                page_text = pytesseract.image_to_string(img, config=custom_config)
-                ocr_text += page_text + "\n"
-                logger.debug(f"OCR extracted {len(page_text)} characters from page {page_num + 1}")
-            except Exception as e:
-                logger.warning(f"Error in OCR for page {page_num + 1}: {e}")
-                continue
-        
-        logger.info(f"OCR completed, extracted {len(ocr_text)} characters total")
-        return ocr_text
+        page_count = count_pages(source)
+        ocr_results = ocr_pages(source, list(range(1, page_count + 1)))
+        text = "".join(
+            ocr_results[n]["text"] + "\n" if n in ocr_results else "\n"
+            for n in range(1, page_count + 1)
+        )
+        logger.info(f"OCR completed, extracted {len(text)} characters total")
+        return text
         
     except Exception as e:
         logger.error(f"Error in OCR extraction: {e}")
         return ""
 
-def get_pdf_info(pdf_bytes: bytes) -> dict:
+def adaptive_ocr_enabled() -> bool:
+    """Whether OCR starts at a lower resolution before escalating to OCR_DPI."""
+    return 0 < settings.OCR_FIRST_PASS_DPI < settings.OCR_DPI
+
+def ocr_pages(source: PdfSource, page_numbers: List[int], dpi: Optional[int] = None,
+              timer: StageTimer = NULL_TIMER) -> Dict[int, Dict[str, Any]]:
+    """
+    OCR selected pages of a PDF.
+    
+    Up to Settings.OCR_WORKERS pages are rendered and recognized in parallel,
+    each by its own tesseract process. Every page bitmap is released as soon as
+    it has been recognized, so peak memory is bounded by the worker count
+    rather than the page count.
+    
+    Unless a DPI is given, adaptive OCR reads pages at OCR_FIRST_PASS_DPI and
+    re-reads only those whose mean word confidence is below
+    OCR_MIN_WORD_CONFIDENCE at OCR_DPI.
+    
+    Args:
+        source: PDF content as bytes, or a path to a PDF file
+        page_numbers: 1-based page numbers to OCR
+        dpi: Render every page at this resolution in a single pass
+        timer: Collects render and OCR durations per page
+        
+    Returns:
+        Mapping of page number to {"text", "dpi", "confidence"} for pages that succeeded
+    """
+    adaptive = dpi is None and adaptive_ocr_enabled()
+    first_dpi = dpi or (settings.OCR_FIRST_PASS_DPI if adaptive else settings.OCR_DPI)
+    results = ocr_page_batch(source, page_numbers, first_dpi, with_confidence=adaptive, timer=timer)
+    
+    if adaptive:
+        retry = [
+            page_num for page_num, result in results.items()
+            if result["confidence"] < settings.OCR_MIN_WORD_CONFIDENCE
+        ]
+        if retry:
+            logger.info(f"Low OCR confidence on {len(retry)} page(s), re-reading at {settings.OCR_DPI} DPI")
+            results.update(ocr_page_batch(source, retry, settings.OCR_DPI, with_confidence=True, timer=timer))
+    
+    return {page_num: results[page_num] for page_num in sorted(results)}
+
+def ocr_page_batch(source: PdfSource, page_numbers: List[int], dpi: int,
+                   with_confidence: bool = False, timer: StageTimer = NULL_TIMER) -> Dict[int, Dict[str, Any]]:
+    """
+    Run ocr_page over several pages on the process's OCR threads.
+    
+    Args:
+        source: PDF content as bytes, or a path to a PDF file
+        page_numbers: 1-based page numbers to OCR
+        dpi: Render resolution
+        with_confidence: Collect word confidences via image_to_data
+        timer: Collects render and OCR durations per page
+        
+    Returns:
+        Mapping of page number to OCR result for pages that succeeded
+    """
+    workers = max(1, min(settings.OCR_WORKERS, len(page_numbers)))
+    logger.info(f"Running OCR on {len(page_numbers)} pages at {dpi} DPI with {workers} worker(s)")
+    
+    def run(page_num: int) -> Optional[Dict[str, Any]]:
+        return ocr_page(source, page_num, dpi, with_confidence, timer)
+    
+    if workers == 1:
+        results = [run(page_num) for page_num in page_numbers]
+    else:
+        results = list(get_ocr_pool().map(run, page_numbers))
+    
+    return {
+        page_num: result for page_num, result in zip(page_numbers, results)
+        if result is not None
+    }
+
+def ocr_page(source: PdfSource, page_num: int, dpi: int, with_confidence: bool = False,
+             timer: StageTimer = NULL_TIMER) -> Optional[Dict[str, Any]]:
+    """
+    Render and OCR a single page.
+    
+    Args:
+        source: PDF content as bytes, or a path to a PDF file
+        page_num: 1-based page number
+        dpi: Render resolution
+        with_confidence: Also collect word confidences
+        timer: Collects the render and OCR durations
+        
+    Returns:
+        Dictionary with text, dpi and mean word confidence (0-100, None when
+        not collected), or None if the page could not be rendered or read
+    """
+    try:
+        with timer.time("render"):
+            images = render_pages(source, dpi=dpi, first_page=page_num, last_page=page_num)
+    except Exception as e:
+        logger.warning(f"Error rendering page {page_num} for OCR: {e}")
+        return None
+    
+    try:
+        backend = get_ocr_backend()
+        with timer.time("ocr"):
+            if with_confidence:
+                texts, confidences = [], []
+                for img in images:
+                    page_text, word_confidences = backend.image_to_text_with_confidence(img)
+                    texts.append(page_text)
+                    confidences.extend(word_confidences)
+                page_text = "".join(texts)
+                confidence = sum(confidences) / len(confidences) if confidences else 0.0
+            else:
+                page_text = "".join(backend.image_to_text(img) for img in images)
+                confidence = None
+        logger.debug(f"OCR extracted {len(page_text)} characters from page {page_num} at {dpi} DPI")
+        return {"text": page_text, "dpi": dpi, "confidence": confidence}
+    except Exception as e:
+        logger.warning(f"Error in OCR for page {page_num}: {e}")
+        return None
+    finally:
+        for img in images:
+            img.close()
+
+def ocr_data_to_text(data: Dict[str, List[Any]]) -> Tuple[str, List[float]]:
+    """
+    Rebuild line-oriented text and word confidences from image_to_data output.
+    
+    Args:
+        data: pytesseract image_to_data result as a dictionary of columns
+        
+    Returns:
+        Tuple of (text, word_confidences)
+    """
+    lines: Dict[Tuple[int, int, int], List[str]] = {}
+    confidences = []
+    for i, word in enumerate(data["text"]):
+        word = (word or "").strip()
+        if not word:
+            continue
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        lines.setdefault(key, []).append(word)
+        conf = float(data["conf"][i])
+        if conf >= 0:
+            confidences.append(conf)
+    text = "".join(" ".join(words) + "\n" for words in lines.values())
+    return text, confidences
+
+class OcrBackend(ABC):
+    """Interface for engines that turn a page image into text."""
+    
+    name = "base"
+    
+    @abstractmethod
+    def image_to_text(self, image: Image.Image) -> str:
+        """Recognize the text of a page image."""
+    
+    @abstractmethod
+    def image_to_text_with_confidence(self, image: Image.Image) -> Tuple[str, List[float]]:
+        """Recognize the text of a page image along with per-word confidences (0-100)."""
+
+class PytesseractBackend(OcrBackend):
+    """
+    Runs the tesseract CLI through pytesseract.
+    
+    Each call starts a new tesseract process, writes the image to a temporary
+    file and reloads the language model.
+    """
+    
+    name = "pytesseract"
+    
+    def image_to_text(self, image: Image.Image) -> str:
+        return pytesseract.image_to_string(image, lang=settings.OCR_LANG, config=settings.OCR_CONFIG)
+    
+    def image_to_text_with_confidence(self, image: Image.Image) -> Tuple[str, List[float]]:
+        data = pytesseract.image_to_data(
+            image, lang=settings.OCR_LANG, config=settings.OCR_CONFIG, output_type=pytesseract.Output.DICT
+        )
+        return ocr_data_to_text(data)
+
+class TesserocrBackend(OcrBackend):
+    """
+    Keeps tesseract engines loaded in-process through the tesserocr C API bindings.
+    
+    The language model is loaded once per thread and images are passed in
+    memory, so there is no process startup or temporary file per page.
+    Engines are not thread-safe, so every OCR thread gets its own; the OCR
+    threads last as long as the process (see get_ocr_pool), so each engine is
+    loaded once.
+    """
+    
+    name = "tesserocr"
+    
+    def __init__(self):
+        import tesserocr
+        self._tesserocr = tesserocr
+        self._local = threading.local()
+        self._psm, self._oem = parse_tesseract_config(settings.OCR_CONFIG)
+    
+    def _api(self):
+        api = getattr(self._local, "api", None)
+        if api is None:
+            kwargs = {"lang": settings.OCR_LANG}
+            if self._psm is not None:
+                kwargs["psm"] = self._psm
+            if self._oem is not None:
+                kwargs["oem"] = self._oem
+            api = self._tesserocr.PyTessBaseAPI(**kwargs)
+            self._local.api = api
+        return api
+    
+    def image_to_text(self, image: Image.Image) -> str:
+        api = self._api()
+        api.SetImage(image)
+        return api.GetUTF8Text()
+    
+    def image_to_text_with_confidence(self, image: Image.Image) -> Tuple[str, List[float]]:
+        api = self._api()
+        api.SetImage(image)
+        text = api.GetUTF8Text()
+        return text, [float(conf) for conf in api.AllWordConfidences()]
+
+def parse_tesseract_config(config: str) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Read the page segmentation and engine modes from a tesseract CLI config string.
+    
+    Args:
+        config: Options such as "--oem 3 --psm 6"
+        
+    Returns:
+        Tuple of (psm, oem), None for options that are not set
+    """
+    options = config.split()
+    values = {}
+    for flag, value in zip(options, options[1:]):
+        if flag in ("--psm", "--oem") and value.isdigit():
+            values[flag] = int(value)
+    return values.get("--psm"), values.get("--oem")
+
+_ocr_backend: Optional[OcrBackend] = None
+_ocr_backend_lock = threading.Lock()
+
+def get_ocr_backend() -> OcrBackend:
+    """
+    Return this process's OCR backend, creating it on first use.
+    
+    Settings.OCR_BACKEND picks "tesserocr" or "pytesseract"; "auto" prefers the
+    in-process tesserocr engine and falls back to pytesseract when the bindings
+    are not installed.
+    
+    Returns:
+        Shared OcrBackend instance
+    """
+    global _ocr_backend
+    if _ocr_backend is None:
+        with _ocr_backend_lock:
+            if _ocr_backend is None:
+                _ocr_backend = create_ocr_backend(settings.OCR_BACKEND)
+                logger.info(f"Using {_ocr_backend.name} OCR backend")
+    return _ocr_backend
+
+_ocr_pool: Optional[ThreadPoolExecutor] = None
+_ocr_pool_size = 0
+
+def get_ocr_pool() -> ThreadPoolExecutor:
+    """
+    Return this process's OCR thread pool, creating it on first use.
+    
+    The pool lives as long as the process, so its threads and the tesseract
+    engines they hold (see TesserocrBackend) are reused by every page batch
+    instead of being started and loaded again per batch. It is rebuilt only
+    if Settings.OCR_WORKERS changes.
+    
+    Returns:
+        Shared pool with Settings.OCR_WORKERS threads
+    """
+    global _ocr_pool, _ocr_pool_size
+    workers = max(1, settings.OCR_WORKERS)
+    if _ocr_pool is None or _ocr_pool_size != workers:
+        with _ocr_backend_lock:
+            if _ocr_pool is None or _ocr_pool_size != workers:
+                if _ocr_pool is not None:
+                    _ocr_pool.shutdown(wait=False)
+                _ocr_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr")
+                _ocr_pool_size = workers
+    return _ocr_pool
+
+def create_ocr_backend(name: str) -> OcrBackend:
+    """
+    Build an OCR backend by name.
+    
+    Args:
+        name: "auto", "tesserocr" or "pytesseract"
+        
+    Returns:
+        New OcrBackend instance
+    """
+    if name in ("auto", "tesserocr"):
+        try:
+            return TesserocrBackend()
+        except ImportError:
+            if name == "tesserocr":
+                raise
+            logger.debug("tesserocr not installed, falling back to pytesseract")
+    elif name != "pytesseract":
+        raise ValueError(f"Unknown OCR backend: {name}")
+    return PytesseractBackend()
+
+def configure_ocr_threads() -> None:
+    """
+    Limit tesseract's OpenMP threads so parallel OCR does not oversubscribe the host.
+    
+    A document OCRs OCR_WORKERS pages at once, each with OCR_THREAD_LIMIT
+    threads, which by default adds up to OCR_CORES_PER_DOCUMENT; with every
+    pipeline worker busy that fills the host without oversubscribing it. An
+    OMP_THREAD_LIMIT already present in the environment is left untouched.
+    """
+    os.environ.setdefault("OMP_THREAD_LIMIT", str(settings.OCR_THREAD_LIMIT))
+
+def count_pages(source: PdfSource) -> int:
+    """
+    Count the pages of a PDF without rendering them.
+    
+    Args:
+        source: PDF content as bytes, or a path to a PDF file
+        
+    Returns:
+        Number of pages
+    """
+    try:
+        with open_pdf(source) as pdf:
+            return len(pdf.pages)
+    except Exception:
+        # pdfplumber could not parse it; ask poppler instead
+        if isinstance(source, bytes):
+            return int(pdfinfo_from_bytes(source)["Pages"])
+        return int(pdfinfo_from_path(source)["Pages"])
+
+def get_pdf_info(source: PdfSource) -> dict:
     """
     Get basic information about the PDF file.
     
     Args:
-        pdf_bytes: PDF file content as bytes
+        source: PDF content as bytes, or a path to a PDF file
         
     Returns:
         Dictionary with PDF information
     """
     try:
-        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        size_bytes = len(source) if isinstance(source, bytes) else os.path.getsize(source)
+        with open_pdf(source) as pdf:
             info = {
                 "pages": len(pdf.pages),
-                "size_bytes": len(pdf_bytes),
-                "size_mb": len(pdf_bytes) / (1024 * 1024)
+                "size_bytes": size_bytes,
+                "size_mb": size_bytes / (1024 * 1024)
             }
             
             # Try to get PDF metadata
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import logging
+from datetime import datetime
+from functools import partial
+from typing import Any, Dict, FrozenSet, Optional
+
+from app.config import settings
+from app.pdf_utils import PdfSource, extract_pdf_content, configure_ocr_threads, get_ocr_backend, get_ocr_pool
+from app.parser import analyze_document, compiled_rules
+from app.rules import ensure_rules, get_rules
+from app.timings import StageTimer
+from app.validator import evaluate
+
+logger = logging.getLogger(__name__)
+
+# Bump when extraction or parsing code changes in a way that alters results
+PIPELINE_VERSION = "4"
+
+def compute_pipeline_version(rules_version: Optional[str] = None) -> str:
+    """
+    Build a stamp identifying the current extraction and parsing rules.
+    
+    Any change to the rule packs (field patterns, classification keywords,
+    validation rules) or the extraction mode produces a new stamp, which
+    invalidates previously cached results.
+    
+    Args:
+        rules_version: Rule set version, defaults to the active rules
+    
+    Returns:
+        Short hex digest
+    """
+    rules = {
+        "pipeline": PIPELINE_VERSION,
+        "extraction_mode": settings.EXTRACTION_MODE,
+        "rules": rules_version or get_rules().version
+    }
+    digest = hashlib.sha256(json.dumps(rules, sort_keys=True).encode("utf-8")).hexdigest()
+    return digest[:16]
+
+def init_worker() -> None:
+    """Prepare a freshly started pool worker process."""
+    configure_ocr_threads()
+    get_ocr_backend()
+    get_ocr_pool()  # OCR threads, and the engines they load, last as long as the worker
+    compiled_rules()  # Load and compile the rule packs before the first document
+
+def has_required_fields(text: str, fields: Optional[FrozenSet[str]] = None) -> bool:
+    """
+    Check whether text classifies as a known document type with all of its
+    required fields present.
+    
+    Args:
+        text: Extracted document text
+        fields: Field projection of the request, None for every field
+        
+    Returns:
+        True if nothing required is missing
+    """
+    analysis = analyze_document(text, fields)
+    rules = get_rules().get(analysis["doc_type"])
+    required = rules.required_fields if rules else None
+    if not required:
+        return False
+    return all(analysis["fields"].get(name) for name in required)
+
+def has_confident_fields(text: str, fields: Optional[FrozenSet[str]] = None) -> bool:
+    """
+    Check whether text already yields every field the verdict depends on.
+    
+    The document type must be known and its required fields plus its validity
+    date must all be extracted with at least EARLY_STOP_MIN_CONFIDENCE. With
+    a field projection, the requested fields of the type must be too.
+    
+    Args:
+        text: Text extracted so far
+        fields: Field projection of the request, None for every field
+        
+    Returns:
+        True if reading further pages cannot add a needed field
+    """
+    analysis = analyze_document(text, fields)
+    rules = get_rules().get(analysis["doc_type"])
+    required = rules.required_fields if rules else None
+    if not required:
+        return False
+    needed = list(required) + [rules.date_field]
+    if fields is not None:
+        needed += [name for name in fields if name in rules.fields]
+    confidences = analysis["confidences"]
+    return all(confidences.get(name, 0.0) >= settings.EARLY_STOP_MIN_CONFIDENCE for name in needed)
+
+def process_document(source: PdfSource, rules_version: Optional[str] = None,
+                     as_of: Optional[datetime] = None, fields: Optional[FrozenSet[str]] = None) -> Dict[str, Any]:
+    """
+    Run the extract -> classify -> parse -> validate pipeline for one PDF.
+
+    This runs inside the worker process pool, so it has to stay a module-level
+    function that only takes and returns picklable values.
+
+    Args:
+        source: PDF content as bytes, or a path to a spooled upload
+        rules_version: Rule set the caller runs; the worker reloads its rule
+            packs first if it is on another version
+        as_of: Reference time for the verdict (default: now)
+        fields: Only extract and return these fields; the fields the verdict
+            depends on are still parsed, and extraction stops early once
+            they are all found. None returns every field
+
+    Returns:
+        Dictionary with text, doc_type, fields, confidences, verdict, the
+        time the verdict is valid until, validation details, metadata (page counts, OCR'd pages and their
+        DPI, ranked classifications), the rules_version used and the
+        stage timings (StageTimer.to_dict) for the API process to record
+    """
+    rules_version = ensure_rules(rules_version).version
+    timer = StageTimer()
+    early_stop = settings.EXTRACTION_MODE == "early" or fields is not None
+    content = extract_pdf_content(
+        source,
+        is_sufficient=partial(has_required_fields, fields=fields),
+        is_complete=partial(has_confident_fields, fields=fields) if early_stop else None,
+        timer=timer
+    )
+    text = content["text"]
+    metadata = {
+        "pages": content["pages"],
+        "pages_read": content["pages_read"],
+        "ocr_pages": content["ocr_pages"],
+        "page_dpi": content["page_dpi"]
+    }
+    if not text.strip():
+        return {
+            "text": "",
+            "doc_type": "unknown",
+            "fields": {},
+            "confidences": {},
+            "verdict": "fail",
+            "valid_until": None,
+            "validation": None,
+            "metadata": metadata,
+            "rules_version": rules_version,
+            "timings": timer.to_dict()
+        }
+
+    # Classify, then parse the winning type; the ranked scores are kept for the response
+    analysis = analyze_document(text, fields, timer)
+    doc_type = analysis["doc_type"]
+    with timer.time("validate"):
+        validation = evaluate(analysis["fields"], doc_type, as_of)
+    verdict = validation.pop("verdict")
+    valid_until = validation.pop("valid_until")
+    metadata["classifications"] = analysis["classifications"]
+
+    # Fields parsed only for the verdict are not returned
+    found, confidences = analysis["fields"], analysis["confidences"]
+    if fields is not None:
+        found = {name: value for name, value in found.items() if name in fields}
+        confidences = {name: confidences[name] for name in found}
+
+    return {
+        "text": text,
+        "doc_type": doc_type,
+        "fields": found,
+        "confidences": confidences,
+        "verdict": verdict,
+        "valid_until": valid_until,
+        "validation": validation,
+        "metadata": metadata,
+        "rules_version": rules_version,
+        "timings": timer.to_dict()
+    }
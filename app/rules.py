@@ -0,0 +1,314 @@
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import yaml
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+RULE_FILE_EXTENSIONS = (".yaml", ".yml", ".json")
+
+# libyaml's loader is several times faster when PyYAML was built with it
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Validation kinds and the settings each one needs besides date_field
+VALIDATION_KINDS = {
+    "expiry": ("grace_days",),
+    "inspection": ("result_field", "max_age_days"),
+}
+
+@functools.lru_cache(maxsize=8192)
+def compile_pattern(pattern: str) -> re.Pattern:
+    """
+    Compile a field pattern with the flags extraction uses.
+
+    Cached, so validating a pack and building its extractors compile each
+    pattern once, and a reload only compiles patterns that changed.
+    """
+    return re.compile(pattern, re.IGNORECASE | re.MULTILINE)
+
+class RuleError(ValueError):
+    """Raised when a rule pack is missing, malformed or inconsistent."""
+
+class DocTypeRules:
+    """Classification keywords, field patterns and validation rules for one document type."""
+
+    def __init__(self, name: str, priority: float, keywords: Dict[str, float], fields: Dict[str, List[str]],
+                 required_fields: List[str], validation: Dict[str, Any], source: str = ""):
+        self.name = name
+        self.priority = priority
+        self.keywords = keywords
+        self.fields = fields
+        self.required_fields = required_fields
+        self.validation = validation
+        self.source = source
+
+    @property
+    def date_field(self) -> str:
+        """Date field that decides whether a document is still current."""
+        return self.validation["date_field"]
+
+    @property
+    def validation_fields(self) -> List[str]:
+        """Every field the verdict depends on."""
+        names = self.required_fields + [self.date_field, self.validation.get("result_field")]
+        return [name for name in dict.fromkeys(names) if name]
+
+    def project(self, fields: Optional[Iterable[str]]) -> Dict[str, List[str]]:
+        """
+        Patterns for the requested fields plus the fields validation needs.
+
+        Args:
+            fields: Requested field names, or None for every field
+
+        Returns:
+            Field patterns, in pack order
+        """
+        if fields is None:
+            return self.fields
+        needed = set(fields) | set(self.validation_fields)
+        return {name: patterns for name, patterns in self.fields.items() if name in needed}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the rules as plain data (the input to the version hash)."""
+        return {
+            "doc_type": self.name,
+            "priority": self.priority,
+            "keywords": self.keywords,
+            "fields": self.fields,
+            "required_fields": self.required_fields,
+            "validation": self.validation
+        }
+
+class RuleSet:
+    """
+    All loaded rule packs, ordered by priority.
+
+    The version is a hash of the rules themselves, so identical packs give the
+    same version wherever they are loaded and any edit produces a new one.
+    """
+
+    def __init__(self, doc_types: List[DocTypeRules], load_seconds: float = 0.0, fingerprint: Any = None):
+        ordered = sorted(doc_types, key=lambda rules: rules.priority)
+        self.doc_types: Dict[str, DocTypeRules] = {rules.name: rules for rules in ordered}
+        self.load_seconds = load_seconds
+        self.fingerprint = fingerprint
+        payload = json.dumps([rules.to_dict() for rules in ordered], sort_keys=True)
+        self.version = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def get(self, doc_type: str) -> Optional[DocTypeRules]:
+        """Return the rules for a document type, or None if it is not defined."""
+        return self.doc_types.get(doc_type)
+
+    @property
+    def field_names(self) -> set:
+        """Names of the fields any doc type extracts."""
+        return {name for rules in self.doc_types.values() for name in rules.fields}
+
+def rule_files(path: str) -> List[str]:
+    """
+    List the rule pack files at a path.
+
+    Args:
+        path: A rule pack file or a directory of them
+
+    Returns:
+        Sorted file paths
+    """
+    if os.path.isfile(path):
+        return [path]
+    if not os.path.isdir(path):
+        raise RuleError(f"Rule pack path does not exist: {path}")
+    return sorted(
+        os.path.join(path, name) for name in os.listdir(path)
+        if name.endswith(RULE_FILE_EXTENSIONS) and not name.startswith(".")
+    )
+
+def rules_fingerprint(path: str) -> Tuple:
+    """Cheap change marker for the rule pack files (names, sizes and mtimes)."""
+    try:
+        return tuple((name, os.stat(name).st_mtime_ns, os.stat(name).st_size) for name in rule_files(path))
+    except (OSError, RuleError):
+        return ()
+
+def parse_rule_pack(data: Any, source: str) -> DocTypeRules:
+    """
+    Validate one rule pack and convert it to DocTypeRules.
+
+    Args:
+        data: Parsed YAML/JSON content
+        source: File name used in error messages
+
+    Returns:
+        DocTypeRules for the pack
+
+    Raises:
+        RuleError: If the pack is malformed
+    """
+    if not isinstance(data, dict):
+        raise RuleError(f"{source}: rule pack must be a mapping")
+
+    name = data.get("doc_type")
+    if not isinstance(name, str) or not name:
+        raise RuleError(f"{source}: doc_type is required")
+
+    keywords = data.get("keywords") or []
+    if isinstance(keywords, list):
+        keywords = {keyword: 1 for keyword in keywords}
+    if not isinstance(keywords, dict) or not all(isinstance(k, str) and isinstance(w, (int, float)) for k, w in keywords.items()):
+        raise RuleError(f"{source}: keywords must be a list of strings or a mapping of keyword to weight")
+
+    fields = data.get("fields")
+    if not isinstance(fields, dict) or not fields:
+        raise RuleError(f"{source}: fields must map field names to pattern lists")
+    for field_name, patterns in fields.items():
+        if not isinstance(patterns, list) or not patterns:
+            raise RuleError(f"{source}: field {field_name} needs a list of patterns")
+        for pattern in patterns:
+            try:
+                if compile_pattern(pattern).groups < 1:
+                    raise RuleError(f"{source}: pattern for {field_name} has no capture group: {pattern}")
+            except (re.error, TypeError) as e:
+                raise RuleError(f"{source}: invalid pattern for {field_name}: {pattern} ({e})")
+
+    priority = data.get("priority", 100)
+    if isinstance(priority, bool) or not isinstance(priority, (int, float)):
+        raise RuleError(f"{source}: priority must be a number")
+
+    required_fields = data.get("required_fields") or []
+    if not isinstance(required_fields, list) or not all(isinstance(name, str) for name in required_fields):
+        raise RuleError(f"{source}: required_fields must be a list of field names")
+    unknown = [field_name for field_name in required_fields if field_name not in fields]
+    if unknown:
+        raise RuleError(f"{source}: required fields without patterns: {unknown}")
+
+    validation = data.get("validation")
+    if not isinstance(validation, dict) or validation.get("kind") not in VALIDATION_KINDS:
+        raise RuleError(f"{source}: validation.kind must be one of {sorted(VALIDATION_KINDS)}")
+    for key in ("date_field",) + VALIDATION_KINDS[validation["kind"]]:
+        if key not in validation:
+            raise RuleError(f"{source}: validation.{key} is required for kind {validation['kind']}")
+    for key in ("date_field", "result_field"):
+        if key in validation and validation[key] not in fields:
+            raise RuleError(f"{source}: validation.{key} {validation[key]} has no patterns")
+
+    return DocTypeRules(
+        name=name,
+        priority=priority,
+        keywords=keywords,
+        fields=fields,
+        required_fields=list(required_fields),
+        validation=validation,
+        source=source
+    )
+
+def load_rules(path: str) -> RuleSet:
+    """
+    Load and validate every rule pack at a path.
+
+    Args:
+        path: A rule pack file or a directory of YAML/JSON packs
+
+    Returns:
+        New RuleSet
+
+    Raises:
+        RuleError: If any pack is invalid or two packs define the same doc type
+    """
+    start = time.perf_counter()
+    fingerprint = rules_fingerprint(path)
+    doc_types = []
+    for file_path in rule_files(path):
+        source = os.path.basename(file_path)
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                data = json.load(f) if file_path.endswith(".json") else yaml.load(f, Loader=YamlLoader)
+        except (OSError, ValueError, yaml.YAMLError) as e:
+            raise RuleError(f"{source}: could not read rule pack ({e})")
+        doc_types.append(parse_rule_pack(data, source))
+
+    if not doc_types:
+        raise RuleError(f"No rule packs found in {path}")
+    names = [rules.name for rules in doc_types]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise RuleError(f"Doc types defined more than once: {duplicates}")
+
+    return RuleSet(doc_types, load_seconds=time.perf_counter() - start, fingerprint=fingerprint)
+
+# The active rules; replaced as a whole so readers always see one consistent set
+_active_rules: Optional[RuleSet] = None
+_rules_lock = threading.Lock()
+
+def get_rules() -> RuleSet:
+    """
+    Return the active rule set, loading Settings.RULES_PATH on first use.
+
+    Returns:
+        Shared RuleSet
+    """
+    rules = _active_rules
+    if rules is None:
+        with _rules_lock:
+            rules = _active_rules or _swap(load_rules(settings.RULES_PATH))
+    return rules
+
+def _swap(rules: RuleSet) -> RuleSet:
+    """Make a fully loaded rule set the active one."""
+    global _active_rules
+    _active_rules = rules
+    logger.info(f"Loaded {len(rules.doc_types)} rule packs (version {rules.version}) "
+                f"in {rules.load_seconds * 1000:.1f} ms")
+    return rules
+
+def reload_rules(path: Optional[str] = None) -> RuleSet:
+    """
+    Load the rule packs again and swap them in if they are valid.
+
+    Requests in flight keep the rule set they started with; on error the
+    current rules stay active.
+
+    Args:
+        path: Rule pack location, defaults to Settings.RULES_PATH
+
+    Returns:
+        The new active RuleSet
+
+    Raises:
+        RuleError: If the new packs are invalid
+    """
+    rules = load_rules(path or settings.RULES_PATH)
+    with _rules_lock:
+        return _swap(rules)
+
+def ensure_rules(version: Optional[str]) -> RuleSet:
+    """
+    Make sure this process runs the given rules version, reloading if it differs.
+
+    Pool workers use this to follow reloads in the API process without being
+    restarted.
+
+    Args:
+        version: Version the caller expects, or None to accept the current one
+
+    Returns:
+        The active RuleSet
+    """
+    rules = get_rules()
+    if version is not None and rules.version != version:
+        rules = reload_rules()
+        if rules.version != version:
+            logger.warning(f"Rule packs changed again while loading: expected {version}, got {rules.version}")
+    return rules
+
+def rules_changed() -> bool:
+    """Whether the rule pack files changed since the active rules were loaded."""
+    return rules_fingerprint(settings.RULES_PATH) != get_rules().fingerprint
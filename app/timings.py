@@ -0,0 +1,113 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+class StageTimer:
+    """
+    Collects how long each pipeline stage took for one document.
+
+    Pool workers fill one in while processing a document and return it as
+    plain data with the result, so the API process can record metrics
+    without the workers touching shared state. Stages that run several times
+    (per page, per batch of pages) keep one duration per run.
+    """
+
+    def __init__(self):
+        self.started = time.time()  # Wall clock, so the API process can tell how long the document queued
+        self.stages: Dict[str, List[float]] = {}
+        self.counts: Dict[str, int] = {}
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block as one run of a stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def add(self, stage: str, seconds: float) -> None:
+        """Record one run of a stage."""
+        # list.append is atomic, so OCR threads can share the timer
+        self.stages.setdefault(stage, []).append(seconds)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Increase an event counter (e.g. pages that fell back to OCR)."""
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain, picklable form returned by pool workers."""
+        return {"started": self.started, "stages": self.stages, "counts": self.counts}
+
+class NullTimer(StageTimer):
+    """Timer that records nothing, used when the caller does not ask for timings."""
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        yield
+
+    def add(self, stage: str, seconds: float) -> None:
+        pass
+
+    def count(self, name: str, amount: int = 1) -> None:
+        pass
+
+NULL_TIMER = NullTimer()
+
+def milliseconds(seconds: float) -> float:
+    """Seconds as milliseconds, rounded for reporting."""
+    return round(seconds * 1000, 1)
+
+def summarize_timings(timings: Dict[str, Any], metadata: Dict[str, Any], queued: float,
+                      total: float) -> Dict[str, Any]:
+    """
+    Build the per-file timings block of a response.
+
+    Args:
+        timings: StageTimer.to_dict() output for the document, with the time
+            spent in the pool queue as its "queue" stage
+        metadata: Result metadata (OCR'd pages and their DPI)
+        queued: Seconds spent waiting for a processing slot
+        total: Seconds from the file's turn starting to its result
+
+    Returns:
+        Milliseconds per stage; OCR (page rendering plus recognition, summed
+        over pages that may run in parallel) also reports its pages and DPI
+    """
+    stages = timings["stages"]
+
+    def stage(name: str) -> float:
+        return milliseconds(sum(stages.get(name, ())))
+
+    ocr = None
+    if "ocr" in stages or "render" in stages:
+        ocr = {
+            "ms": milliseconds(sum(stages.get("render", ())) + sum(stages.get("ocr", ()))),
+            "pages": len(metadata.get("ocr_pages", ())),
+            "dpi": sorted(set(metadata.get("page_dpi", {}).values()))
+        }
+    return {
+        "queue_ms": milliseconds(queued + sum(stages.get("queue", ()))),
+        "extraction_ms": stage("pdfplumber"),
+        "ocr": ocr,
+        "classification_ms": stage("classify"),
+        "parsing_ms": stage("parse"),
+        "validation_ms": stage("validate"),
+        "total_ms": milliseconds(total),
+        "cached": timings.get("cached", False)
+    }
+
+def server_timing(metrics: Iterable[Tuple[str, float, Optional[str]]]) -> str:
+    """
+    Format a Server-Timing header value.
+
+    Args:
+        metrics: (name, milliseconds, optional description) per metric
+    """
+    entries = []
+    for name, duration, description in metrics:
+        entry = f"{name};dur={duration:.1f}"
+        if description:
+            entry += f';desc="{description}"'
+        entries.append(entry)
+    return ", ".join(entries)
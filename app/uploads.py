@@ -0,0 +1,308 @@
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ModuleNotFoundError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from app.config import settings
+from app.metrics import BYTES_INGESTED
+
+logger = logging.getLogger(__name__)
+
+# Room for multipart boundaries and part headers on top of the file payloads
+MULTIPART_OVERHEAD = 1024 * 1024
+
+class UploadTooLargeError(ValueError):
+    """Raised when data written to an upload would take it past its size limit."""
+
+class SpooledUpload:
+    """
+    An uploaded file kept in memory until it passes a size threshold, then on disk.
+
+    Spooled files are named temporary files so pool workers can open them by
+    path instead of receiving a copy of the content. The SHA-256 digest is
+    computed while the data streams in. With a max_size, writes that would
+    pass it raise UploadTooLargeError.
+    """
+
+    def __init__(self, filename: str, spool_threshold: int, spool_dir: Optional[str] = None,
+                 max_size: Optional[int] = None):
+        self.filename = filename
+        self.spool_threshold = spool_threshold
+        self.spool_dir = spool_dir
+        self.max_size = max_size
+        self.size = 0
+        self.error: Optional[str] = None
+        self.path: Optional[str] = None
+        self._hash = hashlib.sha256()
+        self._buffer = bytearray()
+        self._file = None
+
+    @property
+    def digest(self) -> str:
+        """Hex SHA-256 of the content received so far."""
+        return self._hash.hexdigest()
+
+    @property
+    def on_disk(self) -> bool:
+        """Whether the content has been spooled to a temporary file."""
+        return self.path is not None
+
+    @property
+    def source(self):
+        """The content as a file path when spooled, otherwise as bytes."""
+        return self.path if self.path is not None else bytes(self._buffer)
+
+    def write(self, data: bytes) -> None:
+        """
+        Append data, moving the content to disk once it passes the threshold.
+
+        Raises:
+            UploadTooLargeError: If the data would take the upload past max_size;
+                nothing is written
+        """
+        if self.error is not None:
+            return
+        if self.max_size is not None and self.size + len(data) > self.max_size:
+            raise UploadTooLargeError(
+                f"File {self.filename} too large. Maximum size is {self.max_size // (1024*1024)}MB"
+            )
+        self.size += len(data)
+        self._hash.update(data)
+        if self._file is None and self.size > self.spool_threshold:
+            self._file = tempfile.NamedTemporaryFile(suffix=".pdf", dir=self.spool_dir, delete=False)
+            self.path = self._file.name
+            self._file.write(self._buffer)
+            self._buffer = bytearray()
+        if self._file is not None:
+            self._file.write(data)
+        else:
+            self._buffer.extend(data)
+
+    def finish(self) -> None:
+        """Flush spooled content so other processes can read the file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def save(self, path: str) -> None:
+        """Move the content to a permanent file; the upload no longer owns it afterwards."""
+        self.finish()
+        if self.path is not None:
+            shutil.move(self.path, path)
+            self.path = None
+        else:
+            with open(path, "wb") as f:
+                f.write(self._buffer)
+        self._buffer = bytearray()
+
+    def reject(self, reason: str) -> None:
+        """Mark the upload as invalid and drop anything received for it."""
+        self.error = reason
+        self.close()
+
+    def close(self) -> None:
+        """Release the in-memory buffer and delete the spooled file."""
+        self._buffer = bytearray()
+        self.finish()
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except OSError as e:
+                logger.warning(f"Could not remove spooled upload {self.path}: {e}")
+            self.path = None
+
+def check_filename(filename: str) -> Optional[str]:
+    """
+    Check an uploaded filename against the allowed extensions.
+
+    Args:
+        filename: Client-supplied filename
+
+    Returns:
+        Error message, or None if the file is acceptable
+    """
+    if not filename:
+        return "No filename provided"
+
+    file_ext = os.path.splitext(filename)[1].lower()
+    if file_ext not in settings.ALLOWED_EXTENSIONS:
+        return f"Invalid file type. Only PDF files are allowed. Got: {file_ext}"
+    return None
+
+async def receive_uploads(request: Request, field_name: str = "files",
+                          max_files: Optional[int] = None) -> List[SpooledUpload]:
+    """
+    Stream a multipart request body into spooled uploads.
+
+    The body is parsed as it arrives instead of being buffered first. A file
+    that passes Settings.MAX_FILE_SIZE is rejected on the spot and the rest of
+    its data is discarded, files beyond UPLOAD_SPOOL_THRESHOLD go to temporary
+    files, and the request is aborted once the body exceeds what max_files
+    full-size files could need. Rejected files are returned with an error so
+    they can be reported alongside the others.
+
+    Args:
+        request: Incoming request with a multipart/form-data body
+        field_name: Form field carrying the files
+        max_files: Maximum number of files, defaults to Settings.MAX_FILES_PER_REQUEST
+
+    Returns:
+        Uploads in the order they were sent; the caller must close them
+
+    Raises:
+        HTTPException: 400 for too many files, 413 for an oversized body,
+            422 for a missing or malformed multipart body
+    """
+    max_files = max_files or settings.MAX_FILES_PER_REQUEST
+    max_body = max_files * settings.MAX_FILE_SIZE + MULTIPART_OVERHEAD
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=422, detail="Expected a multipart/form-data body with files")
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_body:
+        raise HTTPException(status_code=413, detail=f"Request body too large. Maximum is {max_files} files of {settings.MAX_FILE_SIZE // (1024*1024)}MB")
+
+    uploads: List[SpooledUpload] = []
+    pending: List[Tuple[SpooledUpload, bytes]] = []
+    part = {"headers": {}, "upload": None}
+
+    def on_part_begin() -> None:
+        part["headers"] = {}
+        part["upload"] = None
+        part["name"] = b""
+        part["value"] = b""
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        part["name"] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        part["value"] += data[start:end]
+
+    def on_header_end() -> None:
+        part["headers"][part["name"].lower()] = part["value"]
+        part["name"] = b""
+        part["value"] = b""
+
+    def on_headers_finished() -> None:
+        _, options = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        if options.get(b"name", b"").decode("utf-8", "replace") != field_name or b"filename" not in options:
+            return  # Other form fields are ignored
+        if len(uploads) >= max_files:
+            raise HTTPException(status_code=400, detail=f"Maximum {max_files} files allowed per request")
+
+        filename = options[b"filename"].decode("utf-8", "replace")
+        upload = SpooledUpload(
+            filename, settings.UPLOAD_SPOOL_THRESHOLD, settings.UPLOAD_SPOOL_DIR or None, settings.MAX_FILE_SIZE
+        )
+        error = check_filename(filename)
+        if error:
+            upload.reject(error)
+        uploads.append(upload)
+        part["upload"] = upload
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        upload = part["upload"]
+        if upload is None or upload.error is not None:
+            return
+        pending.append((upload, data[start:end]))
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+    })
+
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            BYTES_INGESTED.inc(len(chunk))
+            if received > max_body:
+                raise HTTPException(status_code=413, detail=f"Request body too large. Maximum is {max_files} files of {settings.MAX_FILE_SIZE // (1024*1024)}MB")
+            parser.write(chunk)
+
+            # Apply writes outside the parser callbacks so disk I/O stays off the event loop
+            for upload, data in pending:
+                if upload.error is not None:
+                    continue
+                try:
+                    if upload.on_disk or upload.size + len(data) > upload.spool_threshold:
+                        await asyncio.to_thread(upload.write, data)
+                    else:
+                        upload.write(data)
+                except UploadTooLargeError as e:
+                    # The rest of an oversized file is discarded as it arrives
+                    upload.reject(str(e))
+            pending.clear()
+        parser.finalize()
+    except HTTPException:
+        for upload in uploads:
+            upload.close()
+        raise
+    except Exception as e:
+        for upload in uploads:
+            upload.close()
+        raise HTTPException(status_code=422, detail=f"Malformed multipart body: {e}")
+
+    for upload in uploads:
+        upload.finish()
+
+    if not uploads:
+        raise HTTPException(status_code=422, detail="No files provided")
+
+    return uploads
+
+async def receive_body(request: Request, filename: str, max_size: int) -> SpooledUpload:
+    """
+    Stream a raw request body into a spooled upload.
+
+    Args:
+        request: Incoming request whose body is the file itself
+        filename: Name to give the upload
+        max_size: Largest accepted body in bytes
+
+    Returns:
+        Upload with the body; the caller must close it
+
+    Raises:
+        HTTPException: 413 for an oversized body, 422 for an empty one
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_size:
+        raise HTTPException(status_code=413, detail=f"Request body too large. Maximum is {max_size // (1024*1024)}MB")
+
+    upload = SpooledUpload(filename, settings.UPLOAD_SPOOL_THRESHOLD, settings.UPLOAD_SPOOL_DIR or None, max_size)
+    try:
+        async for chunk in request.stream():
+            BYTES_INGESTED.inc(len(chunk))
+            if upload.on_disk or upload.size + len(chunk) > upload.spool_threshold:
+                await asyncio.to_thread(upload.write, chunk)
+            else:
+                upload.write(chunk)
+    except UploadTooLargeError:
+        upload.close()
+        raise HTTPException(status_code=413, detail=f"Request body too large. Maximum is {max_size // (1024*1024)}MB")
+    except BaseException:
+        upload.close()
+        raise
+    upload.finish()
+
+    if not upload.size:
+        upload.close()
+        raise HTTPException(status_code=422, detail="Empty request body")
+    return upload
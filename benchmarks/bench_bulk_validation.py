@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Compare per-document validation with vectorized bulk re-validation.
+
+Builds a large set of stored field sets (dates repeat across documents, as
+renewals cluster on the same days) and recomputes every verdict for an
+as-of date, checking that both approaches agree.
+
+Usage:
+    python -m benchmarks.bench_bulk_validation [--documents 300000]
+"""
+
+import argparse
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+
+from app.bulk import revalidate
+from app.dates import parse_date_details
+from app.validator import evaluate
+
+REQUIRED = {
+    "insurance": ("insured", "policy_number"),
+    "training": ("worker_name", "certificate_id"),
+    "inspection": ("inspector",),
+}
+
+def build_documents(count: int, seed: int = 0) -> list:
+    """Field sets of every doc type with dates spread over a few years"""
+    rng = random.Random(seed)
+    start = datetime(2022, 1, 1)
+    documents = []
+    for _ in range(count):
+        doc_type = rng.choice(list(REQUIRED))
+        fields = {name: "value" for name in REQUIRED[doc_type] if rng.random() < 0.97}
+        date = (start + timedelta(days=rng.randrange(1500))).strftime(rng.choice(["%m/%d/%Y", "%Y-%m-%d", "%B %d, %Y"]))
+        if doc_type == "inspection":
+            fields.update(inspection_date=date, result=rng.choice(["PASS", "PASS", "FAIL"]))
+        else:
+            fields["expiry_date"] = date
+        documents.append({"doc_type": doc_type, "fields": fields})
+    return documents
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--documents", type=int, default=300000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    documents = build_documents(args.documents)
+    as_of = datetime(2025, 6, 1)
+
+    parse_date_details.cache_clear()
+    start = time.perf_counter()
+    expected = [evaluate(doc["fields"], doc["doc_type"], as_of)["verdict"] for doc in documents]
+    per_document = time.perf_counter() - start
+
+    parse_date_details.cache_clear()
+    start = time.perf_counter()
+    verdicts = revalidate(documents, as_of)["verdicts"]
+    bulk = time.perf_counter() - start
+
+    assert verdicts.tolist() == expected
+    print(f"Documents: {len(documents):,}")
+    print(f"  per-document: {per_document:6.2f} s")
+    print(f"    vectorized: {bulk:6.2f} s ({per_document / bulk:.1f}x)")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Compare per-keyword substring search with the Aho-Corasick keyword classifier.
+
+Scores a long OCR-style document with the configured keywords and again with
+hundreds of extra synthetic keywords, to show how each approach scales with
+the size of the keyword list.
+
+Usage:
+    python -m benchmarks.bench_classifier [--pages 20] [--extra-keywords 500]
+"""
+
+import argparse
+import random
+import statistics
+import string
+import time
+
+from app.parser import KeywordClassifier
+from app.rules import get_rules
+from benchmarks.bench_field_extraction import build_document
+
+def substring_scores(keywords: dict, text: str) -> dict:
+    """Previous implementation: one substring search per keyword"""
+    text_lower = text.lower()
+    return {
+        doc_type: sum(1 for keyword in type_keywords if keyword in text_lower)
+        for doc_type, type_keywords in keywords.items()
+    }
+
+def synthetic_keywords(count: int, seed: int = 0) -> list:
+    """Two-word keywords that mostly do not occur in the document"""
+    rng = random.Random(seed)
+    return [
+        "".join(rng.choices(string.ascii_lowercase, k=7)) + " " + "".join(rng.choices(string.ascii_lowercase, k=6))
+        for _ in range(count)
+    ]
+
+def time_call(fn, iterations: int) -> float:
+    """Median milliseconds per call"""
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--extra-keywords", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    text = build_document(args.pages)
+    base = {name: list(doc.keywords) for name, doc in get_rules().doc_types.items()}
+    extended = dict(base, other=synthetic_keywords(args.extra_keywords))
+
+    print(f"Document: {args.pages} pages, {len(text):,} characters")
+    for label, keywords in (("configured", base), (f"+{args.extra_keywords} keywords", extended)):
+        classifier = KeywordClassifier(keywords)
+        assert classifier.score(text) == substring_scores(keywords, text)
+        count = sum(len(words) for words in keywords.values())
+        substring = time_call(lambda: substring_scores(keywords, text), args.iterations)
+        automaton = time_call(lambda: classifier.score(text), args.iterations)
+        print(f"{label:>18} ({count} keywords): substring {substring:7.2f} ms, automaton {automaton:7.2f} ms")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
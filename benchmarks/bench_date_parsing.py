@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Compare trying every date format in turn with shape-dispatched, memoized parsing.
+
+Builds a corpus of date strings in the forms that show up in certificates
+(numeric with slashes or dashes, 2- and 4-digit years, month names, dates
+embedded in text, placeholders), with values repeating as they do across
+documents, and checks that every string parses to the same date.
+
+Usage:
+    python -m benchmarks.bench_date_parsing [--strings 20000] [--distinct 2000]
+"""
+
+import argparse
+import logging
+import random
+import time
+from datetime import date, timedelta
+
+from app.dates import DATE_PARSER, parse_date_details, parse_with_formats
+
+SHAPES = [
+    "%m/%d/%Y", "%m/%d/%Y", "%m/%d/%Y", "%d/%m/%Y", "%Y-%m-%d", "%Y-%m-%d", "%d-%m-%Y",
+    "%m/%d/%y", "%B %d, %Y", "%b %d, %Y", "%d %B %Y", "%d-%b-%Y", "%b %d %Y",
+    "Expires %m/%d/%Y", "%Y/%m/%d", "%m.%d.%Y",
+]
+PLACEHOLDERS = ["N/A", "TBD", "See attached", "Continuous", "Until cancelled"]
+
+def build_corpus(strings: int, distinct: int, seed: int = 0) -> list:
+    """Draw strings from a pool of distinct dates, the most common ones repeating most"""
+    rng = random.Random(seed)
+    start = date(2015, 1, 1)
+    pool = [
+        (start + timedelta(days=rng.randrange(6000))).strftime(rng.choice(SHAPES))
+        for _ in range(distinct)
+    ] + PLACEHOLDERS
+    weights = [1 / (rank + 1) for rank in range(len(pool))]
+    return rng.choices(pool, weights=weights, k=strings)
+
+def legacy_parse_date(date_string: str):
+    """Previous implementation: strptime with every format in order, then a text search"""
+    if not date_string:
+        return None
+    date_string = date_string.strip()
+    if len(date_string) < 3 or date_string.lower() in ['n/a', 'none', 'unknown', 'tbd', 'y']:
+        return None
+    return parse_with_formats(date_string).value
+
+def time_corpus(fn, corpus: list) -> float:
+    """Microseconds per string"""
+    start = time.perf_counter()
+    for text in corpus:
+        fn(text)
+    return (time.perf_counter() - start) * 1e6 / len(corpus)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--strings", type=int, default=20000)
+    parser.add_argument("--distinct", type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    corpus = build_corpus(args.strings, args.distinct)
+    for text in set(corpus):
+        assert DATE_PARSER.parse(text).value == legacy_parse_date(text), text
+
+    parse_date_details.cache_clear()
+    results = {
+        "every format": time_corpus(legacy_parse_date, corpus),
+        "shape dispatch": time_corpus(lambda text: DATE_PARSER.parse(text), corpus),
+        "memoized": time_corpus(parse_date_details, corpus),
+    }
+    print(f"Corpus: {len(corpus):,} strings, {len(set(corpus)):,} distinct")
+    for name, micros in results.items():
+        print(f"{name:>15}: {micros:7.2f} us/string ({results['every format'] / micros:5.1f}x)")
+
+    ambiguous = sum(parse_date_details(text).ambiguous for text in set(corpus))
+    print(f"Ambiguous day/month strings: {ambiguous} of {len(set(corpus))}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
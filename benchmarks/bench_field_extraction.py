@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Compare per-pattern field extraction with the single-pass compiled extractor.
+
+Builds a long OCR-style document (many pages of body text with the labelled
+fields scattered through it) and times extracting every field for each
+document type, checking that both approaches return the same fields. Also
+times how label-indexed extraction scales as alternative patterns are added.
+
+Usage:
+    python -m benchmarks.bench_field_extraction [--pages 20] [--iterations 50] [--extra-patterns 200]
+"""
+
+import argparse
+import random
+import statistics
+import string
+import time
+
+from app.parser import FieldExtractor, extract_field_with_patterns, parse_fields
+from app.rules import get_rules
+
+PATTERNS = {name: doc.fields for name, doc in get_rules().doc_types.items()}
+
+FIELD_LINES = [
+    "INSURED: ABC Construction LLC",
+    "POLICY NUMBER: GL-2024-001",
+    "INSURER: State Farm Insurance",
+    "EXPIRY DATE: 12/31/2025",
+    "INSPECTOR: John Smith",
+    "INSPECTION DATE: 03/15/2024",
+    "RESULT: PASS",
+    "WORKER NAME: Albert Hernandez",
+    "ISSUE DATE: 01/03/2024",
+]
+
+WORDS = ("the crane hoist operator shall inspect rigging load chart boom wire rope sheave "
+         "brake clutch controls safety latch hook block outrigger pads 12 34 5/8 ton").split()
+
+def build_document(pages: int, seed: int = 0) -> str:
+    """Generate OCR-like pages of filler text with field lines spread across them"""
+    rng = random.Random(seed)
+    lines = [" ".join(rng.choices(WORDS, k=12)) for _ in range(pages * 50)]
+    for field_line in FIELD_LINES:
+        lines.insert(rng.randrange(len(lines)), field_line)
+    return "\n".join(lines)
+
+def per_pattern_fields(text: str, doc_type: str) -> dict:
+    """Previous implementation: one re.search per pattern per field"""
+    fields = {}
+    for field_name, field_patterns in PATTERNS[doc_type].items():
+        value, _ = extract_field_with_patterns(text, field_patterns)
+        if value is not None:
+            fields[field_name] = value
+    return fields
+
+def with_extra_patterns(patterns: dict, count: int, seed: int = 0) -> dict:
+    """Add count synthetic two-word label alternatives to every field, after the real ones"""
+    rng = random.Random(seed)
+    words = lambda: "".join(rng.choices(string.ascii_uppercase, k=6))
+    return {
+        field_name: field_patterns + [rf"{words()}\s+{words()}:\s*([^\n\r]+)" for _ in range(count)]
+        for field_name, field_patterns in patterns.items()
+    }
+
+def time_call(fn, text: str, iterations: int) -> list:
+    """Run fn for every doc type repeatedly and return per-iteration milliseconds"""
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        for doc_type in PATTERNS:
+            fn(text, doc_type)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--extra-patterns", type=int, default=200)
+    args = parser.parse_args()
+
+    text = build_document(args.pages)
+    for doc_type in PATTERNS:
+        assert per_pattern_fields(text, doc_type) == parse_fields(text, doc_type)[0], doc_type
+
+    print(f"Document: {args.pages} pages, {len(text):,} characters")
+    results = {
+        "per-pattern": time_call(per_pattern_fields, text, args.iterations),
+        "single-pass": time_call(lambda t, d: parse_fields(t, d), text, args.iterations),
+    }
+    for name, latencies in results.items():
+        print(f"{name:>12}: median {statistics.median(latencies):8.2f} ms "
+              f"(min {min(latencies):.2f}, max {max(latencies):.2f})")
+
+    speedup = statistics.median(results["per-pattern"]) / statistics.median(results["single-pass"])
+    print(f"Speedup: {speedup:.1f}x")
+
+    # Fields that are missing from the text have to try every alternative
+    sparse = "\n".join(line for line in text.splitlines() if not line.startswith(("INSURER", "EXPIRY")))
+    for extra in (0, args.extra_patterns):
+        patterns = with_extra_patterns(PATTERNS["insurance"], extra)
+        extractor = FieldExtractor(patterns)
+        count = sum(len(field_patterns) for field_patterns in patterns.values())
+        indexed = time_call(lambda t, d: extractor.extract(t), sparse, args.iterations)
+        print(f"Insurance with {count:4d} patterns: label index median {statistics.median(indexed):.2f} ms")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Compare OCR latency of the available OCR backends through the pipeline.
+
+Builds a scanned (image-only) PDF of synthetic OSHA cards and times
+extract_pdf_content with each backend, so page rendering, the OCR thread
+pool and any per-thread engine loading are all part of the measurement.
+One warm-up document runs first, as a pipeline worker would have processed
+earlier documents.
+
+Usage:
+    python -m benchmarks.bench_ocr_backends [--iterations 10] [--pages 4] [--dpi 300]
+"""
+
+import argparse
+import io
+import shutil
+import statistics
+import sys
+import time
+
+from PIL import Image, ImageDraw, ImageFont
+
+import app.pdf_utils as pdf_utils
+from app.config import settings
+
+LINES = [
+    "OSHA 30-HOUR CONSTRUCTION SAFETY TRAINING CARD",
+    "WORKER NAME: Albert Hernandez",
+    "CERTIFICATE ID: OSHA-2024-001",
+    "HOURS: 30",
+    "ISSUE DATE: 01/03/2024",
+    "EXPIRY DATE: 01/03/2029",
+    "ISSUED BY: Safety Training Institute",
+]
+
+def build_card(dpi: int) -> Image.Image:
+    """Draw a wallet-card sized training card at the given resolution"""
+    scale = dpi / 100
+    img = Image.new("L", (int(850 * scale), int(550 * scale)), "white")
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.load_default(size=int(22 * scale))
+    for row, line in enumerate(LINES):
+        draw.text((40 * scale, (40 + row * 60) * scale), line, fill="black", font=font)
+    return img
+
+def build_scanned_pdf(pages: int, dpi: int) -> bytes:
+    """Image-only PDF with one card per page, so every page needs OCR"""
+    cards = [build_card(dpi) for _ in range(pages)]
+    buffer = io.BytesIO()
+    cards[0].save(buffer, format="PDF", resolution=dpi, save_all=True, append_images=cards[1:])
+    return buffer.getvalue()
+
+def time_backend(name: str, pdf_bytes: bytes, iterations: int) -> list:
+    """Extract the PDF repeatedly and return per-document latencies in milliseconds"""
+    pdf_utils._ocr_backend = pdf_utils.create_ocr_backend(name)
+    pdf_utils.extract_pdf_content(pdf_bytes)  # warm-up: starts OCR threads and loads their engines
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        content = pdf_utils.extract_pdf_content(pdf_bytes)
+        latencies.append((time.perf_counter() - start) * 1000)
+    assert "CERTIFICATE" in content["text"].upper(), f"{name} failed to read the cards"
+    return latencies
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=4)
+    parser.add_argument("--dpi", type=int, default=300)
+    args = parser.parse_args()
+
+    if not shutil.which("tesseract") or not shutil.which("pdftoppm"):
+        print("tesseract and poppler must be installed to run this benchmark")
+        return 1
+
+    settings.OCR_FIRST_PASS_DPI = 0  # Read every page once at --dpi
+    settings.OCR_DPI = args.dpi
+    pdf_bytes = build_scanned_pdf(args.pages, args.dpi)
+    print(f"Scanned PDF of {args.pages} card(s) at {args.dpi} DPI, {settings.OCR_WORKERS} OCR worker(s), "
+          f"{args.iterations} iterations")
+    print(f"{'backend':>12} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'ms/page':>9}")
+
+    for name in ("pytesseract", "tesserocr"):
+        try:
+            latencies = sorted(time_backend(name, pdf_bytes, args.iterations))
+        except ImportError:
+            print(f"{name:>12} not installed")
+            continue
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        mean = statistics.mean(latencies)
+        print(f"{name:>12} {mean:>9.1f} {statistics.median(latencies):>9.1f} {p95:>9.1f} {mean / args.pages:>9.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark parallel multi-page OCR against worker count.
+
+Builds a synthetic scanned document (text drawn onto page bitmaps, saved as an
+image-only PDF) and times ocr_pages with 1..N OCR workers.
+
+Usage:
+    python -m benchmarks.bench_parallel_ocr [--pages 12] [--max-workers 8]
+"""
+
+import argparse
+import io
+import os
+import shutil
+import sys
+import time
+
+from PIL import Image, ImageDraw, ImageFont
+
+from app.config import settings
+from app.pdf_utils import ocr_pages
+
+LINES = [
+    "CERTIFICATE OF INSURANCE",
+    "INSURED: ACME Construction LLC",
+    "POLICY NUMBER: GL-1234567-2024",
+    "INSURER: ABC Insurance Company",
+    "COVERAGE TYPE: General Liability",
+    "EFFECTIVE DATE: 01/01/2024",
+    "EXPIRY DATE: 12/31/2030",
+]
+
+def build_scanned_pdf(pages: int) -> bytes:
+    """Render text onto letter-size bitmaps and save them as an image-only PDF"""
+    font = ImageFont.load_default(size=36)
+    images = []
+    for page in range(pages):
+        img = Image.new("L", (1700, 2200), "white")
+        draw = ImageDraw.Draw(img)
+        for row, line in enumerate(LINES * 4):
+            draw.text((150, 150 + row * 60), f"{line} ({page + 1})", fill="black", font=font)
+        images.append(img)
+    buffer = io.BytesIO()
+    images[0].save(buffer, format="PDF", resolution=200, save_all=True, append_images=images[1:])
+    return buffer.getvalue()
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=12)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    if not (shutil.which("tesseract") and shutil.which("pdftoppm")):
+        print("tesseract and poppler (pdftoppm) must be installed to run this benchmark")
+        return 1
+
+    pdf_bytes = build_scanned_pdf(args.pages)
+    page_numbers = list(range(1, args.pages + 1))
+    cores = os.cpu_count() or 1
+    print(f"{args.pages} scanned pages, {cores} cores")
+    print(f"{'workers':>8} {'omp':>4} {'seconds':>8} {'speedup':>8}")
+
+    baseline = None
+    workers = 1
+    while workers <= args.max_workers:
+        settings.OCR_WORKERS = workers
+        # Same split configure_ocr_threads applies inside pool workers
+        omp = max(1, cores // workers)
+        os.environ["OMP_THREAD_LIMIT"] = str(omp)
+
+        start = time.perf_counter()
+        texts = ocr_pages(pdf_bytes, page_numbers)
+        elapsed = time.perf_counter() - start
+        assert len(texts) == args.pages, "OCR failed on some pages"
+
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {omp:>4} {elapsed:>8.2f} {baseline / elapsed:>7.2f}x")
+        workers *= 2
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
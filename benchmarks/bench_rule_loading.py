@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Time loading and compiling rule packs as the number of document types grows.
+
+Writes the shipped packs plus synthetic ones to a temporary directory and
+times load_rules (read, validate, hash) and CompiledRules (automaton and
+label indexes) separately, then analyzes a document with the larger set.
+Repeated loads reuse the cached compiled patterns, as a reload of mostly
+unchanged packs does.
+
+Usage:
+    python -m benchmarks.bench_rule_loading [--doc-types 50] [--iterations 10]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import string
+import tempfile
+import time
+
+import yaml
+
+from app.config import settings
+from app.parser import CompiledRules
+from app.rules import load_rules
+from benchmarks.bench_field_extraction import build_document
+
+def synthetic_pack(index: int, rng: random.Random) -> dict:
+    """A doc type with random keywords and two-word field labels"""
+    word = lambda: "".join(rng.choices(string.ascii_uppercase, k=6))
+    fields = {
+        f"field_{i}": [rf"{word()}\s+{word()}:\s*([^\n\r]+)" for _ in range(4)]
+        for i in range(6)
+    }
+    return {
+        "doc_type": f"synthetic_{index}",
+        "priority": 100 + index,
+        "keywords": [f"{word().lower()} {word().lower()}" for _ in range(20)],
+        "required_fields": ["field_0"],
+        "validation": {"kind": "expiry", "date_field": "field_1", "grace_days": 30},
+        "fields": fields
+    }
+
+def time_call(fn, iterations: int) -> float:
+    """Median milliseconds per call"""
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--doc-types", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    text = build_document(20)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rules")
+        shutil.copytree(settings.RULES_PATH, path)
+        for label, extra in (("shipped", 0), (f"+{args.doc_types} synthetic", args.doc_types)):
+            for i in range(extra):
+                with open(os.path.join(path, f"synthetic_{i}.yaml"), "w", encoding="utf-8") as f:
+                    yaml.safe_dump(synthetic_pack(i, rng), f)
+            rules = load_rules(path)
+            compiled = CompiledRules(rules)
+            load = time_call(lambda: load_rules(path), args.iterations)
+            compile_ = time_call(lambda: CompiledRules(rules), args.iterations)
+            analyze = time_call(lambda: compiled.analyzer.analyze(text), args.iterations)
+            print(f"{label:>16} ({len(rules.doc_types):3d} doc types): load {load:7.2f} ms, "
+                  f"compile {compile_:7.2f} ms, analyze {analyze:6.2f} ms")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,185 @@
+"""
+Tests for archive ingestion
+"""
+
+import io
+import json
+import tarfile
+import zipfile
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.archives import ArchiveError, ArchiveReader, ArchiveTooLargeError
+from app.main import app
+
+
+TEST_FILES_DIR = Path(__file__).parent.parent / "test_files"
+
+
+def make_zip(members):
+    """ZIP archive bytes with the given name -> content members"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def make_tar(members, mode="w:gz"):
+    """TAR archive bytes with the given name -> content members"""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode=mode) as archive:
+        for name, content in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+def corrupt_first_member(source):
+    """ZIP archive bytes with the compressed data of the first member overwritten"""
+    info = zipfile.ZipFile(io.BytesIO(source)).infolist()[0]
+    start = info.header_offset + 30 + len(info.filename) + 5
+    corrupted = bytearray(source)
+    corrupted[start:start + 50] = bytes(b ^ 0xFF for b in corrupted[start:start + 50])
+    return bytes(corrupted)
+
+
+def read_all(source, max_member_size=1024, max_total_size=10 * 1024, max_members=100):
+    """(filename, content or error) for every member"""
+    reader = ArchiveReader(source, max_member_size, max_total_size, max_members)
+    try:
+        members = []
+        for upload in reader:
+            members.append((upload.filename, upload.error or upload.source))
+            upload.close()
+        return members
+    finally:
+        reader.close()
+
+
+MEMBERS = {"a.pdf": b"%PDF-a", "docs/b.PDF": b"%PDF-b", "notes.txt": b"text", "__MACOSX/._a.pdf": b"x", ".DS_Store": b"x"}
+
+
+class TestArchiveReader:
+    """Test reading members from ZIP and TAR archives"""
+
+    @pytest.mark.parametrize("make", [make_zip, make_tar, lambda m: make_tar(m, "w")])
+    def test_members_in_order(self, make):
+        """Test that PDFs are read, other files rejected and archiver metadata skipped"""
+        members = read_all(make(MEMBERS))
+        assert members == [
+            ("a.pdf", b"%PDF-a"),
+            ("docs/b.PDF", b"%PDF-b"),
+            ("notes.txt", "Invalid file type. Only PDF files are allowed. Got: .txt")
+        ]
+
+    def test_large_member_spools_to_disk(self, tmp_path, monkeypatch):
+        """Test that members past the spool threshold are copied to a temp file"""
+        monkeypatch.setattr("app.config.settings.UPLOAD_SPOOL_THRESHOLD", 4)
+        monkeypatch.setattr("app.config.settings.UPLOAD_SPOOL_DIR", str(tmp_path))
+        archive = tmp_path / "packet.tar"
+        archive.write_bytes(make_tar({"a.pdf": b"%PDF-long"}, "w"))
+
+        reader = ArchiveReader(str(archive), 1024, 10 * 1024, 100)
+        upload = next(iter(reader))
+        assert upload.on_disk and Path(upload.source).read_bytes() == b"%PDF-long"
+        upload.close()
+        reader.close()
+
+    @pytest.mark.parametrize("make", [make_zip, make_tar])
+    def test_oversized_member_rejected(self, make):
+        """Test that a member over the size limit is reported without stopping the rest"""
+        members = read_all(make({"big.pdf": b"x" * 2000, "small.pdf": b"%PDF"}))
+        assert members[0] == ("big.pdf", "File big.pdf too large. Maximum size is 0MB")
+        assert members[1] == ("small.pdf", b"%PDF")
+
+    def test_zip_total_size_checked_up_front(self):
+        """Test that a ZIP declaring too much content is refused before reading"""
+        source = make_zip({f"{i}.pdf": b"x" * 1000 for i in range(11)})
+        with pytest.raises(ArchiveTooLargeError):
+            ArchiveReader(source, 1024, 10 * 1024, 100)
+
+    def test_tar_total_size_checked_while_reading(self):
+        """Test that a TAR stops once its members pass the total size limit"""
+        reader = ArchiveReader(make_tar({f"{i}.pdf": b"x" * 1000 for i in range(11)}), 1024, 10 * 1024, 100)
+        uploads = []
+        with pytest.raises(ArchiveTooLargeError):
+            for upload in reader:
+                uploads.append(upload)
+        assert len(uploads) == 10
+
+    def test_member_count_limit(self):
+        """Test that too many members are refused"""
+        with pytest.raises(ArchiveTooLargeError):
+            ArchiveReader(make_zip({f"{i}.pdf": b"x" for i in range(3)}), 1024, 10 * 1024, max_members=2)
+
+    def test_corrupt_member(self):
+        """Test that a member whose compressed data is damaged raises ArchiveError"""
+        source = corrupt_first_member(make_zip({"a.pdf": b"%PDF-" + bytes(range(256)) * 40, "b.pdf": b"%PDF-b"}))
+        with pytest.raises(ArchiveError):
+            read_all(source, max_member_size=100 * 1024, max_total_size=1024 * 1024)
+
+    def test_not_an_archive(self):
+        """Test that other content is rejected"""
+        with pytest.raises(ArchiveError):
+            ArchiveReader(b"%PDF-1.4 not an archive" * 50, 1024, 10 * 1024, 100)
+
+
+class TestArchiveEndpoint:
+    """Test the /check-archive endpoint"""
+
+    @pytest.fixture
+    def client(self):
+        return TestClient(app)
+
+    def test_streams_member_results(self, client):
+        """Test one result per member, tagged with its position in the archive"""
+        names = ["coi_acme_concrete.pdf", "crane_inspection_CRN812.pdf", "osha_card_albert_hernandez.pdf"]
+        members = {f"packet/{name}": (TEST_FILES_DIR / name).read_bytes() for name in names}
+        members["packet/readme.txt"] = b"hello"
+
+        response = client.post("/check-archive", content=make_zip(members), headers={"Content-Type": "application/zip"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        items = sorted((json.loads(line) for line in response.text.splitlines()), key=lambda item: item["index"])
+        assert [item["file"] for item in items] == list(members)
+        assert [item["doc_type"] for item in items] == ["insurance", "inspection", "training", "error"]
+
+    def test_tar_as_sse(self, client):
+        """Test a compressed TAR streamed as Server-Sent Events"""
+        content = (TEST_FILES_DIR / "coi_bolt_electric.pdf").read_bytes()
+        response = client.post("/check-archive?stream=sse", content=make_tar({"coi.pdf": content}))
+
+        events = response.text.strip().split("\n\n")
+        assert [event.split("\n")[0] for event in events] == ["event: result", "event: done"]
+
+    def test_total_limit_reported_in_stream(self, client, monkeypatch):
+        """Test that passing the total size mid-archive stops reading with a 413 item"""
+        monkeypatch.setattr("app.config.settings.ARCHIVE_MAX_TOTAL_SIZE", 2500)
+        response = client.post("/check-archive", content=make_tar({f"{i}.pdf": b"x" * 1000 for i in range(4)}))
+
+        items = [json.loads(line) for line in response.text.splitlines()]
+        errors = [item for item in items if "status" in item]
+        assert sorted(item["index"] for item in items if item not in errors) == [0, 1]
+        assert [item["status"] for item in errors] == [413]
+
+    def test_corrupt_member_reported_in_stream(self, client):
+        """Test that a damaged member ends the stream with a 422 item instead of breaking the response"""
+        content = (TEST_FILES_DIR / "coi_bolt_electric.pdf").read_bytes()
+        source = corrupt_first_member(make_zip({"a.pdf": content, "b.pdf": content}))
+
+        response = client.post("/check-archive", content=source)
+
+        assert response.status_code == 200
+        items = [json.loads(line) for line in response.text.splitlines()]
+        assert [item["status"] for item in items] == [422]
+        assert "corrupt" in items[0]["detail"]
+
+    def test_invalid_archive(self, client):
+        """Test that a body that is not an archive is rejected"""
+        response = client.post("/check-archive", content=b"not an archive" * 100)
+        assert response.status_code == 422
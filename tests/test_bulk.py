@@ -0,0 +1,79 @@
+"""
+Tests for vectorized re-validation of stored results
+"""
+
+import random
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.bulk import revalidate
+from app.main import app
+from app.models import as_utc
+from app.validator import evaluate
+
+
+AS_OF = datetime(2025, 6, 1, 12, 30)
+
+
+def random_documents(count, seed="bulk"):
+    """Field sets with missing fields, placeholder and boundary dates and mixed results"""
+    rng = random.Random(seed)
+    dates = ["", "garbage", "N/A", "05/02/2025", "06/01/2025", "2024-06-01", "03/04/2025"]
+    documents = []
+    for _ in range(count):
+        fields = {
+            name: rng.choice(["x", "x", ""])
+            for name in ("insured", "policy_number", "worker_name", "certificate_id", "inspector")
+            if rng.random() < 0.9
+        }
+        for name in ("expiry_date", "inspection_date"):
+            offset = timedelta(days=rng.randint(-800, 400))
+            fields[name] = rng.choice(dates + [(AS_OF + offset).strftime("%m/%d/%Y")])
+        fields["result"] = rng.choice(["PASS", "fail", "", "maybe"])
+        documents.append({"doc_type": rng.choice(["insurance", "inspection", "training", "other"]), "fields": fields})
+    return documents
+
+
+class TestRevalidate:
+    """Test that array verdicts match per-document evaluation"""
+
+    def test_matches_evaluate(self):
+        """Test verdicts and expiry flags against validator.evaluate"""
+        documents = random_documents(3000)
+        outcome = revalidate(documents, AS_OF)
+
+        valid_until = outcome["valid_until"].astype(object)
+        for i, document in enumerate(documents):
+            expected = evaluate(document["fields"], document["doc_type"], AS_OF)
+            assert outcome["verdicts"][i] == expected["verdict"], document
+            assert outcome["expired"][i] == bool(expected["expired_fields"]), document
+            assert valid_until[i] == expected["valid_until"], document
+
+    def test_as_of_moves_verdicts(self):
+        """Test that the same document passes before its grace period ends and fails after"""
+        documents = [{"doc_type": "insurance", "fields": {"insured": "A", "policy_number": "1", "expiry_date": "05/15/2025"}}]
+
+        assert revalidate(documents, datetime(2025, 6, 1))["verdicts"].tolist() == ["pass"]
+        assert revalidate(documents, datetime(2025, 7, 1))["verdicts"].tolist() == ["fail"]
+
+    def test_empty(self):
+        """Test an empty batch"""
+        assert revalidate([], AS_OF)["verdicts"].tolist() == []
+
+    def test_endpoint(self):
+        """Test the /revalidate API"""
+        client = TestClient(app)
+        response = client.post("/revalidate", json={
+            "as_of": "2025-06-01",
+            "documents": [
+                {"id": "a", "doc_type": "inspection", "fields": {"inspector": "J", "inspection_date": "2025-01-10", "result": "PASS"}},
+                {"id": "b", "doc_type": "inspection", "fields": {"inspector": "J", "inspection_date": "2024-01-10", "result": "PASS"}},
+            ]
+        })
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["counts"] == {"pass": 1, "fail": 1, "unknown": 0}
+        assert datetime.fromisoformat(body["results"][0]["valid_until"]) == as_utc(datetime(2026, 1, 10))
+        assert body["results"][1] == {"id": "b", "verdict": "fail", "expired": True, "valid_until": None}
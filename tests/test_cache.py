@@ -0,0 +1,75 @@
+"""
+Tests for the content-addressed result cache
+"""
+
+from app.cache import ResultCache, content_hash
+
+
+ENTRY = {
+    "text": "INSURED: ACME",
+    "doc_type": "insurance",
+    "fields": {"insured": "ACME"},
+    "confidences": {"insured": 0.9}
+}
+
+
+class TestResultCache:
+    """Test the memory and disk tiers of the result cache"""
+
+    def test_memory_hit_and_miss_counters(self):
+        """Test that lookups are counted as hits or misses"""
+        cache = ResultCache(version="v1")
+        key = content_hash(b"%PDF-1.4 sample")
+
+        assert cache.get(key) is None
+        cache.put(key, ENTRY)
+        assert cache.get(key)["fields"] == {"insured": "ACME"}
+
+        stats = cache.get_stats()
+        assert stats["misses"] == 1
+        assert stats["memory_hits"] == 1
+
+    def test_lru_eviction(self):
+        """Test that the memory tier evicts the least recently used entry"""
+        cache = ResultCache(version="v1", max_entries=2)
+        cache.put("a", ENTRY)
+        cache.put("b", ENTRY)
+        cache.get("a")
+        cache.put("c", ENTRY)
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        """Test that results persist in SQLite across cache instances"""
+        path = str(tmp_path / "results.db")
+        ResultCache(version="v1", path=path).put("a", ENTRY)
+
+        cache = ResultCache(version="v1", path=path)
+        assert cache.get("a")["doc_type"] == "insurance"
+        assert cache.get_stats()["disk_hits"] == 1
+
+    def test_version_change_invalidates_entries(self, tmp_path):
+        """Test that entries from an older pipeline version are dropped"""
+        path = str(tmp_path / "results.db")
+        ResultCache(version="v1", path=path).put("a", ENTRY)
+
+        cache = ResultCache(version="v2", path=path)
+        assert cache.get("a") is None
+
+    def test_set_version_drops_older_entries(self, tmp_path):
+        """Test that switching version (a rule pack reload) clears both tiers"""
+        path = str(tmp_path / "results.db")
+        cache = ResultCache(version="v1", path=path)
+        cache.put("a", ENTRY)
+        cache.set_version("v2")
+
+        assert cache.get("a") is None
+        assert ResultCache(version="v1", path=path).get("a") is None
+
+    def test_put_for_stale_version_is_skipped(self):
+        """Test that a result computed under older rules is not stored"""
+        cache = ResultCache(version="v2")
+        cache.put("a", ENTRY, version="v1")
+        assert cache.get("a") is None
@@ -0,0 +1,81 @@
+"""
+Tests for shape-dispatched date parsing
+"""
+
+import random
+from datetime import datetime
+
+import pytest
+
+from app.dates import DATE_PARSER, ParsedDate, parse_date, parse_date_details, parse_with_formats
+from app.validator import get_validation_details
+
+
+MONTHS = ["Jan", "January", "MAY", "may", "Sept", "Sep", "june", "Jun", "December", "Foo"]
+
+
+def random_date_string(rng):
+    """Three numbers or month names joined by date-like separators"""
+    def token():
+        return rng.choice([
+            str(rng.randint(0, 40)), f"{rng.randint(0, 40):02d}", str(rng.randint(1900, 2100)),
+            str(rng.randint(0, 99)), rng.choice(MONTHS), "00", "123"
+        ])
+    separator = rng.choice(["/", "-", " ", ", ", "  ", ",", "/ "])
+    text = token() + separator + token() + rng.choice([separator, separator, "-", "/", ", "]) + token()
+    if rng.random() < 0.1:
+        text = " " + text + rng.choice(["", " ", "x", " 12:00"])
+    return text
+
+
+class TestDateParser:
+    """Test that shape dispatch gives the same dates as trying every format"""
+
+    def test_matches_every_format_in_order(self):
+        """Test random date-like strings against the full format list"""
+        rng = random.Random("dates")
+        for _ in range(3000):
+            text = random_date_string(rng)
+            parsed = DATE_PARSER.parse(text)
+            reference = parse_with_formats(text.strip())
+            assert parsed.value == reference.value, text
+            if parsed.value is not None:
+                assert parsed.format == reference.format, text
+
+    @pytest.mark.parametrize("text, expected, fmt", [
+        ("12/31/2025", datetime(2025, 12, 31), "%m/%d/%Y"),
+        ("31/12/2025", datetime(2025, 12, 31), "%d/%m/%Y"),
+        ("2024-03-15", datetime(2024, 3, 15), "%Y-%m-%d"),
+        ("15-03-2024", datetime(2024, 3, 15), "%d-%m-%Y"),
+        ("13/02/70", datetime(1970, 2, 13), "%d/%m/%y"),
+        ("March 5, 2024", datetime(2024, 3, 5), "%B %d, %Y"),
+        ("5 Mar 2024", datetime(2024, 3, 5), "%d %b %Y"),
+        ("15-May-2030", datetime(2030, 5, 15), "%d-%b-%Y"),
+        ("Expires 31/12/2025", datetime(2025, 12, 31), "text:%d/%m/%Y"),
+    ])
+    def test_formats(self, text, expected, fmt):
+        """Test the date and the reported format for each shape"""
+        assert DATE_PARSER.parse(text) == ParsedDate(expected, fmt, False)
+
+    def test_ambiguous_day_month(self):
+        """Test that a string both day/month orders accept is flagged"""
+        parsed = DATE_PARSER.parse("03/04/2024")
+        assert parsed == ParsedDate(datetime(2024, 3, 4), "%m/%d/%Y", True)
+        assert not DATE_PARSER.parse("04/04/2024").ambiguous
+
+    @pytest.mark.parametrize("text", [None, "", "N/A", "tbd", "13/13/2024", "not a date"])
+    def test_unparsable(self, text):
+        """Test placeholders and invalid dates"""
+        assert parse_date(text) is None
+
+    def test_results_are_memoized(self):
+        """Test that repeated strings are served from the cache"""
+        parse_date_details.cache_clear()
+        parse_date("06/30/2026")
+        parse_date("06/30/2026")
+        assert parse_date_details.cache_info().hits == 1
+
+    def test_ambiguous_date_warning(self):
+        """Test that validation details show how an ambiguous date was read"""
+        details = get_validation_details({"expiry_date": "03/04/2099"}, "insurance")
+        assert "Ambiguous date expiry_date='03/04/2099' read as %m/%d/%Y" in details["warnings"]
@@ -0,0 +1,49 @@
+"""
+Tests for the document processing pool
+"""
+
+import asyncio
+import os
+import pytest
+
+from app.executor import PipelineExecutor, PipelineBusyError
+
+
+class TestPipelineExecutor:
+    """Test the process pool wrapper used by /check-docs"""
+
+    def test_runs_work_in_worker_process(self):
+        """Work submitted to the pool runs outside the calling process"""
+        async def scenario():
+            executor = PipelineExecutor(max_workers=1, max_queue=0)
+            try:
+                return await executor.run(os.getpid)
+            finally:
+                await executor.shutdown(timeout=10)
+
+        assert asyncio.run(scenario()) != os.getpid()
+
+    def test_rejects_work_when_queue_full(self):
+        """Submissions beyond workers + queue raise PipelineBusyError"""
+        async def scenario():
+            executor = PipelineExecutor(max_workers=1, max_queue=0)
+            try:
+                first = asyncio.create_task(executor.run(os.getpid))
+                await asyncio.sleep(0)
+                with pytest.raises(PipelineBusyError):
+                    await executor.run(os.getpid)
+                await first
+            finally:
+                await executor.shutdown(timeout=10)
+
+        asyncio.run(scenario())
+
+    def test_rejects_work_after_shutdown(self):
+        """A drained pool does not accept new documents"""
+        async def scenario():
+            executor = PipelineExecutor(max_workers=1, max_queue=0)
+            await executor.shutdown(timeout=10)
+            with pytest.raises(PipelineBusyError):
+                await executor.run(os.getpid)
+
+        asyncio.run(scenario())
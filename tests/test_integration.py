@@ -3,6 +3,7 @@ Integration tests for the Compliance Document Service
 Tests the most important features using real PDF files
 """
 
+import json
 import pytest
 from pathlib import Path
 from fastapi.testclient import TestClient
@@ -339,4 +340,135 @@ class TestValidationLogic:
             assert "confidence" in field_data
             confidence = field_data["confidence"]
             assert 0.0 <= confidence <= 1.0, \
-                f"Confidence score {confidence} for field '{field_name}' is out of range" 
\ No newline at end of file
+                f"Confidence score {confidence} for field '{field_name}' is out of range" 
+
+class TestConcurrentProcessing:
+    """Test that files in one request are processed independently"""
+    
+    @pytest.fixture
+    def client(self):
+        return TestClient(app)
+    
+    def test_results_keep_upload_order(self, client):
+        """Test that results come back in upload order with failures isolated"""
+        names = [
+            "scaffold_inspection_ST123.pdf",
+            "coi_acme_concrete.pdf",
+            "osha_card_albert_hernandez.pdf"
+        ]
+        files = [
+            ("files", (name, (TEST_FILES_DIR / name).read_bytes(), "application/pdf"))
+            for name in names
+        ]
+        files.insert(1, ("files", ("notes.txt", b"not a pdf", "text/plain")))
+        
+        response = client.post("/check-docs", files=files)
+        
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["file"] for r in results] == [names[0], "notes.txt", names[1], names[2]]
+        assert [r["doc_type"] for r in results] == ["inspection", "error", "insurance", "training"]
+
+
+class TestStreaming:
+    """Test streamed /check-docs responses"""
+    
+    @pytest.fixture
+    def client(self):
+        return TestClient(app)
+    
+    @pytest.fixture
+    def files(self):
+        names = ["coi_acme_concrete.pdf", "osha_card_albert_hernandez.pdf"]
+        files = [
+            ("files", (name, (TEST_FILES_DIR / name).read_bytes(), "application/pdf"))
+            for name in names
+        ]
+        files.append(("files", ("notes.txt", b"not a pdf", "text/plain")))
+        return files
+    
+    def test_ndjson_stream(self, client, files):
+        """Test one NDJSON line per file, each tagged with its upload index"""
+        response = client.post("/check-docs?stream=ndjson", files=files)
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert response.headers["cache-control"] == "no-store"
+        items = sorted((json.loads(line) for line in response.text.splitlines()), key=lambda item: item["index"])
+        assert [item["index"] for item in items] == [0, 1, 2]
+        assert [item["doc_type"] for item in items] == ["insurance", "training", "error"]
+        assert items[0]["file"] == "coi_acme_concrete.pdf"
+    
+    def test_sse_selected_by_accept_header(self, client, files):
+        """Test Server-Sent Events with a final done event"""
+        response = client.post("/check-docs", files=files, headers={"Accept": "text/event-stream"})
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+        assert [lines[0] for lines in events] == ["event: result"] * 3 + ["event: done"]
+        assert json.loads(events[-1][1][len("data: "):]) == {"count": 3}
+    
+    def test_unknown_stream_format(self, client, files):
+        """Test that an unsupported stream value is rejected"""
+        response = client.post("/check-docs?stream=xml", files=files)
+        assert response.status_code == 400
+
+
+class TestFieldProjection:
+    """Test the fields= and verdict_only projections of /check-docs"""
+    
+    @pytest.fixture
+    def client(self, monkeypatch):
+        # A private cache so hits and misses are not affected by other tests
+        from app import main
+        from app.cache import ResultCache
+        monkeypatch.setattr(main, "result_cache", ResultCache(version=main.compute_pipeline_version()))
+        return TestClient(app)
+    
+    @pytest.fixture
+    def coi(self):
+        name = "coi_acme_concrete.pdf"
+        return [("files", (name, (TEST_FILES_DIR / name).read_bytes(), "application/pdf"))]
+    
+    def test_fields_projection(self, client, coi):
+        """Test that only the requested fields are returned, with the verdict unchanged"""
+        full = client.post("/check-docs", files=coi).json()["results"][0]
+        response = client.post("/check-docs?fields=insurer,%20policy_number", files=coi)
+        
+        assert response.status_code == 200
+        projected = response.json()["results"][0]
+        assert set(projected["fields"]) == {"insurer", "policy_number"}
+        assert projected["fields"]["insurer"] == full["fields"]["insurer"]
+        assert (projected["doc_type"], projected["verdict"]) == (full["doc_type"], full["verdict"])
+    
+    def test_verdict_only(self, client, coi):
+        """Test that verdict_only returns no fields but still a verdict"""
+        response = client.post("/check-docs?verdict_only=true", files=coi)
+        
+        assert response.status_code == 200
+        result = response.json()["results"][0]
+        assert result["fields"] == {}
+        assert result["doc_type"] == "insurance"
+        assert result["verdict"] in ["pass", "fail"]
+    
+    def test_unknown_field(self, client, coi):
+        """Test that an unknown field name is rejected before processing"""
+        response = client.post("/check-docs?fields=insurer,shoe_size", files=coi)
+        
+        assert response.status_code == 400
+        assert "shoe_size" in response.json()["detail"]
+    
+    def test_cache_hit_served_under_projection(self, client, coi):
+        """Test that a cached full result answers a projected request"""
+        from app import main
+        full = client.post("/check-docs", files=coi).json()["results"][0]
+        stores = main.result_cache.get_stats()["stores"]
+        
+        projected = client.post("/check-docs?fields=insurer", files=coi).json()["results"][0]
+        
+        stats = main.result_cache.get_stats()
+        assert stats["memory_hits"] == 1
+        assert stats["stores"] == stores
+        assert projected["fields"] == {"insurer": full["fields"]["insurer"]}
+        assert projected["verdict"] == full["verdict"]
@@ -0,0 +1,201 @@
+"""
+Tests for background jobs and their SQLite store
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.executor import PipelineBusyError
+from app.jobs import JobManager, JobStore
+from app.main import app, process_upload
+from app.models import DocumentResult, as_utc
+from app.uploads import SpooledUpload
+
+
+AS_OF = datetime(2025, 6, 1, 12, 30)
+
+
+def uploads(tmp_path, *contents):
+    """Received uploads, the odd ones spooled to disk"""
+    files = []
+    for i, content in enumerate(contents):
+        upload = SpooledUpload(f"doc{i}.pdf", spool_threshold=0 if i % 2 else 1024, spool_dir=str(tmp_path))
+        upload.write(content)
+        upload.finish()
+        files.append(upload)
+    return files
+
+
+async def read_content(file, slots, as_of, fields):
+    """Processing stand-in that reports the stored content"""
+    async with slots:
+        with open(file.source, "rb") as f:
+            content = f.read().decode()
+        await asyncio.sleep(0.01 * (3 - file.index))  # Finish out of order
+        return DocumentResult(file=file.filename, doc_type=content, fields={}, verdict="pass", valid_until=as_of)
+
+
+async def run_until_done(manager, job_id, timeout=5):
+    """Start a manager and wait for a job to finish"""
+    await manager.start()
+    try:
+        deadline = time.monotonic() + timeout
+        while (await asyncio.to_thread(manager.store.get, job_id))["status"] != "done":
+            assert time.monotonic() < deadline, "job did not finish"
+            await asyncio.sleep(0.01)
+    finally:
+        await manager.stop()
+
+
+class TestJobStore:
+    """Test job records and stored files"""
+
+    def test_create_saves_files_and_survives_reopening(self, tmp_path):
+        """Test that a new store instance sees the job and its pending files"""
+        store = JobStore(str(tmp_path / "jobs"))
+        files = uploads(tmp_path, b"a", b"b")
+        files.append(SpooledUpload("notes.txt", spool_threshold=1024))
+        files[-1].reject("Invalid file type")
+        job_id = store.create(files, AS_OF, frozenset({"insurer"}))
+        store.close()
+
+        store = JobStore(str(tmp_path / "jobs"))
+        job = store.get(job_id)
+        assert job["status"] == "queued"
+        assert job["as_of"] == AS_OF
+        assert job["fields"] == {"insurer"}
+        assert (job["total"], job["completed"], job["failed"]) == (3, 0, 0)
+
+        pending = store.pending_files(job_id)
+        assert [f.filename for f in pending] == ["doc0.pdf", "doc1.pdf", "notes.txt"]
+        assert [open(f.source, "rb").read() for f in pending[:2]] == [b"a", b"b"]
+        assert pending[2].error == "Invalid file type"
+        assert store.unfinished() == [job_id]
+
+    def test_results_and_progress(self, tmp_path):
+        """Test that saved results count as progress and leave the pending set"""
+        store = JobStore(str(tmp_path))
+        job_id = store.create(uploads(tmp_path, b"a", b"b", b"c"), AS_OF, None)
+
+        store.save_result(job_id, 2, {"file": "doc2.pdf"}, failed=False)
+        store.save_result(job_id, 0, {"file": "doc0.pdf"}, failed=True)
+
+        job = store.get(job_id)
+        assert (job["completed"], job["failed"]) == (2, 1)
+        assert store.results(job_id) == [{"file": "doc0.pdf"}, {"file": "doc2.pdf"}]
+        assert [f.index for f in store.pending_files(job_id)] == [1]
+
+    def test_purge(self, tmp_path):
+        """Test that only finished jobs past retention are deleted"""
+        store = JobStore(str(tmp_path))
+        done = store.create(uploads(tmp_path, b"a"), AS_OF, None)
+        queued = store.create(uploads(tmp_path, b"b"), AS_OF, None)
+        store.set_status(done, "done")
+
+        assert store.purge(time.time() + 1) == 1
+        assert store.get(done) is None and not os.path.exists(store.job_dir(done))
+        assert store.get(queued) is not None
+        assert store.get("missing") is None
+
+
+class TestJobManager:
+    """Test background processing of stored jobs"""
+
+    def test_runs_job(self, tmp_path):
+        """Test that every file is processed and the job directory is removed"""
+        store = JobStore(str(tmp_path))
+        job_id = store.create(uploads(tmp_path, b"one", b"two", b"three"), AS_OF, None)
+
+        asyncio.run(run_until_done(JobManager(store, read_content, workers=2, files_per_job=2), job_id))
+        results = store.results(job_id)
+        assert [r["doc_type"] for r in results] == ["one", "two", "three"]
+        assert datetime.fromisoformat(results[0]["valid_until"]) == as_utc(AS_OF)
+        assert not os.path.exists(store.job_dir(job_id))
+
+    def test_resumes_unfinished_job(self, tmp_path):
+        """Test that a restarted manager only processes files without a result"""
+        store = JobStore(str(tmp_path))
+        job_id = store.create(uploads(tmp_path, b"one", b"two"), AS_OF, None)
+        store.set_status(job_id, "running")
+        store.save_result(job_id, 0, {"file": "doc0.pdf", "doc_type": "earlier run"}, failed=False)
+        processed = []
+
+        async def record(file, slots, as_of, fields):
+            processed.append(file.filename)
+            return await read_content(file, slots, as_of, fields)
+
+        asyncio.run(run_until_done(JobManager(store, record), job_id))
+        assert processed == ["doc1.pdf"]
+        assert [r["doc_type"] for r in store.results(job_id)] == ["earlier run", "two"]
+
+    def test_retries_when_busy(self, tmp_path, monkeypatch):
+        """Test that a full processing pool delays a file instead of failing it"""
+        monkeypatch.setattr("app.jobs.BUSY_RETRY_SECONDS", 0.01)
+        store = JobStore(str(tmp_path))
+        job_id = store.create(uploads(tmp_path, b"one"), AS_OF, None)
+        attempts = []
+
+        async def busy_once(file, slots, as_of, fields):
+            attempts.append(file.index)
+            if len(attempts) == 1:
+                raise PipelineBusyError("Processing queue is full")
+            return await read_content(file, slots, as_of, fields)
+
+        asyncio.run(run_until_done(JobManager(store, busy_once), job_id))
+        assert attempts == [0, 0]
+        assert store.get(job_id)["completed"] == 1
+
+
+class TestJobEndpoints:
+    """Test the jobs API"""
+
+    def test_submit_poll_and_fetch_results(self, tmp_path, monkeypatch):
+        """Test a job of rejected files from submission to final results"""
+        monkeypatch.setattr("app.config.settings.JOBS_DIR", str(tmp_path / "jobs"))
+
+        with TestClient(app) as client:
+            files = [("files", (f"doc{i}.txt", b"text", "text/plain")) for i in range(3)]
+            response = client.post("/jobs", files=files)
+            assert response.status_code == 202
+            job = response.json()
+            assert job["total"] == 3
+
+            deadline = time.monotonic() + 5
+            while (status := client.get(job["status_url"]).json())["status"] != "done":
+                assert time.monotonic() < deadline, "job did not finish"
+                time.sleep(0.01)
+
+            assert (status["completed"], status["failed"]) == (3, 3)
+            results = client.get(job["results_url"]).json()["results"]
+            assert [r["file"] for r in results] == ["doc0.txt", "doc1.txt", "doc2.txt"]
+            assert all(r["doc_type"] == "error" for r in results)
+
+            assert client.get("/jobs/missing").status_code == 404
+
+    def test_results_before_done(self, tmp_path, monkeypatch):
+        """Test that final results are refused while a job is still queued"""
+        store = JobStore(str(tmp_path))
+        monkeypatch.setattr(main, "job_manager", JobManager(store, process_upload))
+        job_id = store.create(uploads(tmp_path, b"a"), AS_OF, None)
+
+        response = TestClient(app).get(f"/jobs/{job_id}/results")
+        assert response.status_code == 409
+
+    def test_no_job_store_outside_lifespan(self, tmp_path, monkeypatch):
+        """Test that the job store is only opened while the app runs"""
+        jobs_dir = tmp_path / "jobs"
+        monkeypatch.setattr("app.config.settings.JOBS_DIR", str(jobs_dir))
+
+        client = TestClient(app)
+        assert client.get("/jobs/missing").status_code == 503
+        assert not jobs_dir.exists()
+
+        with client:
+            assert client.get("/jobs/missing").status_code == 404
+            assert (jobs_dir / "jobs.db").exists()
+        assert main.job_manager is None
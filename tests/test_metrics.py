@@ -0,0 +1,161 @@
+"""
+Tests for stage timings and Prometheus metrics
+"""
+
+import json
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.main import app
+from app.metrics import record_timings
+from app.pipeline import process_document
+from app.timings import NULL_TIMER, StageTimer, server_timing, summarize_timings
+
+
+def sample(name, **labels):
+    """Current value of a metric sample (0 when it was never recorded)"""
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestStageTimer:
+    """Test collection of stage durations"""
+
+    def test_runs_and_counts(self):
+        """Test that each timed block is one run and counts accumulate"""
+        timer = StageTimer()
+        for _ in range(2):
+            with timer.time("ocr"):
+                pass
+        timer.count("ocr_fallback_pages", 3)
+        timer.count("ocr_fallback_pages")
+
+        assert len(timer.stages["ocr"]) == 2
+        assert timer.to_dict()["counts"] == {"ocr_fallback_pages": 4}
+
+    def test_null_timer_records_nothing(self):
+        """Test the default timer used when no timings are wanted"""
+        with NULL_TIMER.time("ocr"):
+            NULL_TIMER.count("ocr_fallback_pages")
+        timings = NULL_TIMER.to_dict()
+        assert (timings["stages"], timings["counts"]) == ({}, {})
+
+    def test_pipeline_returns_timings(self, test_files_dir):
+        """Test that a processed document reports its extraction, classification, parsing and validation time"""
+        processed = process_document((test_files_dir / "coi_acme_concrete.pdf").read_bytes())
+        assert {"pdfplumber", "classify", "parse", "validate"} <= set(processed["timings"]["stages"])
+
+
+class TestMetrics:
+    """Test recording and exporting metrics"""
+
+    def test_record_timings(self):
+        """Test that page stages are observed per run and document stages once, summed"""
+        before = {stage: sample("compliance_stage_seconds_count", stage=stage) for stage in ("ocr", "parse")}
+        parse_sum = sample("compliance_stage_seconds_sum", stage="parse")
+        fallbacks = sample("compliance_ocr_fallback_pages_total")
+
+        record_timings({
+            "stages": {"ocr": [0.5, 0.25], "parse": [0.001, 0.002], "unknown_stage": [1.0]},
+            "counts": {"ocr_fallback_pages": 2}
+        })
+
+        assert sample("compliance_stage_seconds_count", stage="ocr") == before["ocr"] + 2
+        assert sample("compliance_stage_seconds_count", stage="parse") == before["parse"] + 1
+        assert abs(sample("compliance_stage_seconds_sum", stage="parse") - parse_sum - 0.003) < 1e-9
+        assert sample("compliance_ocr_fallback_pages_total") == fallbacks + 2
+
+    def test_check_docs_updates_metrics(self, test_files_dir):
+        """Test verdict, page, byte and error counters after a request"""
+        client = TestClient(app)
+        verdicts = sample("compliance_verdicts_total", doc_type="insurance", verdict="fail") + \
+            sample("compliance_verdicts_total", doc_type="insurance", verdict="pass")
+        errors = sample("compliance_errors_total", reason="rejected")
+        ingested = sample("compliance_ingested_bytes_total")
+
+        files = [
+            ("files", ("coi.pdf", (test_files_dir / "coi_bolt_electric.pdf").read_bytes(), "application/pdf")),
+            ("files", ("notes.txt", b"text", "text/plain"))
+        ]
+        assert client.post("/check-docs", files=files).status_code == 200
+
+        assert sample("compliance_verdicts_total", doc_type="insurance", verdict="fail") + \
+            sample("compliance_verdicts_total", doc_type="insurance", verdict="pass") == verdicts + 1
+        assert sample("compliance_errors_total", reason="rejected") == errors + 1
+        assert sample("compliance_ingested_bytes_total") > ingested
+        assert sample("compliance_files_in_flight") == 0
+
+    def test_metrics_endpoint(self):
+        """Test the Prometheus text exposition"""
+        response = TestClient(app).get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        for name in ("compliance_stage_seconds_bucket", "compliance_pipeline_pending", "compliance_verdicts_total"):
+            assert name in response.text
+
+
+class TestRequestTimings:
+    """Test the Server-Timing header and the per-file timings block"""
+
+    def test_summarize_timings(self):
+        """Test stage milliseconds, with OCR pages and DPI from the result metadata"""
+        timings = {
+            "stages": {
+                "queue": [0.02], "pdfplumber": [0.01, 0.005], "render": [0.1, 0.1], "ocr": [0.3, 0.2],
+                "classify": [0.001], "parse": [0.002], "validate": [0.0004]
+            },
+            "counts": {"ocr_fallback_pages": 2}
+        }
+        metadata = {"ocr_pages": [1, 3], "page_dpi": {1: 200, 3: 300}}
+
+        block = summarize_timings(timings, metadata, queued=0.03, total=1.0)
+
+        assert block == {
+            "queue_ms": 50.0,
+            "extraction_ms": 15.0,
+            "ocr": {"ms": 700.0, "pages": 2, "dpi": [200, 300]},
+            "classification_ms": 1.0,
+            "parsing_ms": 2.0,
+            "validation_ms": 0.4,
+            "total_ms": 1000.0,
+            "cached": False
+        }
+        assert summarize_timings({"stages": {}, "cached": True}, {}, 0, 0)["ocr"] is None
+
+    def test_server_timing_format(self):
+        """Test the header syntax"""
+        assert server_timing([("upload", 1.25, None), ("ocr", 12, "3 pages")]) == \
+            'upload;dur=1.2, ocr;dur=12.0;desc="3 pages"'
+
+    def test_check_docs_header_without_block(self, test_files_dir):
+        """Test that every response times its stages but results stay small by default"""
+        content = (test_files_dir / "coi_acme_concrete.pdf").read_bytes()
+        response = TestClient(app).post("/check-docs", files=[("files", ("coi.pdf", content, "application/pdf"))])
+
+        names = [entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")]
+        assert names == ["upload", "queue", "extract", "ocr", "classify", "parse", "validate", "total"]
+        assert "timings" not in response.json()["results"][0]
+
+    def test_check_docs_timings_block(self, test_files_dir):
+        """Test the per-file block when asked for, and none for rejected files"""
+        files = [
+            ("files", ("coi.pdf", (test_files_dir / "coi_bolt_electric.pdf").read_bytes(), "application/pdf")),
+            ("files", ("notes.txt", b"text", "text/plain"))
+        ]
+        results = TestClient(app).post("/check-docs?timings=true", files=files).json()["results"]
+
+        block = results[0]["timings"]
+        assert block["total_ms"] >= block["validation_ms"] > 0
+        assert block["cached"] or block["extraction_ms"] > 0
+        assert results[1]["timings"] is None
+
+    def test_streamed_timings(self, test_files_dir):
+        """Test the block in streamed results and the upload timing in the header"""
+        content = (test_files_dir / "osha_card_nadia_hussain.pdf").read_bytes()
+        response = TestClient(app).post(
+            "/check-docs?stream=ndjson&timings=true", files=[("files", ("card.pdf", content, "application/pdf"))]
+        )
+
+        assert response.headers["server-timing"].startswith("upload;dur=")
+        assert "queue_ms" in json.loads(response.text.splitlines()[0])["timings"]
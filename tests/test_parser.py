@@ -0,0 +1,169 @@
+"""
+Tests for document classification and field extraction
+"""
+
+import random
+
+import pytest
+
+from app.parser import (
+    KeywordClassifier, analyze_document, compiled_rules, extract_field_with_patterns, parse_document_type, parse_fields
+)
+from app.rules import get_rules
+
+
+PATTERNS = {name: doc.fields for name, doc in get_rules().doc_types.items()}
+
+# Label lines (with overlaps such as "INSURANCE COMPANY:" containing "COMPANY:")
+# that the fuzz test shuffles into documents
+SAMPLE_LINES = [
+    "INSURED: ABC Construction LLC", "NAMED INSURED: Other Co", "INSURANCE COMPANY: State Farm",
+    "COMPANY: Fallback Inc", "POLICY #: GL-1", "POLICY NUMBER: GL-2024-001", "CARRIER: Allstate",
+    "EFFECTIVE DATE: 01/01/2024", "FROM: 2024-02-01", "EXPIRATION: 12/31/2025", "TO: someone",
+    "EXPIRY DATE:   ", "VALID UNTIL: 2026-01-01", "INSPECTOR: John Smith", "INSPECTED BY: Jane Doe",
+    "INSPECTION DATE: 03/15/2024", "CRANE ID: CR-001", "SERIAL NUMBER: SN-9", "EQUIPMENT NUMBER: EQ-7",
+    "RESULT: PASS", "INSPECTION RESULT: FAIL", "CONDITION: pass", "WORKER NAME: Albert",
+    "EMPLOYEE NAME: Bob", "NAME: Carol", "TRAINEE: Dan", "CERTIFICATE ID: OSHA-1", "ID NUMBER: 42",
+    "HOURS: 30", "TRAINING HOURS: 10", "ISSUE DATE: 01/03/2024", "ISSUED BY: Safety Institute",
+    "ORGANIZATION: OSHA", "Lorem ipsum dolor sit amet", "policy coverage premium", "",
+    "insured: lower case", "\u0131NSURED: dotless i", "\u212aEY: kelvin", "12:30 shift: early",
+    "INSPECTED\nBY: split label"
+]
+
+
+def reference_fields(text, patterns):
+    """Per-field, per-pattern extraction as parse_fields used to do it"""
+    fields, confidence = {}, {}
+    for field_name, field_patterns in patterns.items():
+        value, conf = extract_field_with_patterns(text, field_patterns)
+        if value is not None:
+            fields[field_name] = value
+            confidence[field_name] = conf
+    return fields, confidence
+
+
+class TestFieldExtractor:
+    """Test that the single-pass extractor matches per-pattern extraction"""
+
+    @pytest.mark.parametrize("doc_type", sorted(PATTERNS))
+    def test_matches_reference_on_shuffled_documents(self, doc_type):
+        """Test random label mixes, including overlapping and empty labels"""
+        rng = random.Random(doc_type)
+        for _ in range(300):
+            lines = rng.choices(SAMPLE_LINES, k=rng.randint(0, 25))
+            text = rng.choice(["\n", "\r\n", " "]).join(lines)
+            assert parse_fields(text, doc_type) == reference_fields(text, PATTERNS[doc_type]), text
+
+    def test_length_changing_case_fold_falls_back(self):
+        """Test text whose upper-case form is longer (German sharp s)"""
+        text = "Stra\u00dfe\nCOMPANY: Fallback Inc\nINSURED: ABC"
+        assert parse_fields(text, "insurance") == reference_fields(text, PATTERNS["insurance"])
+
+    def test_first_pattern_wins_over_earlier_text(self):
+        """Test that a higher-priority pattern later in the text beats an earlier lower one"""
+        text = "COMPANY: Fallback Inc\nINSURED: ABC Construction LLC"
+        fields, _ = compiled_rules().extractors["insurance"].extract(text)
+        assert fields["insured"] == "ABC Construction LLC"
+
+    def test_overlapping_label_contributes_to_both_fields(self):
+        """Test that "INSURANCE COMPANY:" also satisfies the insured "COMPANY:" pattern"""
+        fields, _ = compiled_rules().extractors["insurance"].extract("INSURANCE COMPANY: State Farm")
+        assert fields == {"insured": "State Farm", "insurer": "State Farm"}
+
+    def test_label_index(self):
+        """Test that labels are indexed by normalized words, including suffix labels"""
+        text = "Insurance   Company: State Farm\nequipment id: EQ-1\nSURNAME: Doe"
+        index = compiled_rules().extractors["insurance"].index_labels(text.upper())
+
+        assert index[("INSURANCE", "COMPANY")] == [0]
+        assert index[("COMPANY",)] == [text.index("Company")]
+        assert ("EQUIPMENT", "ID") not in index  # Not an insurance label
+        assert compiled_rules().extractors["inspection"].index_labels(text.upper())[("EQUIPMENT", "ID")] == [text.index("equipment")]
+
+    def test_unknown_doc_type(self):
+        """Test that unknown types extract nothing"""
+        assert parse_fields("INSURED: ABC", "unknown") == ({}, {})
+
+
+KEYWORDS = {name: list(doc.keywords) for name, doc in get_rules().doc_types.items()}
+
+
+class TestKeywordClassifier:
+    """Test single-scan document type scoring"""
+
+    def test_scores_match_substring_search(self):
+        """Test that the automaton counts each keyword present once, overlaps included"""
+        text = "General Liability Insurance policy; policy INSURED by insurer. OSHA safety training card"
+        expected = {
+            doc_type: sum(keyword in text.lower() for keyword in keywords)
+            for doc_type, keywords in KEYWORDS.items()
+        }
+        assert KeywordClassifier(KEYWORDS).score(text) == expected
+
+    def test_substring_fallback(self, monkeypatch):
+        """Test scoring without the pyahocorasick package"""
+        import builtins
+        real_import = builtins.__import__
+
+        def no_ahocorasick(name, *args, **kwargs):
+            if name == "ahocorasick":
+                raise ImportError(name)
+            return real_import(name, *args, **kwargs)
+
+        monkeypatch.setattr(builtins, "__import__", no_ahocorasick)
+        classifier = KeywordClassifier(KEYWORDS)
+
+        assert classifier._automaton is None
+        assert classifier.score("crane inspection by qualified person")["inspection"] == 2
+
+    def test_weights(self):
+        """Test that weighted keywords can outvote several unweighted ones"""
+        classifier = KeywordClassifier(KEYWORDS, weights={"osha": 5})
+        scores = classifier.score("OSHA card with policy coverage and premium")
+        assert scores == {"insurance": 3, "inspection": 0, "training": 5}
+
+    def test_shared_keyword_scores_every_type(self):
+        """Test a keyword configured for two types"""
+        classifier = KeywordClassifier({"a": ["safety"], "b": ["safety", "card"]})
+        assert classifier.score("Safety Card") == {"a": 1, "b": 2}
+
+    def test_ties_and_unknown(self):
+        """Test that ties go to the first configured type and no keywords is unknown"""
+        assert parse_document_type("policy and inspector") == "insurance"
+        assert parse_document_type("nothing relevant here") == "unknown"
+
+
+class TestDocumentAnalyzer:
+    """Test classifying a document and extracting its type's fields"""
+
+    def test_matches_separate_classify_and_parse(self):
+        """Test that the analyzer gives the same type and fields as the two-step path"""
+        rng = random.Random("analyzer")
+        for _ in range(300):
+            text = "\n".join(rng.choices(SAMPLE_LINES, k=rng.randint(0, 25)))
+            analysis = analyze_document(text)
+            doc_type = parse_document_type(text)
+            assert analysis["doc_type"] == doc_type
+            assert (analysis["fields"], analysis["confidences"]) == parse_fields(text, doc_type)
+
+    def test_field_projection(self):
+        """Test that a projection parses the requested fields plus validation fields, unchanged"""
+        rng = random.Random("projection")
+        for _ in range(100):
+            text = "\n".join(rng.choices(SAMPLE_LINES, k=rng.randint(0, 25)))
+            full = analyze_document(text)
+            projected = analyze_document(text, {"insurer"})
+            rules = get_rules().get(full["doc_type"])
+            kept = {"insurer"} | set(rules.validation_fields if rules else ())
+
+            assert projected["doc_type"] == full["doc_type"]
+            assert projected["fields"] == {k: v for k, v in full["fields"].items() if k in kept}
+
+    def test_runner_up_classifications(self):
+        """Test that every type is ranked by score"""
+        text = "Certificate of Insurance\nINSURED: ABC\nPOLICY NUMBER: 1\nInspector sign-off\nINSPECTOR: John"
+        ranked = analyze_document(text)["classifications"]
+
+        assert [c["doc_type"] for c in ranked] == ["insurance", "inspection", "training"]
+        assert ranked[0]["score"] > ranked[1]["score"] > 0
+        assert set(ranked[1]) == {"doc_type", "score"}
@@ -0,0 +1,368 @@
+"""
+Tests for PDF text extraction and OCR
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).parent.parent
+
+
+@pytest.fixture(autouse=True)
+def pytesseract_backend(monkeypatch):
+    """Route OCR through pytesseract so tests can fake tesseract even when tesserocr is installed"""
+    import app.pdf_utils as pdf_utils
+    monkeypatch.setattr(pdf_utils, "_ocr_backend", pdf_utils.PytesseractBackend())
+
+# Renders a synthetic scanned packet with full-size page bitmaps and reports how
+# much the process high-water mark grew while OCR ran. Poppler and tesseract are
+# replaced so the test measures only how many bitmaps are alive at once.
+PEAK_RSS_SCRIPT = """
+import io
+import resource
+from PIL import Image
+import app.pdf_utils as pdf_utils
+
+PAGES = 24
+thumbs = [Image.new("L", (85, 110), "white") for _ in range(PAGES)]
+buffer = io.BytesIO()
+thumbs[0].save(buffer, format="PDF", save_all=True, append_images=thumbs[1:])
+pdf_bytes = buffer.getvalue()
+
+def render(pdf_bytes, dpi, first_page, last_page):
+    # US letter at 300 DPI, ~34MB per RGB page
+    return [Image.new("RGB", (2550, 3300), "white") for _ in range(first_page, last_page + 1)]
+
+pdf_utils.convert_from_bytes = render
+pdf_utils.pytesseract.image_to_string = lambda img, **kwargs: "page text"
+
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+text = pdf_utils.extract_text_with_ocr(pdf_bytes)
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+assert text.count("page text") == PAGES, text
+print((after - before) // 1024)
+"""
+
+
+class TestOCRMemory:
+    """Test that OCR memory use does not grow with the page count"""
+
+    @pytest.mark.slow
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="ru_maxrss is reported in KB on Linux only")
+    def test_peak_rss_is_flat_in_page_count(self):
+        """Test that a 24-page scan only holds one bitmap per OCR worker"""
+        result = subprocess.run(
+            [sys.executable, "-c", PEAK_RSS_SCRIPT],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            env={"OCR_WORKERS": "2", "OCR_FIRST_PASS_DPI": "0", "OCR_BACKEND": "pytesseract", "PATH": ""}
+        )
+        assert result.returncode == 0, result.stderr
+
+        peak_growth_mb = int(result.stdout.strip().splitlines()[-1])
+        # Holding every page would need ~800MB; two workers hold ~68MB
+        assert peak_growth_mb < 150
+
+
+def build_pdf(page_texts):
+    """Build a minimal PDF with one page per entry; empty strings give blank pages without text"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in below
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for text in page_texts:
+        lines = " T* ".join(f"({line}) Tj" for line in text.splitlines())
+        stream = f"BT /F1 12 Tf 14 TL 72 720 Td {lines} ET".encode() if text else b""
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects))
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return pdf
+
+
+class TestHybridExtraction:
+    """Test per-page choice between native text and OCR"""
+
+    def test_only_pages_without_text_are_ocrd(self, monkeypatch):
+        """Test that a typed cover page keeps its text while a scanned page is OCR'd"""
+        from PIL import Image
+        import app.pdf_utils as pdf_utils
+
+        cover = "CERTIFICATE OF INSURANCE - INSURED: ACME Construction LLC - POLICY NUMBER: GL-1"
+        pdf_bytes = build_pdf([cover, ""])
+        rendered = []
+
+        def render(pdf_bytes, dpi, first_page, last_page):
+            rendered.extend(range(first_page, last_page + 1))
+            return [Image.new("L", (10, 10)) for _ in range(first_page, last_page + 1)]
+
+        monkeypatch.setattr(pdf_utils.settings, "OCR_FIRST_PASS_DPI", 0)
+        monkeypatch.setattr(pdf_utils, "convert_from_bytes", render)
+        monkeypatch.setattr(pdf_utils.pytesseract, "image_to_string", lambda img, **kwargs: "EXPIRY DATE: 12/31/2030")
+
+        content = pdf_utils.extract_pdf_content(pdf_bytes)
+
+        assert rendered == [2]
+        assert content["pages"] == 2
+        assert content["ocr_pages"] == [2]
+        assert "INSURED: ACME Construction LLC" in content["text"]
+        assert "EXPIRY DATE: 12/31/2030" in content["text"]
+
+    def test_stage_timings(self, monkeypatch):
+        """Test that the timer gets per-page render and OCR runs and the fallback count"""
+        from PIL import Image
+        import app.pdf_utils as pdf_utils
+        from app.timings import StageTimer
+
+        monkeypatch.setattr(pdf_utils.settings, "OCR_FIRST_PASS_DPI", 0)
+        monkeypatch.setattr(pdf_utils, "convert_from_bytes", lambda *args, **kwargs: [Image.new("L", (10, 10))])
+        monkeypatch.setattr(pdf_utils.pytesseract, "image_to_string", lambda img, **kwargs: "EXPIRY DATE: 12/31/2030")
+        timer = StageTimer()
+
+        pdf_utils.extract_pdf_content(build_pdf(["", "", "x" * 80]), timer=timer)
+
+        assert len(timer.stages["render"]) == len(timer.stages["ocr"]) == 2
+        assert timer.stages["pdfplumber"]
+        assert timer.counts == {"ocr_fallback_pages": 2}
+
+    def test_text_pdf_skips_ocr(self, test_files_dir):
+        """Test that a native text PDF reports no OCR'd pages"""
+        from app.pdf_utils import extract_pdf_content
+
+        content = extract_pdf_content((test_files_dir / "coi_acme_concrete.pdf").read_bytes())
+
+        assert content["ocr_pages"] == []
+        assert "INSURED" in content["text"].upper()
+
+
+class TestParallelOCR:
+    """Test OCR of several pages at once"""
+
+    def test_pages_reassembled_in_order(self, monkeypatch):
+        """Test that pages finishing out of order are returned in page order"""
+        import time
+        from PIL import Image
+        import app.pdf_utils as pdf_utils
+
+        def render(pdf_bytes, dpi, first_page, last_page):
+            img = Image.new("L", (10, 10))
+            img.info["page"] = first_page
+            return [img]
+
+        def recognize(img, **kwargs):
+            # Later pages finish first
+            time.sleep(0.01 * (6 - img.info["page"]))
+            return f"PAGE {img.info['page']}"
+
+        monkeypatch.setattr(pdf_utils.settings, "OCR_WORKERS", 4)
+        monkeypatch.setattr(pdf_utils.settings, "OCR_FIRST_PASS_DPI", 0)
+        monkeypatch.setattr(pdf_utils, "convert_from_bytes", render)
+        monkeypatch.setattr(pdf_utils.pytesseract, "image_to_string", recognize)
+
+        texts = pdf_utils.ocr_pages(b"%PDF-1.4", [1, 2, 3, 4, 5])
+
+        assert list(texts) == [1, 2, 3, 4, 5]
+        assert texts[5]["text"] == "PAGE 5"
+
+    def test_ocr_threads_outlive_batches(self, monkeypatch):
+        """Test that every batch runs on the same OCR threads, so per-thread engines are loaded once"""
+        import threading
+        from PIL import Image
+        import app.pdf_utils as pdf_utils
+
+        threads = set()
+
+        def recognize(img, **kwargs):
+            threads.add(threading.current_thread())
+            return "text"
+
+        monkeypatch.setattr(pdf_utils.settings, "OCR_WORKERS", 2)
+        monkeypatch.setattr(pdf_utils, "convert_from_bytes", lambda *args, **kwargs: [Image.new("L", (10, 10))])
+        monkeypatch.setattr(pdf_utils.pytesseract, "image_to_string", recognize)
+
+        for _ in range(5):
+            pdf_utils.ocr_page_batch(b"%PDF-1.4", [1, 2, 3, 4], dpi=200)
+
+        assert len(threads) <= 2
+        assert pdf_utils.get_ocr_pool() is pdf_utils.get_ocr_pool()
+
+
+def fake_ocr_data(words, conf):
+    """Build an image_to_data style dictionary with one line of words"""
+    return {
+        "text": words,
+        "conf": [conf] * len(words),
+        "block_num": [1] * len(words),
+        "par_num": [1] * len(words),
+        "line_num": [1] * len(words),
+    }
+
+
+class TestAdaptiveOCR:
+    """Test low-resolution first pass with selective escalation"""
+
+    @pytest.fixture
+    def scanner(self, monkeypatch):
+        """Fake renderer/tesseract where page 2 is only legible at full resolution"""
+        from PIL import Image
+        import app.pdf_utils as pdf_utils
+
+        calls = []
+
+        def render(pdf_bytes, dpi, first_page, last_page):
+            calls.append((first_page, dpi))
+            img = Image.new("L", (10, 10))
+            img.info.update(page=first_page, dpi=dpi)
+            return [img]
+
+        def image_to_data(img, **kwargs):
+            legible = img.info["page"] != 2 or img.info["dpi"] >= 300
+            return fake_ocr_data(["INSPECTOR:", "John", "Smith"], 92 if legible else 40)
+
+        monkeypatch.setattr(pdf_utils.settings, "OCR_DPI", 300)
+        monkeypatch.setattr(pdf_utils.settings, "OCR_FIRST_PASS_DPI", 150)
+        monkeypatch.setattr(pdf_utils.settings, "OCR_MIN_WORD_CONFIDENCE", 75)
+        monkeypatch.setattr(pdf_utils, "convert_from_bytes", render)
+        monkeypatch.setattr(pdf_utils.pytesseract, "image_to_data", image_to_data)
+        monkeypatch.setattr(pdf_utils.pytesseract, "image_to_string", lambda img, **kwargs: "INSPECTOR: John Smith")
+        return calls
+
+    def test_only_low_confidence_pages_escalate(self, scanner):
+        """Test that pages re-render at full DPI only when confidence is low"""
+        from app.pdf_utils import ocr_pages
+
+        results = ocr_pages(b"%PDF-1.4", [1, 2, 3])
+
+        assert {n: r["dpi"] for n, r in results.items()} == {1: 150, 2: 300, 3: 150}
+        assert sorted(scanner) == [(1, 150), (2, 150), (2, 300), (3, 150)]
+        assert results[1]["text"] == "INSPECTOR: John Smith\n"
+
+    def test_missing_required_fields_escalate_document(self, scanner):
+        """Test that insufficient text re-reads the remaining low-DPI pages"""
+        from app.pdf_utils import extract_pdf_content
+
+        pdf_bytes = build_pdf(["", "", ""])
+        content = extract_pdf_content(pdf_bytes, is_sufficient=lambda text: False)
+
+        assert content["ocr_pages"] == [1, 2, 3]
+        assert content["page_dpi"] == {1: 300, 2: 300, 3: 300}
+
+    def test_sufficient_text_keeps_low_dpi(self, scanner):
+        """Test that confident first-pass pages are kept when nothing is missing"""
+        from app.pdf_utils import extract_pdf_content
+
+        pdf_bytes = build_pdf(["", "", ""])
+        content = extract_pdf_content(pdf_bytes, is_sufficient=lambda text: "INSPECTOR" in text)
+
+        assert content["page_dpi"] == {1: 150, 2: 300, 3: 150}
+
+
+class TestEarlyTermination:
+    """Test stopping extraction once the verdict fields are known"""
+
+    def test_stops_after_page_with_required_fields(self, monkeypatch):
+        """Test that later pages are skipped once required and date fields are found"""
+        import app.pdf_utils as pdf_utils
+        from app.pipeline import has_confident_fields
+
+        first_page = "\n".join([
+            "CERTIFICATE OF INSURANCE",
+            "INSURED: ACME Construction LLC",
+            "POLICY NUMBER: GL-1234567-2024",
+            "EXPIRY DATE: 12/31/2030",
+        ])
+        filler = "Additional policy wording and endorsements that do not change the verdict."
+        pdf_bytes = build_pdf([first_page] + [filler] * 5)
+        monkeypatch.setattr(pdf_utils.settings, "OCR_WORKERS", 1)
+
+        content = pdf_utils.extract_pdf_content(pdf_bytes, is_complete=has_confident_fields)
+
+        assert content["pages"] == 6
+        assert content["pages_read"] == 1
+        assert "POLICY NUMBER: GL-1234567-2024" in content["text"]
+
+    def test_reads_on_while_fields_missing(self, monkeypatch):
+        """Test that extraction continues until the expiry date appears"""
+        import app.pdf_utils as pdf_utils
+        from app.pipeline import has_confident_fields
+
+        pages = [
+            "CERTIFICATE OF INSURANCE\nINSURED: ACME Construction LLC\nPOLICY NUMBER: GL-1",
+            "Schedule of coverages for the named insured and all listed locations.",
+            "EXPIRY DATE: 12/31/2030\nSigned by the authorized representative of the insurer.",
+            "Additional policy wording and endorsements that do not change the verdict.",
+        ]
+        monkeypatch.setattr(pdf_utils.settings, "OCR_WORKERS", 1)
+
+        content = pdf_utils.extract_pdf_content(build_pdf(pages), is_complete=has_confident_fields)
+
+        assert content["pages_read"] == 3
+
+    def test_field_projection_returns_requested_fields(self, monkeypatch):
+        """Test that a projected request stops early and returns only the requested fields"""
+        import app.pdf_utils as pdf_utils
+        from app.pipeline import process_document
+
+        first_page = "\n".join([
+            "CERTIFICATE OF INSURANCE",
+            "INSURED: ACME Construction LLC",
+            "INSURER: State Farm",
+            "POLICY NUMBER: GL-1234567-2024",
+            "EXPIRY DATE: 12/31/2030",
+        ])
+        filler = "Additional policy wording and endorsements that do not change the verdict."
+        monkeypatch.setattr(pdf_utils.settings, "OCR_WORKERS", 1)
+
+        result = process_document(build_pdf([first_page] + [filler] * 3), fields=frozenset({"expiry_date"}))
+
+        assert result["metadata"]["pages_read"] == 1
+        assert result["fields"] == {"expiry_date": "12/31/2030"}
+        assert result["verdict"] == "pass"
+
+
+class TestOCRBackends:
+    """Test OCR backend selection"""
+
+    def test_auto_falls_back_to_pytesseract(self, monkeypatch):
+        """Test that auto selection works without the tesserocr bindings"""
+        import sys
+        from app.pdf_utils import create_ocr_backend
+
+        monkeypatch.setitem(sys.modules, "tesserocr", None)
+
+        assert create_ocr_backend("auto").name == "pytesseract"
+        with pytest.raises(ImportError):
+            create_ocr_backend("tesserocr")
+
+    def test_unknown_backend_rejected(self):
+        """Test that a misconfigured backend name fails loudly"""
+        from app.pdf_utils import create_ocr_backend
+
+        with pytest.raises(ValueError):
+            create_ocr_backend("abbyy")
+
+    def test_cli_config_maps_to_engine_modes(self):
+        """Test that OCR_CONFIG flags carry over to the in-process engine"""
+        from app.pdf_utils import parse_tesseract_config
+
+        assert parse_tesseract_config("--oem 3 --psm 6") == (6, 3)
+        assert parse_tesseract_config("-c preserve_interword_spaces=1") == (None, None)
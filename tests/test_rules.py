@@ -0,0 +1,116 @@
+"""
+Tests for loading, validating and reloading rule packs
+"""
+
+import shutil
+
+import pytest
+import yaml
+
+import app.rules as rules_module
+from app.config import settings
+from app.parser import analyze_document, compiled_rules
+from app.rules import RuleError, ensure_rules, get_rules, load_rules, reload_rules, rules_changed
+from app.validator import validate_fields
+
+
+FALL_PROTECTION = {
+    "doc_type": "fall_protection",
+    "priority": 40,
+    "keywords": {"harness inspection": 3, "lanyard": 1},
+    "required_fields": ["harness_id", "inspection_date"],
+    "validation": {"kind": "inspection", "date_field": "inspection_date", "result_field": "result", "max_age_days": 180},
+    "fields": {
+        "harness_id": [r"HARNESS\s+ID:\s*([^\n\r]+)"],
+        "inspection_date": [r"INSPECTION\s+DATE:\s*([^\n\r]+)"],
+        "result": [r"RESULT:\s*(PASS|FAIL)"]
+    }
+}
+
+
+@pytest.fixture
+def rules_dir(tmp_path, monkeypatch):
+    """Copy of the default rule packs that the active rules are loaded from"""
+    path = tmp_path / "rules"
+    shutil.copytree(settings.RULES_PATH, path)
+    monkeypatch.setattr(settings, "RULES_PATH", str(path))
+    monkeypatch.setattr(rules_module, "_active_rules", None)
+    return path
+
+
+def write_pack(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(data, f)
+
+
+class TestLoadRules:
+    """Test parsing and validating rule packs"""
+
+    def test_default_packs(self):
+        """Test that the shipped packs load in priority order with a stable version"""
+        rules = load_rules(settings.RULES_PATH)
+
+        assert list(rules.doc_types) == ["insurance", "inspection", "training"]
+        assert rules.get("inspection").date_field == "inspection_date"
+        assert rules.version == load_rules(settings.RULES_PATH).version
+
+    @pytest.mark.parametrize("change, message", [
+        ({"fields": {"harness_id": ["HARNESS ID:\\s*([unclosed"]}}, "invalid pattern"),
+        ({"fields": {"harness_id": ["HARNESS ID: .*"]}}, "no capture group"),
+        ({"required_fields": ["serial"]}, "required fields without patterns"),
+        ({"validation": {"kind": "expiry", "date_field": "inspection_date"}}, "grace_days"),
+        ({"validation": {"kind": "sometimes"}}, "validation.kind"),
+        ({"priority": "high"}, "priority must be a number"),
+        ({"required_fields": "harness_id"}, "required_fields must be a list"),
+    ])
+    def test_invalid_pack(self, tmp_path, change, message):
+        """Test that malformed packs are rejected with the reason"""
+        write_pack(tmp_path / "bad.yaml", dict(FALL_PROTECTION, **change))
+        with pytest.raises(RuleError, match=message):
+            load_rules(str(tmp_path))
+
+    def test_duplicate_doc_type(self, tmp_path):
+        """Test that two packs cannot define the same doc type"""
+        write_pack(tmp_path / "a.yaml", FALL_PROTECTION)
+        write_pack(tmp_path / "b.yaml", FALL_PROTECTION)
+        with pytest.raises(RuleError, match="more than once"):
+            load_rules(str(tmp_path))
+
+
+class TestReloadRules:
+    """Test swapping rule sets while the service runs"""
+
+    def test_new_doc_type_without_code_changes(self, rules_dir):
+        """Test that a dropped-in pack is classified, parsed and validated after a reload"""
+        old_version = get_rules().version
+        write_pack(rules_dir / "fall_protection.yaml", FALL_PROTECTION)
+        assert rules_changed()
+
+        rules = reload_rules()
+        assert rules.version != old_version
+        assert compiled_rules().version == rules.version
+
+        text = "Harness inspection record\nHARNESS ID: H-42\nINSPECTION DATE: 01/01/2000\nRESULT: PASS"
+        analysis = analyze_document(text)
+        assert analysis["doc_type"] == "fall_protection"
+        assert analysis["fields"]["harness_id"] == "H-42"
+        assert validate_fields(analysis["fields"], "fall_protection") == "fail"  # Older than 180 days
+
+    def test_invalid_reload_keeps_current_rules(self, rules_dir):
+        """Test that a broken pack leaves the active rules in place"""
+        current = get_rules()
+        write_pack(rules_dir / "broken.yaml", {"doc_type": "broken"})
+
+        with pytest.raises(RuleError):
+            reload_rules()
+        assert get_rules() is current
+
+    def test_ensure_rules_follows_version(self, rules_dir):
+        """Test that a process with stale rules reloads to the expected version"""
+        stale = get_rules()
+        write_pack(rules_dir / "fall_protection.yaml", FALL_PROTECTION)
+        expected = load_rules(str(rules_dir)).version
+
+        assert ensure_rules(None) is stale
+        assert ensure_rules(expected).version == expected
+        assert "fall_protection" in get_rules().doc_types
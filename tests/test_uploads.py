@@ -0,0 +1,151 @@
+"""
+Tests for streaming upload handling
+"""
+
+import hashlib
+import os
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.uploads import SpooledUpload, UploadTooLargeError, receive_uploads
+
+
+@pytest.fixture
+def client():
+    """App that reports what receive_uploads produced for each file"""
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        files = await receive_uploads(request)
+        try:
+            return [{
+                "filename": f.filename,
+                "size": f.size,
+                "digest": f.digest,
+                "on_disk": f.on_disk,
+                "path_exists": f.on_disk and os.path.exists(f.path),
+                "error": f.error
+            } for f in files]
+        finally:
+            for f in files:
+                f.close()
+
+    return TestClient(app)
+
+
+class TestSpooledUpload:
+    """Test in-memory buffering and spooling to disk"""
+
+    def test_small_upload_stays_in_memory(self):
+        """Test that content under the threshold is returned as bytes"""
+        upload = SpooledUpload("a.pdf", spool_threshold=100)
+        upload.write(b"%PDF-1.4")
+        upload.finish()
+
+        assert not upload.on_disk
+        assert upload.source == b"%PDF-1.4"
+        assert upload.digest == hashlib.sha256(b"%PDF-1.4").hexdigest()
+
+    def test_large_upload_spools_to_disk(self, tmp_path):
+        """Test that content over the threshold moves to a temp file that close removes"""
+        upload = SpooledUpload("a.pdf", spool_threshold=10, spool_dir=str(tmp_path))
+        upload.write(b"0123456789")
+        upload.write(b"abcdef")
+        upload.finish()
+
+        assert upload.on_disk
+        with open(upload.source, "rb") as f:
+            assert f.read() == b"0123456789abcdef"
+
+        path = upload.path
+        upload.close()
+        assert not os.path.exists(path)
+
+    def test_reject_discards_content(self, tmp_path):
+        """Test that a rejected upload drops its data and ignores later writes"""
+        upload = SpooledUpload("a.pdf", spool_threshold=4, spool_dir=str(tmp_path))
+        upload.write(b"0123456789")
+        upload.reject("too large")
+        upload.write(b"more")
+
+        assert upload.error == "too large"
+        assert upload.source == b""
+        assert list(tmp_path.iterdir()) == []
+
+    def test_write_past_max_size_raises(self):
+        """Test that a write over the size limit is refused without storing any of it"""
+        upload = SpooledUpload("a.pdf", spool_threshold=100, max_size=10)
+        upload.write(b"0123456789")
+        with pytest.raises(UploadTooLargeError):
+            upload.write(b"x")
+
+        assert upload.size == 10
+        assert upload.source == b"0123456789"
+
+
+class TestReceiveUploads:
+    """Test parsing multipart bodies as they stream in"""
+
+    def test_files_received_in_order_with_digest(self, client, monkeypatch):
+        """Test that each file is hashed and spooled according to its size"""
+        monkeypatch.setattr(settings, "UPLOAD_SPOOL_THRESHOLD", 1024)
+        small, large = b"%PDF small", b"%PDF " + b"x" * 4096
+        response = client.post("/upload", files=[
+            ("files", ("small.pdf", small, "application/pdf")),
+            ("files", ("large.pdf", large, "application/pdf")),
+        ])
+
+        assert response.status_code == 200
+        small_result, large_result = response.json()
+        assert small_result["filename"] == "small.pdf"
+        assert small_result["digest"] == hashlib.sha256(small).hexdigest()
+        assert not small_result["on_disk"]
+        assert large_result["size"] == len(large)
+        assert large_result["digest"] == hashlib.sha256(large).hexdigest()
+        assert large_result["path_exists"]
+
+    def test_oversized_file_rejected_while_streaming(self, client, monkeypatch):
+        """Test that a file over MAX_FILE_SIZE is rejected without affecting the others"""
+        monkeypatch.setattr(settings, "MAX_FILE_SIZE", 1024)
+        response = client.post("/upload", files=[
+            ("files", ("big.pdf", b"0" * 4096, "application/pdf")),
+            ("files", ("ok.pdf", b"%PDF ok", "application/pdf")),
+        ])
+
+        assert response.status_code == 200
+        big, ok = response.json()
+        assert "too large" in big["error"]
+        assert big["size"] <= 1024
+        assert ok["error"] is None
+
+    def test_invalid_extension_reported(self, client):
+        """Test that non-PDF files are marked with an error"""
+        response = client.post("/upload", files={"files": ("notes.txt", b"text", "text/plain")})
+
+        assert response.status_code == 200
+        assert "Invalid file type" in response.json()[0]["error"]
+
+    def test_too_many_files(self, client, monkeypatch):
+        """Test that more than MAX_FILES_PER_REQUEST files is a bad request"""
+        monkeypatch.setattr(settings, "MAX_FILES_PER_REQUEST", 2)
+        files = [("files", (f"{i}.pdf", b"%PDF", "application/pdf")) for i in range(3)]
+        response = client.post("/upload", files=files)
+
+        assert response.status_code == 400
+
+    def test_oversized_body_rejected(self, client, monkeypatch):
+        """Test that a body larger than max files x max size is refused"""
+        monkeypatch.setattr(settings, "MAX_FILE_SIZE", 1024)
+        monkeypatch.setattr(settings, "MAX_FILES_PER_REQUEST", 1)
+        response = client.post("/upload", files={"files": ("a.pdf", b"0" * (2 * 1024 * 1024), "application/pdf")})
+
+        assert response.status_code == 413
+
+    def test_no_files(self, client):
+        """Test that a request without files is rejected"""
+        assert client.post("/upload").status_code == 422
+        assert client.post("/upload", data={"other": "value"}).status_code == 422
@@ -0,0 +1,107 @@
+"""
+Tests for the rule-driven validation engine
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.main import verdict_cache_headers
+from app.models import DocumentResult, as_utc
+from app.validator import evaluate, get_validation_details, validate_fields
+
+
+NOW = datetime(2025, 6, 1)
+
+
+class TestEvaluate:
+    """Test verdicts and details from a single evaluation"""
+
+    @pytest.mark.parametrize("expiry, verdict, expired", [
+        ("12/31/2025", "pass", []),
+        ("05/15/2025", "pass", ["expiry_date"]),  # Past expiry but within the grace period
+        ("01/31/2025", "fail", ["expiry_date"]),
+        ("someday", "unknown", []),
+    ])
+    def test_expiry(self, expiry, verdict, expired):
+        """Test expiry dates against the reference time and grace period"""
+        fields = {"insured": "ACME", "policy_number": "GL-1", "expiry_date": expiry}
+        result = evaluate(fields, "insurance", NOW)
+
+        assert result["verdict"] == verdict
+        assert result["expired_fields"] == expired
+        assert result["missing_fields"] == []
+
+    @pytest.mark.parametrize("date, result, verdict", [
+        ("2025-01-10", "PASS", "pass"),
+        ("2024-01-10", "PASS", "fail"),
+        ("not recorded", "pass", "pass"),
+        ("2025-01-10", "FAIL", "fail"),
+        ("2025-01-10", "", "unknown"),
+    ])
+    def test_inspection(self, date, result, verdict):
+        """Test inspection results and their maximum age"""
+        fields = {"inspector": "Jane", "inspection_date": date, "result": result}
+        assert evaluate(fields, "inspection", NOW)["verdict"] == verdict
+
+    def test_missing_fields_fail_with_details(self):
+        """Test that missing required fields are listed and fail the document"""
+        result = evaluate({"insured": "ACME", "expiry_date": "12/31/2025"}, "insurance", NOW)
+
+        assert result["verdict"] == "fail"
+        assert result["missing_fields"] == ["policy_number"]
+        assert result["warnings"] == ["Missing required fields: policy_number"]
+
+    def test_wrappers_agree(self):
+        """Test that validate_fields and get_validation_details come from the same evaluation"""
+        fields = {"worker_name": "Al", "certificate_id": "C-1", "expiry_date": "03/04/2025"}
+        result = evaluate(fields, "training", NOW)
+
+        assert validate_fields(fields, "training", NOW) == result.pop("verdict")
+        assert get_validation_details(fields, "training", NOW) == result
+        assert "Ambiguous date expiry_date='03/04/2025' read as %m/%d/%Y" in result["warnings"]
+
+    def test_unknown_doc_type(self):
+        """Test that types without rules are unknown with empty details"""
+        assert evaluate({}, "invoice", NOW) == {
+            "verdict": "unknown", "missing_fields": [], "expired_fields": [], "warnings": [], "valid_until": None
+        }
+
+
+class TestValidUntil:
+    """Test when a verdict can next change"""
+
+    @pytest.mark.parametrize("expiry, valid_until", [
+        ("12/31/2025", datetime(2025, 12, 31)),  # Expiry date passes first
+        ("05/15/2025", datetime(2025, 6, 14)),  # Then the grace period ends
+        ("01/31/2025", None),  # Already failed for good
+        ("someday", None),
+    ])
+    def test_expiry_boundaries(self, expiry, valid_until):
+        """Test the expiry date and end of the grace period as boundaries"""
+        fields = {"insured": "ACME", "policy_number": "GL-1", "expiry_date": expiry}
+        assert evaluate(fields, "insurance", NOW)["valid_until"] == valid_until
+
+    def test_inspection_boundary(self):
+        """Test that an inspection is valid until it reaches its maximum age"""
+        fields = {"inspector": "Jane", "inspection_date": "2025-01-10", "result": "PASS"}
+        result = evaluate(fields, "inspection", NOW)
+
+        assert result["valid_until"] == datetime(2026, 1, 10)
+        assert evaluate(fields, "inspection", result["valid_until"])["verdict"] == "fail"
+        assert evaluate(fields, "inspection", result["valid_until"] - timedelta(seconds=1))["verdict"] == "pass"
+
+    def test_cache_headers(self):
+        """Test that responses are cacheable until the first verdict can change"""
+        results = [
+            DocumentResult(file="a.pdf", doc_type="insurance", fields={}, verdict="pass", valid_until=NOW + timedelta(hours=2)),
+            DocumentResult(file="b.pdf", doc_type="training", fields={}, verdict="fail"),
+        ]
+        headers = verdict_cache_headers(results, NOW)
+        assert headers["Cache-Control"] == "private, max-age=7200"
+        assert headers["Expires"].endswith("GMT")
+        assert results[0].valid_until == as_utc(NOW + timedelta(hours=2))
+        assert results[0].model_dump(mode="json")["valid_until"].endswith("Z")
+
+        results.append(DocumentResult(file="c.pdf", doc_type="error", fields={}, verdict="fail"))
+        assert verdict_cache_headers(results, NOW) == {"Cache-Control": "no-store"}